@@ -1,16 +1,50 @@
 import asyncio
 import sys
+from contextlib import asynccontextmanager
 
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from backend.routers import auth, lists, todos, users, guest, template_items
+from backend.compression import CompressionMiddleware
+from backend.database import pin_writers_to_primary
+from backend.events import broker
+from backend.idempotency import purge_expired_keys_periodically
+from backend.metrics import MetricsMiddleware
+from backend.rate_limit import login_limiter
+from backend.routers import (
+    auth,
+    guest,
+    health,
+    lists,
+    metrics,
+    template_items,
+    todos,
+    users,
+)
 from backend.settings import Settings
 
 if sys.platform == 'win32':
     asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await broker.start()
+    await login_limiter.start()
+    purge = asyncio.create_task(purge_expired_keys_periodically())
+    yield
+    purge.cancel()
+    try:
+        await purge
+    except asyncio.CancelledError:
+        pass
+    await login_limiter.stop()
+    await broker.stop()
+
+
+app = FastAPI(
+    lifespan=lifespan, dependencies=[Depends(pin_writers_to_primary)]
+)
 
 settings = Settings()
 origins = settings.cors_origins() or [
@@ -25,6 +59,9 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(CompressionMiddleware)
+# Outermost, so the recorded latency covers the whole middleware stack
+app.add_middleware(MetricsMiddleware)
 
 app.include_router(users.router)
 app.include_router(auth.router)
@@ -32,3 +69,5 @@ app.include_router(todos.router)
 app.include_router(lists.router)
 app.include_router(guest.router)
 app.include_router(template_items.router)
+app.include_router(health.router)
+app.include_router(metrics.router)
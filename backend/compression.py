@@ -0,0 +1,192 @@
+import zlib
+
+from starlette.datastructures import Headers, MutableHeaders
+
+from backend.settings import Settings
+
+try:
+    import brotli
+except ImportError:  # optional
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # optional
+    zstandard = None
+
+settings = Settings()
+
+# Cheap levels: responses are compressed on every request
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 4
+ZSTD_LEVEL = 3
+
+# Content types that must reach the client chunk by chunk, unbuffered
+UNCOMPRESSED_TYPES = ('text/event-stream',)
+
+
+class GzipEncoder:
+    def __init__(self):
+        # wbits 16 + 15: gzip container, 32K window
+        self._compressor = zlib.compressobj(
+            GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS
+        )
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        # A sync flush makes every chunk decodable as soon as it arrives
+        mode = zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH
+        return self._compressor.compress(data) + self._compressor.flush(mode)
+
+
+class BrotliEncoder:
+    def __init__(self):
+        self._compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        compressed = self._compressor.process(data)
+        if final:
+            return compressed + self._compressor.finish()
+        return compressed + self._compressor.flush()
+
+
+class ZstdEncoder:
+    def __init__(self):
+        self._compressor = zstandard.ZstdCompressor(
+            level=ZSTD_LEVEL
+        ).compressobj()
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        mode = (
+            zstandard.COMPRESSOBJ_FLUSH_FINISH
+            if final
+            else zstandard.COMPRESSOBJ_FLUSH_BLOCK
+        )
+        return self._compressor.compress(data) + self._compressor.flush(mode)
+
+
+def available_encoders() -> dict[str, type]:
+    """Encoders that can be used here, in order of preference."""
+    encoders = {}
+    if zstandard is not None:
+        encoders['zstd'] = ZstdEncoder
+    if brotli is not None:
+        encoders['br'] = BrotliEncoder
+    encoders['gzip'] = GzipEncoder
+    return encoders
+
+
+def negotiate(accept_encoding: str, encodings) -> str | None:
+    """Pick the encoding the client weighs highest (``q``), ties going to
+    the order of ``encodings``; ``None`` means send it uncompressed."""
+    weights = {}
+    for part in accept_encoding.split(','):
+        name, *params = (p.strip() for p in part.split(';'))
+        if not name:
+            continue
+        weight = 1.0
+        for param in params:
+            key, _, value = param.partition('=')
+            if key.strip().lower() == 'q':
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        weights[name.lower()] = weight
+
+    best, best_weight = None, 0.0
+    for encoding in encodings:
+        weight = weights.get(encoding, weights.get('*', 0.0))
+        if weight > best_weight:
+            best, best_weight = encoding, weight
+    return best
+
+
+def _weaken_etag(headers: MutableHeaders):
+    # A strong ETag promises byte-identical bodies, which the encoded and
+    # identity variants are not
+    etag = headers.get('etag')
+    if etag and not etag.startswith('W/'):
+        headers['ETag'] = f'W/{etag}'
+
+
+class CompressionMiddleware:
+    """ASGI middleware compressing responses per ``Accept-Encoding``.
+
+    zstd and brotli are offered when their packages are installed, gzip
+    always. Bodies under ``minimum_size`` are sent as they are; streamed
+    bodies are compressed chunk by chunk, each one flushed so the client
+    can decode it right away. Server-sent events are never compressed.
+    Strong ETags of compressed responses are made weak.
+    """
+
+    def __init__(
+        self, app, minimum_size: int = settings.COMPRESSION_MINIMUM_SIZE
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.encoders = available_encoders()
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate(
+            Headers(scope=scope).get('accept-encoding', ''), self.encoders
+        )
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start = None
+        encoder = None
+
+        async def send_wrapper(message):
+            nonlocal start, encoder
+            if message['type'] == 'http.response.start':
+                # Held back until the first body chunk decides the headers
+                start = message
+                return
+            if message['type'] != 'http.response.body':
+                await send(message)
+                return
+
+            body = message.get('body', b'')
+            more_body = message.get('more_body', False)
+            if start is not None:
+                initial, start = start, None
+                headers = MutableHeaders(raw=initial['headers'])
+                if self._skip(headers, body, more_body):
+                    await send(initial)
+                    await send(message)
+                    return
+                encoder = self.encoders[encoding]()
+                body = encoder.compress(body, final=not more_body)
+                headers['Content-Encoding'] = encoding
+                headers.add_vary_header('Accept-Encoding')
+                _weaken_etag(headers)
+                if more_body:
+                    del headers['Content-Length']
+                else:
+                    headers['Content-Length'] = str(len(body))
+                await send(initial)
+            elif encoder is not None:
+                body = encoder.compress(body, final=not more_body)
+            else:
+                await send(message)
+                return
+
+            await send({
+                'type': 'http.response.body',
+                'body': body,
+                'more_body': more_body,
+            })
+
+        await self.app(scope, receive, send_wrapper)
+
+    def _skip(self, headers: MutableHeaders, body: bytes, more_body: bool):
+        return (
+            'content-encoding' in headers
+            or headers.get('content-type', '').startswith(UNCOMPRESSED_TYPES)
+            or (not more_body and len(body) < self.minimum_size)
+        )
@@ -1,7 +1,19 @@
 import logging
+import time
+from collections.abc import Awaitable, Callable
 
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
+from fastapi import Depends, Request
+from sqlalchemy import exc, text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
+from backend.cache import TTLCache
 from backend.settings import Settings
 
 _settings = Settings()
@@ -19,10 +31,229 @@ try:
 except Exception:  # pragma: no cover - best-effort mask
     pass
 
-engine = create_async_engine(_db_url, pool_pre_ping=True)
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    """Queue pool that also records how long checkouts take.
+
+    The wait covers queueing for a free connection and, when the pool is
+    not full yet, opening a new one.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            self.timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - start
+            self.checkouts += 1
+            self.wait_seconds_total += waited
+            self.wait_seconds_max = max(self.wait_seconds_max, waited)
+
+    def stats(self) -> dict[str, int | float]:
+        return {
+            'size': self.size(),
+            'checked_out': self.checkedout(),
+            'checked_in': self.checkedin(),
+            'overflow': max(self.overflow(), 0),
+            'max_overflow': self._max_overflow,
+            'checkouts': self.checkouts,
+            'timeouts': self.timeouts,
+            'wait_seconds_total': self.wait_seconds_total,
+            'wait_seconds_max': self.wait_seconds_max,
+        }
+
+
+def build_engine(settings: Settings, url: str | None = None) -> AsyncEngine:
+    url = url or settings.database_url_async()
+    if url.startswith('sqlite'):
+        # SQLite picks its own pool (StaticPool for :memory:)
+        return create_async_engine(url)
+    return create_async_engine(
+        url,
+        poolclass=InstrumentedPool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+    )
+
+
+engine = build_engine(_settings)
 async_session_maker = async_sessionmaker(engine, expire_on_commit=False)
 
 
+def pool_stats(bind: AsyncEngine = engine) -> dict[str, int | float] | None:
+    pool = bind.pool
+    return pool.stats() if isinstance(pool, InstrumentedPool) else None
+
+
 async def get_session():  # pragma: no cover
     async with async_session_maker() as session:
         yield session
+
+
+# Seconds a hot standby is behind; 0 when it has replayed everything it
+# received (an idle primary would otherwise look ever more behind) or
+# when the URL points at a primary
+REPLICA_LAG_QUERY = text(
+    'SELECT CASE'
+    ' WHEN NOT pg_is_in_recovery()'
+    ' OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0'
+    ' ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())'
+    ' END'
+)
+
+
+LagProbe = Callable[[AsyncEngine], Awaitable[float | None]]
+
+
+async def measure_replica_lag(bind: AsyncEngine) -> float | None:
+    if bind.dialect.name != 'postgresql':
+        return 0.0
+    async with bind.connect() as conn:
+        lag = await conn.scalar(REPLICA_LAG_QUERY)
+    return None if lag is None else float(lag)
+
+
+class ReadReplica:
+    """Read replica used while its replay lag stays under ``max_lag``.
+
+    The lag is measured by the first request that finds the last check
+    older than ``check_interval`` seconds; requests arriving meanwhile use
+    the previous result. A lag that cannot be measured counts as too high.
+    """
+
+    def __init__(
+        self,
+        engine: AsyncEngine,
+        *,
+        max_lag: float,
+        check_interval: float,
+        measure_lag: LagProbe = measure_replica_lag,
+        timer: Callable[[], float] = time.monotonic,
+    ):
+        self.engine = engine
+        # Marked so that data which may lag is kept out of shared caches
+        self.session_maker = async_sessionmaker(
+            engine, expire_on_commit=False, info={'replica': True}
+        )
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self._measure_lag = measure_lag
+        self._timer = timer
+        self._checked_at = float('-inf')
+        self._checking = False
+        self.lag: float | None = None
+        self.reads = 0
+        self.fallbacks = 0
+
+    @property
+    def healthy(self) -> bool:
+        return self.lag is not None and self.lag <= self.max_lag
+
+    async def check(self) -> bool:
+        now = self._timer()
+        if self._checking or now - self._checked_at < self.check_interval:
+            return self.healthy
+        self._checking = True
+        try:
+            self.lag = await self._measure_lag(self.engine)
+        except (exc.SQLAlchemyError, OSError):
+            logging.getLogger(__name__).warning(
+                'Replica lag check failed', exc_info=True
+            )
+            self.lag = None
+        finally:
+            self._checked_at = now
+            self._checking = False
+        return self.healthy
+
+    def stats(self) -> dict[str, int | float | bool | None]:
+        return {
+            'healthy': self.healthy,
+            'lag_seconds': self.lag,
+            'reads': self.reads,
+            'fallbacks': self.fallbacks,
+        }
+
+
+def build_replica(settings: Settings) -> ReadReplica | None:
+    url = settings.database_replica_url_async()
+    if not url:
+        return None
+    return ReadReplica(
+        build_engine(settings, url),
+        max_lag=settings.REPLICA_MAX_LAG_SECONDS,
+        check_interval=settings.REPLICA_LAG_CHECK_SECONDS,
+    )
+
+
+replica = build_replica(_settings)
+
+# Clients (by Authorization header) that wrote recently read from the
+# primary until a healthy replica must have replayed their writes
+PINNED_CLIENTS_MAX_SIZE = 4096
+pinned_clients = TTLCache(
+    'replica_pinned_clients',
+    maxsize=PINNED_CLIENTS_MAX_SIZE,
+    ttl=(
+        _settings.REPLICA_MAX_LAG_SECONDS + _settings.REPLICA_LAG_CHECK_SECONDS
+    ),
+)
+
+SAFE_METHODS = frozenset({'GET', 'HEAD', 'OPTIONS'})
+
+
+def replica_stats() -> dict | None:
+    if replica is None:
+        return None
+    return {**replica.stats(), 'pool': pool_stats(replica.engine)}
+
+
+async def pin_writers_to_primary(request: Request):
+    """App-wide dependency keeping writers' next reads on the primary."""
+    if replica is None or request.method in SAFE_METHODS:
+        return
+    client = request.headers.get('authorization')
+    if client:
+        pinned_clients.set(client, True)
+
+
+async def get_read_session(
+    request: Request, session: AsyncSession = Depends(get_session)
+):
+    """Session for read-only endpoints.
+
+    Uses the replica when one is configured, it keeps up and the client
+    has not written recently; otherwise the request's primary session.
+    """
+    if replica is None:
+        yield session
+        return
+    client = request.headers.get('authorization')
+    pinned = client is not None and pinned_clients.get(client)
+    if pinned or not await replica.check():
+        replica.fallbacks += 1
+        yield session
+        return
+    replica.reads += 1
+    async with replica.session_maker() as replica_session:
+        yield replica_session
+
+
+def dialect_insert(session: AsyncSession):
+    """Return the ``insert`` construct supporting ON CONFLICT for the bind."""
+    if session.get_bind().dialect.name == 'sqlite':
+        return sqlite.insert
+    return postgresql.insert
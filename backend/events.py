@@ -0,0 +1,220 @@
+import asyncio
+import json
+import logging
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Any
+
+import psycopg
+from sqlalchemy.engine import make_url
+
+from backend.settings import Settings
+
+logger = logging.getLogger(__name__)
+
+settings = Settings()
+
+NOTIFY_CHANNEL = 'gift_events'
+RECONNECT_DELAY_SECONDS = 1
+# Doubled after each failed attempt, up to this
+MAX_RECONNECT_DELAY_SECONDS = 30
+
+# Queued instead of an event when a subscriber has to close its stream
+_CLOSE = None
+
+
+@dataclass(eq=False)
+class _Subscriber:
+    queue: asyncio.Queue
+    loop: asyncio.AbstractEventLoop
+
+
+def _put(queue: asyncio.Queue, message: tuple[str, dict] | None):
+    # A stalled client must not buffer forever: drop its backlog and ask it
+    # to refetch the list instead.
+    if queue.full():
+        while not queue.empty():
+            queue.get_nowait()
+        if message is not _CLOSE:
+            message = ('reset', {})
+    queue.put_nowait(message)
+
+
+class GiftEventBroker:
+    """Fan out gift item deltas of a list to the SSE streams of a process.
+
+    Each stream gets its own bounded queue; ``publish`` never blocks on
+    slow clients.
+    """
+
+    def __init__(self, queue_size: int):
+        self.queue_size = queue_size
+        self._subscribers: dict[int, set[_Subscriber]] = {}
+
+    def subscriber_count(self, list_id: int | None = None) -> int:
+        if list_id is not None:
+            return len(self._subscribers.get(list_id, ()))
+        return sum(len(subs) for subs in self._subscribers.values())
+
+    @asynccontextmanager
+    async def subscribe(self, list_id: int) -> AsyncIterator[asyncio.Queue]:
+        subscriber = _Subscriber(
+            asyncio.Queue(self.queue_size), asyncio.get_running_loop()
+        )
+        self._subscribers.setdefault(list_id, set()).add(subscriber)
+        try:
+            yield subscriber.queue
+        finally:
+            subscribers = self._subscribers.get(list_id, set())
+            subscribers.discard(subscriber)
+            if not subscribers:
+                self._subscribers.pop(list_id, None)
+
+    async def publish(self, list_id: int, event: str, data: dict[str, Any]):
+        self.deliver(list_id, (event, data))
+
+    def deliver(self, list_id: int, message: tuple[str, dict] | None):
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        for subscriber in tuple(self._subscribers.get(list_id, ())):
+            if subscriber.loop is running:
+                _put(subscriber.queue, message)
+            else:
+                subscriber.loop.call_soon_threadsafe(
+                    _put, subscriber.queue, message
+                )
+
+    async def start(self):
+        pass
+
+    async def stop(self):
+        for list_id in tuple(self._subscribers):
+            self.deliver(list_id, _CLOSE)
+
+
+class PostgresGiftEventBroker(GiftEventBroker):
+    """Relay events through Postgres LISTEN/NOTIFY.
+
+    Every worker listens on the same channel, so a reservation committed
+    by one process reaches the streams held by all of them (including its
+    own, through the listener).
+    """
+
+    def __init__(self, conninfo: str, queue_size: int):
+        super().__init__(queue_size)
+        self.conninfo = conninfo
+        self._publisher: psycopg.AsyncConnection | None = None
+        self._publish_lock = asyncio.Lock()
+        self._listener: asyncio.Task | None = None
+
+    async def start(self):
+        self._listener = asyncio.create_task(self._listen())
+
+    async def stop(self):
+        if self._listener:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+        if self._publisher:
+            await self._publisher.close()
+            self._publisher = None
+        await super().stop()
+
+    async def publish(self, list_id: int, event: str, data: dict[str, Any]):
+        payload = json.dumps({
+            'list_id': list_id,
+            'event': event,
+            'data': data,
+        })
+        try:
+            async with self._publish_lock:
+                if self._publisher is None or self._publisher.closed:
+                    self._publisher = await psycopg.AsyncConnection.connect(
+                        self.conninfo, autocommit=True
+                    )
+                await self._publisher.execute(
+                    'SELECT pg_notify(%s, %s)', (NOTIFY_CHANNEL, payload)
+                )
+        except psycopg.Error:
+            logger.exception('Could not notify gift event, delivering locally')
+            self.deliver(list_id, (event, data))
+
+    def _relay(self, payload: str):
+        try:
+            message = json.loads(payload)
+            self.deliver(
+                message['list_id'], (message['event'], message['data'])
+            )
+        except Exception:
+            # One bad notification must not stop the listener
+            logger.exception('Could not relay gift event %r', payload)
+
+    async def _listen(self):
+        reconnecting = False
+        delay = RECONNECT_DELAY_SECONDS
+        while True:
+            try:
+                async with await psycopg.AsyncConnection.connect(
+                    self.conninfo, autocommit=True
+                ) as conn:
+                    await conn.execute(f'LISTEN {NOTIFY_CHANNEL}')
+                    if reconnecting:
+                        # Events may have been missed while disconnected
+                        for list_id in tuple(self._subscribers):
+                            self.deliver(list_id, ('reset', {}))
+                    reconnecting = False
+                    delay = RECONNECT_DELAY_SECONDS
+                    async for notify in conn.notifies():
+                        self._relay(notify.payload)
+            except Exception:
+                # Cancellation (on stop) is not an Exception and ends it
+                logger.warning(
+                    'Gift event listener failed, reconnecting in %ss',
+                    delay,
+                    exc_info=True,
+                )
+                reconnecting = True
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, MAX_RECONNECT_DELAY_SECONDS)
+
+
+def create_broker(settings: Settings) -> GiftEventBroker:
+    if settings.EVENTS_BACKEND == 'postgres':
+        url = make_url(settings.database_url_async()).set(
+            drivername='postgresql'
+        )
+        return PostgresGiftEventBroker(
+            url.render_as_string(hide_password=False),
+            settings.EVENTS_QUEUE_SIZE,
+        )
+    return GiftEventBroker(settings.EVENTS_QUEUE_SIZE)
+
+
+broker = create_broker(settings)
+
+
+def format_sse(event: str, data: dict[str, Any]) -> str:
+    return f'event: {event}\ndata: {json.dumps(data)}\n\n'
+
+
+async def gift_event_stream(
+    list_id: int, keepalive: float = settings.EVENTS_KEEPALIVE_SECONDS
+) -> AsyncIterator[str]:
+    """Server-Sent Events for one list, with comment lines as keepalive."""
+    async with broker.subscribe(list_id) as queue:
+        yield ': connected\n\n'
+        while True:
+            try:
+                message = await asyncio.wait_for(queue.get(), keepalive)
+            except TimeoutError:
+                yield ': keepalive\n\n'
+                continue
+            if message is _CLOSE:
+                return
+            yield format_sse(*message)
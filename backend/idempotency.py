@@ -0,0 +1,198 @@
+import asyncio
+import hashlib
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from http import HTTPStatus
+from typing import Annotated, Any
+from zoneinfo import ZoneInfo
+
+from fastapi import Depends, Header, HTTPException, Request, Response
+from sqlalchemy import delete, exc, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.cache import TTLCache
+from backend.database import async_session_maker, dialect_insert, get_session
+from backend.models import IdempotencyKey
+from backend.responses import ModelResponse
+from backend.security import Principal, get_current_user
+from backend.settings import Settings
+
+settings = Settings()
+
+MAX_KEY_LENGTH = 255
+REPLAYED_HEADER = 'Idempotent-Replayed'
+
+
+@dataclass(frozen=True)
+class StoredResponse:
+    fingerprint: str
+    status_code: int | None
+    body: bytes | None
+
+
+# Committed responses by (user id, key), replayed without a query
+stored_responses = TTLCache(
+    'idempotency_keys',
+    maxsize=settings.IDEMPOTENCY_CACHE_MAX_SIZE,
+    ttl=settings.IDEMPOTENCY_KEY_TTL_SECONDS,
+)
+
+
+def _now() -> datetime:
+    return datetime.now(tz=ZoneInfo('UTC'))
+
+
+class IdempotentRequest:
+    """Write whose response is stored under the ``Idempotency-Key`` header.
+
+    Handlers call :meth:`replay` before doing any work, returning the
+    response it gives back, and render their response with :meth:`save`
+    before committing, so the response is stored in the same transaction
+    as the write. Without the header, nothing is stored.
+    """
+
+    def __init__(
+        self,
+        session: AsyncSession,
+        user_id: int,
+        key: str | None,
+        fingerprint: str | None,
+    ):
+        self.session = session
+        self.user_id = user_id
+        self.key = key
+        self.fingerprint = fingerprint
+        self.claimed_id: int | None = None
+        self.saved: StoredResponse | None = None
+
+    async def replay(self) -> Response | None:
+        """Claim the key, or return the response stored under it."""
+        if self.key is None:
+            return None
+        stored = stored_responses.get((self.user_id, self.key))
+        if stored is None:
+            # A concurrent request holding the key makes this insert wait
+            # for its transaction, then do nothing if it committed
+            claim = (
+                dialect_insert(self.session)(IdempotencyKey)
+                .values(
+                    user_id=self.user_id,
+                    key=self.key,
+                    fingerprint=self.fingerprint,
+                    expires_at=_now()
+                    + timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL_SECONDS),
+                )
+                .on_conflict_do_nothing(
+                    index_elements=[IdempotencyKey.user_id, IdempotencyKey.key]
+                )
+                .returning(IdempotencyKey.id)
+            )
+            self.claimed_id = await self.session.scalar(claim)
+            if self.claimed_id is not None:
+                return None
+            row = (
+                await self.session.execute(
+                    select(
+                        IdempotencyKey.fingerprint,
+                        IdempotencyKey.status_code,
+                        IdempotencyKey.response_body,
+                    ).where(
+                        IdempotencyKey.user_id == self.user_id,
+                        IdempotencyKey.key == self.key,
+                    )
+                )
+            ).one()
+            stored = StoredResponse(*row)
+
+        if stored.fingerprint != self.fingerprint:
+            raise HTTPException(
+                status_code=HTTPStatus.UNPROCESSABLE_ENTITY,
+                detail='Idempotency-Key already used for another request',
+            )
+        if stored.status_code is None:
+            raise HTTPException(
+                status_code=HTTPStatus.CONFLICT,
+                detail='A request with this Idempotency-Key is in progress',
+            )
+        stored_responses.set((self.user_id, self.key), stored)
+        return Response(
+            stored.body,
+            stored.status_code,
+            headers={REPLAYED_HEADER: 'true'},
+            media_type='application/json',
+        )
+
+    async def save(
+        self, schema: Any, content: Any, status_code: int = HTTPStatus.OK
+    ) -> Response:
+        """Render the response, storing it under the claimed key."""
+        # Database-generated values (ids) are part of the response
+        await self.session.flush()
+        response = ModelResponse(schema, content, status_code)
+        if self.claimed_id is not None:
+            await self.session.execute(
+                update(IdempotencyKey)
+                .where(IdempotencyKey.id == self.claimed_id)
+                .values(status_code=status_code, response_body=response.body)
+            )
+            self.saved = StoredResponse(
+                self.fingerprint, status_code, response.body
+            )
+        return response
+
+
+async def get_idempotent_request(
+    request: Request,
+    session: Annotated[AsyncSession, Depends(get_session)],
+    user: Annotated[Principal, Depends(get_current_user)],
+    idempotency_key: Annotated[
+        str | None, Header(min_length=1, max_length=MAX_KEY_LENGTH)
+    ] = None,
+):
+    fingerprint = None
+    if idempotency_key is not None:
+        fingerprint = hashlib.sha256(
+            b'\n'.join([
+                request.method.encode(),
+                request.url.path.encode(),
+                request.url.query.encode(),
+                await request.body(),
+            ])
+        ).hexdigest()
+    idempotent = IdempotentRequest(
+        session, user.id, idempotency_key, fingerprint
+    )
+    try:
+        yield idempotent
+    except Exception:
+        # Release the claimed key so a retry runs the request again
+        if idempotent.claimed_id is not None:
+            await session.rollback()
+        raise
+    if idempotent.saved is not None:
+        # Only reached once the handler committed
+        stored_responses.set((user.id, idempotency_key), idempotent.saved)
+
+
+async def purge_expired_keys(session: AsyncSession) -> int:
+    result = await session.execute(
+        delete(IdempotencyKey).where(IdempotencyKey.expires_at <= _now())
+    )
+    await session.commit()
+    return result.rowcount
+
+
+async def purge_expired_keys_periodically(
+    interval: float = settings.IDEMPOTENCY_PURGE_INTERVAL_SECONDS,
+):
+    """Run :func:`purge_expired_keys` every ``interval`` seconds."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            async with async_session_maker() as session:
+                await purge_expired_keys(session)
+        except (exc.SQLAlchemyError, OSError):
+            logging.getLogger(__name__).warning(
+                'Purging expired idempotency keys failed', exc_info=True
+            )
@@ -0,0 +1,329 @@
+import math
+import time
+from collections.abc import Iterator
+from contextvars import ContextVar
+from dataclasses import dataclass
+from threading import Lock
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from backend.cache import caches
+from backend.database import pool_stats, replica_stats
+from backend.events import broker
+from backend.rate_limit import login_limiter
+from backend.security import password_hash_pool
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 25, 50, 100)
+
+UNMATCHED_ROUTE = '<unmatched>'
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _sample(name: str, labels: dict[str, str], value: float) -> str:
+    if labels:
+        rendered = ','.join(f'{k}="{_escape(v)}"' for k, v in labels.items())
+        return f'{name}{{{rendered}}} {_format_value(value)}'
+    return f'{name} {_format_value(value)}'
+
+
+class _Metric:
+    type = ''
+
+    def __init__(self, name: str, documentation: str, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: dict[tuple[str, ...], object] = {}
+        self._lock = Lock()
+
+    def _key(self, labels: dict[str, str]) -> tuple[str, ...]:
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _labels(self, key: tuple[str, ...]) -> dict[str, str]:
+        return dict(zip(self.labelnames, key))
+
+    def samples(self) -> Iterator[tuple[str, dict[str, str], float]]:
+        with self._lock:
+            items = list(self._values.items())
+        for key, value in items:
+            yield self.name, self._labels(key), value
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+    def render(self) -> Iterator[str]:
+        yield f'# HELP {self.name} {self.documentation}'
+        yield f'# TYPE {self.name} {self.type}'
+        for name, labels, value in self.samples():
+            yield _sample(name, labels, value)
+
+
+class Counter(_Metric):
+    type = 'counter'
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    type = 'gauge'
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+
+class Histogram(_Metric):
+    type = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=()):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            counts, total = self._values.get(
+                key, ([0] * len(self.buckets), 0.0)
+            )
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            self._values[key] = (counts, total + value)
+
+    def samples(self):
+        with self._lock:
+            items = [(k, (list(c), s)) for k, (c, s) in self._values.items()]
+        for key, (counts, total) in items:
+            labels = self._labels(key)
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                yield (
+                    f'{self.name}_bucket',
+                    {**labels, 'le': _format_value(float(bound))},
+                    cumulative,
+                )
+            yield f'{self.name}_sum', labels, total
+            yield f'{self.name}_count', labels, cumulative
+
+
+class Registry:
+    """Minimal Prometheus registry rendered in the text exposition format.
+
+    Values live in this process only; with several workers each one has
+    to be scraped separately.
+    """
+
+    def __init__(self):
+        self._metrics: dict[str, _Metric] = {}
+        self._collectors = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def on_collect(self, callback):
+        """Run ``callback`` before every render (to refresh gauges)."""
+        self._collectors.append(callback)
+        return callback
+
+    def get_sample_value(self, name: str, **labels) -> float | None:
+        for metric in self._metrics.values():
+            for sample_name, sample_labels, value in metric.samples():
+                if sample_name == name and sample_labels == labels:
+                    return value
+        return None
+
+    def render(self) -> str:
+        for callback in self._collectors:
+            callback()
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+REQUESTS = registry.register(
+    Counter(
+        'http_requests_total',
+        'HTTP requests by method, route template and status code.',
+        ('method', 'route', 'status'),
+    )
+)
+LATENCY = registry.register(
+    Histogram(
+        'http_request_duration_seconds',
+        'HTTP request latency, including the streamed body.',
+        ('method', 'route'),
+        LATENCY_BUCKETS,
+    )
+)
+DB_QUERIES = registry.register(
+    Histogram(
+        'http_request_db_queries',
+        'Database statements executed per HTTP request.',
+        ('method', 'route'),
+        QUERY_COUNT_BUCKETS,
+    )
+)
+DB_TIME = registry.register(
+    Histogram(
+        'http_request_db_duration_seconds',
+        'Time spent executing database statements per HTTP request.',
+        ('method', 'route'),
+        LATENCY_BUCKETS,
+    )
+)
+DB_POOL = registry.register(
+    Gauge(
+        'db_pool_stats',
+        'Connection pool state of this process (see pool_stats()).',
+        ('stat',),
+    )
+)
+DB_REPLICA = registry.register(
+    Gauge(
+        'db_replica_stats',
+        'Read replica lag, health and reads served or sent back to the '
+        'primary (see replica_stats()).',
+        ('stat',),
+    )
+)
+CACHE = registry.register(
+    Gauge(
+        'cache_stats',
+        'In-process cache hits, misses and size.',
+        ('cache', 'stat'),
+    )
+)
+PASSWORD_HASH_POOL = registry.register(
+    Gauge(
+        'password_hash_pool_stats',
+        'Password hashing worker pool state.',
+        ('stat',),
+    )
+)
+LOGIN_RATE_LIMIT = registry.register(
+    Gauge(
+        'login_rate_limit_stats',
+        'Login attempts allowed and rejected, per bucket that rejected them.',
+        ('stat',),
+    )
+)
+EVENT_SUBSCRIBERS = registry.register(
+    Gauge(
+        'gift_event_subscribers',
+        'Open gift status streams (SSE) in this process.',
+    )
+)
+
+
+@registry.on_collect
+def _collect_runtime_stats():
+    for stat, value in (pool_stats() or {}).items():
+        DB_POOL.set(value, stat=stat)
+    replica = replica_stats() or {}
+    for stat in ('healthy', 'lag_seconds', 'reads', 'fallbacks'):
+        if replica.get(stat) is not None:
+            DB_REPLICA.set(float(replica[stat]), stat=stat)
+    for name, cache in caches.items():
+        for stat, value in cache.stats().items():
+            CACHE.set(value, cache=name, stat=stat)
+    for stat, value in password_hash_pool.stats().items():
+        PASSWORD_HASH_POOL.set(value, stat=stat)
+    for stat, value in login_limiter.stats().items():
+        LOGIN_RATE_LIMIT.set(value, stat=stat)
+    EVENT_SUBSCRIBERS.set(broker.subscriber_count())
+
+
+@dataclass
+class QueryStats:
+    count: int = 0
+    seconds: float = 0.0
+
+
+# Statements of the current request; SQLAlchemy runs the DBAPI calls in a
+# greenlet that shares the request's context.
+_request_queries: ContextVar[QueryStats | None] = ContextVar(
+    'request_queries', default=None
+)
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_cursor_execute(conn, *_):
+    conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_cursor_execute(conn, *_):
+    start = conn.info['query_start'].pop()
+    stats = _request_queries.get()
+    if stats is not None:
+        stats.count += 1
+        stats.seconds += time.perf_counter() - start
+
+
+@event.listens_for(Engine, 'handle_error')
+def _handle_error(exception_context):
+    conn = exception_context.connection
+    if conn is not None and conn.info.get('query_start'):
+        conn.info['query_start'].pop()
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording request metrics per route template.
+
+    The template (``/guest/lists/{shareable_link}``) comes from the route
+    FastAPI matched, so ids in paths do not explode the label set.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+            await send(message)
+
+        queries = QueryStats()
+        token = _request_queries.set(queries)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            _request_queries.reset(token)
+            route = getattr(scope.get('route'), 'path', UNMATCHED_ROUTE)
+            labels = {'method': scope['method'], 'route': route}
+            REQUESTS.inc(**labels, status=str(status))
+            LATENCY.observe(elapsed, **labels)
+            DB_QUERIES.observe(queries.count, **labels)
+            DB_TIME.observe(queries.seconds, **labels)
@@ -5,9 +5,19 @@ from .base import (
     UserRole,
     table_registry,
 )
+from .idempotency import IdempotencyKey
+from .rate_limit import RateLimitBucket
 from .todo import Todo
 from .user import User
-from .wedding import GiftItem, Rsvp, WeddingList, Reservation, Category, TemplateGiftItem
+from .wedding import (
+    GiftItem,
+    Rsvp,
+    RsvpCompanion,
+    WeddingList,
+    Reservation,
+    Category,
+    TemplateGiftItem,
+)
 
 __all__ = [
     'TodoState',
@@ -20,7 +30,10 @@ __all__ = [
     'WeddingList',
     'GiftItem',
     'Rsvp',
+    'RsvpCompanion',
     'Reservation',
     'Category',
     'TemplateGiftItem',
+    'IdempotencyKey',
+    'RateLimitBucket',
 ]
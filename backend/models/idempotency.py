@@ -0,0 +1,29 @@
+from datetime import datetime
+
+from sqlalchemy import DateTime, ForeignKey, Index, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import table_registry
+
+
+@table_registry.mapped_as_dataclass
+class IdempotencyKey:
+    __tablename__ = 'idempotency_keys'
+    __table_args__ = (
+        UniqueConstraint(
+            'user_id', 'key', name='uq_idempotency_keys_user_id_key'
+        ),
+        Index('ix_idempotency_keys_expires_at', 'expires_at'),
+    )
+
+    id: Mapped[int] = mapped_column(init=False, primary_key=True)
+    user_id: Mapped[int] = mapped_column(
+        ForeignKey('users.id', ondelete='CASCADE')
+    )
+    key: Mapped[str]
+    # Hash of the request, to reject a key reused for another request
+    fingerprint: Mapped[str]
+    expires_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+    # Set in the transaction of the write, so a committed key always has one
+    status_code: Mapped[int | None] = mapped_column(default=None)
+    response_body: Mapped[bytes | None] = mapped_column(default=None)
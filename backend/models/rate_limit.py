@@ -0,0 +1,15 @@
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .base import table_registry
+
+
+@table_registry.mapped_as_dataclass
+class RateLimitBucket:
+    """Token bucket shared by every worker (``postgres`` rate limiting)."""
+
+    __tablename__ = 'rate_limit_buckets'
+
+    key: Mapped[str] = mapped_column(primary_key=True)
+    tokens: Mapped[float]
+    # Unix time of the last token taken
+    updated_at: Mapped[float]
@@ -1,12 +1,48 @@
-from sqlalchemy import ForeignKey
+from sqlalchemy import DDL, ForeignKey, Index, event, text
 from sqlalchemy.orm import Mapped, mapped_column
 
 from .base import TodoState, table_registry
 
 
+def _pg_trgm_available(ddl, target, bind, **kw) -> bool:
+    return bool(
+        bind.scalar(
+            text(
+                "SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'"
+            )
+        )
+    )
+
+
+def _pg_trgm_installed(ddl, target, bind, **kw) -> bool:
+    return bool(
+        bind.scalar(
+            text("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+        )
+    )
+
+
 @table_registry.mapped_as_dataclass
 class Todo:
     __tablename__ = 'todos'
+    __table_args__ = (
+        Index('ix_todos_user_id_state', 'user_id', 'state'),
+        # Trigram indexes back the substring (LIKE '%x%') filters on
+        # Postgres; other databases (or servers without pg_trgm) skip them
+        # and fall back to a scan of the user's todos.
+        Index(
+            'ix_todos_title_trgm',
+            'title',
+            postgresql_using='gin',
+            postgresql_ops={'title': 'gin_trgm_ops'},
+        ).ddl_if(dialect='postgresql', callable_=_pg_trgm_installed),
+        Index(
+            'ix_todos_description_trgm',
+            'description',
+            postgresql_using='gin',
+            postgresql_ops={'description': 'gin_trgm_ops'},
+        ).ddl_if(dialect='postgresql', callable_=_pg_trgm_installed),
+    )
 
     id: Mapped[int] = mapped_column(init=False, primary_key=True)
     title: Mapped[str]
@@ -14,3 +50,12 @@ class Todo:
     state: Mapped[TodoState]
 
     user_id: Mapped[int] = mapped_column(ForeignKey('users.id'))
+
+
+event.listen(
+    Todo.__table__,
+    'before_create',
+    DDL('CREATE EXTENSION IF NOT EXISTS pg_trgm').execute_if(
+        dialect='postgresql', callable_=_pg_trgm_available
+    ),
+)
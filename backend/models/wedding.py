@@ -1,7 +1,7 @@
 from datetime import date, datetime
 from typing import TYPE_CHECKING
 
-from sqlalchemy import ForeignKey, func
+from sqlalchemy import ForeignKey, Index, UniqueConstraint, func
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from .base import GiftStatus, RsvpStatus, table_registry
@@ -13,6 +13,7 @@ if TYPE_CHECKING:  # pragma: no cover
 @table_registry.mapped_as_dataclass
 class WeddingList:
     __tablename__ = 'wedding_lists'
+    __table_args__ = (Index('ix_wedding_lists_owner_id', 'owner_id'),)
 
     id: Mapped[int] = mapped_column(init=False, primary_key=True)
     title: Mapped[str]
@@ -51,6 +52,11 @@ class WeddingList:
 @table_registry.mapped_as_dataclass
 class GiftItem:
     __tablename__ = 'gift_items'
+    __table_args__ = (
+        Index(
+            'ix_gift_items_wedding_list_id_status', 'wedding_list_id', 'status'
+        ),
+    )
 
     id: Mapped[int] = mapped_column(init=False, primary_key=True)
     name: Mapped[str]
@@ -72,6 +78,15 @@ class GiftItem:
 @table_registry.mapped_as_dataclass
 class Rsvp:
     __tablename__ = 'rsvps'
+    __table_args__ = (
+        # One RSVP per guest and list; its index also serves the lookups
+        UniqueConstraint(
+            'wedding_list_id',
+            'guest_id',
+            name='uq_rsvps_wedding_list_id_guest_id',
+        ),
+        Index('ix_rsvps_guest_id', 'guest_id'),
+    )
 
     id: Mapped[int] = mapped_column(init=False, primary_key=True)
     wedding_list_id: Mapped[int] = mapped_column(
@@ -79,17 +94,45 @@ class Rsvp:
     )
     guest_id: Mapped[int] = mapped_column(ForeignKey('users.id'))
     status: Mapped[RsvpStatus] = mapped_column(default=RsvpStatus.pending)
-    additional_guests: Mapped[str | None] = mapped_column(default=None)
 
     wedding_list: Mapped['WeddingList'] = relationship(
         init=False, back_populates='rsvps'
     )
     guest: Mapped['User'] = relationship(init=False, back_populates='rsvps')
+    companions: Mapped[list['RsvpCompanion']] = relationship(
+        init=False,
+        cascade='all, delete-orphan',
+        lazy='selectin',
+        order_by='RsvpCompanion.id',
+        back_populates='rsvp',
+    )
+
+
+@table_registry.mapped_as_dataclass
+class RsvpCompanion:
+    __tablename__ = 'rsvp_companions'
+    __table_args__ = (Index('ix_rsvp_companions_rsvp_id', 'rsvp_id'),)
+
+    id: Mapped[int] = mapped_column(init=False, primary_key=True)
+    rsvp_id: Mapped[int] = mapped_column(
+        ForeignKey('rsvps.id', ondelete='CASCADE')
+    )
+    name: Mapped[str]
+
+    rsvp: Mapped['Rsvp'] = relationship(
+        init=False, back_populates='companions'
+    )
 
 
 @table_registry.mapped_as_dataclass
 class Reservation:
     __tablename__ = 'reservations'
+    __table_args__ = (
+        Index(
+            'ix_reservations_gift_item_id_guest_id', 'gift_item_id', 'guest_id'
+        ),
+        Index('ix_reservations_guest_id', 'guest_id'),
+    )
 
     id: Mapped[int] = mapped_column(init=False, primary_key=True)
     gift_item_id: Mapped[int] = mapped_column(ForeignKey('gift_items.id'))
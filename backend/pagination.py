@@ -0,0 +1,56 @@
+import base64
+import binascii
+import json
+from http import HTTPStatus
+
+from fastapi import HTTPException
+from sqlalchemy import Select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import InstrumentedAttribute
+
+from backend.schemas import FilterPage
+
+
+def encode_cursor(last_id: int) -> str:
+    raw = json.dumps({'id': last_id}, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str) -> int:
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        last_id = json.loads(base64.urlsafe_b64decode(padded))['id']
+    except (binascii.Error, ValueError, TypeError, KeyError):
+        last_id = None
+
+    if not isinstance(last_id, int):
+        raise HTTPException(
+            status_code=HTTPStatus.BAD_REQUEST, detail='Invalid cursor'
+        )
+    return last_id
+
+
+async def paginate(
+    session: AsyncSession,
+    query: Select,
+    page: FilterPage,
+    id_column: InstrumentedAttribute[int],
+) -> tuple[list, str | None]:
+    """Run ``query`` for one page ordered by ``id_column``.
+
+    With ``page.cursor`` the page starts right after the encoded id
+    (keyset pagination); otherwise ``page.offset`` is used. One extra row
+    is fetched to know whether a ``next_cursor`` should be returned.
+    """
+    query = query.order_by(id_column)
+    if page.cursor:
+        query = query.where(id_column > decode_cursor(page.cursor))
+    else:
+        query = query.offset(page.offset)
+
+    rows = (await session.scalars(query.limit(page.limit + 1))).all()
+    if len(rows) <= page.limit:
+        return list(rows), None
+
+    rows = rows[: page.limit]
+    return list(rows), encode_cursor(getattr(rows[-1], id_column.key))
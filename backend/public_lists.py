@@ -0,0 +1,82 @@
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import lazyload
+
+from backend.cache import TTLCache
+from backend.models import GiftItem, Reservation, WeddingList
+from backend.schemas import WeddingListPublicGuest
+from backend.settings import Settings
+
+settings = Settings()
+
+# Guest view of a list shared by every guest, keyed by shareable link.
+# Mutations in this process call invalidate_public_list(); other workers
+# see changes once the TTL expires.
+public_list_cache = TTLCache(
+    'public_lists',
+    maxsize=settings.PUBLIC_LIST_CACHE_MAX_SIZE,
+    ttl=settings.PUBLIC_LIST_CACHE_TTL_SECONDS,
+)
+# Lists invalidated for as long as a healthy replica may not have replayed
+# the write: a replica read of one of them must not put the old payload
+# back in the cache.
+recent_invalidations = TTLCache(
+    'public_list_invalidations',
+    maxsize=settings.PUBLIC_LIST_CACHE_MAX_SIZE,
+    ttl=settings.REPLICA_MAX_LAG_SECONDS + settings.REPLICA_LAG_CHECK_SECONDS,
+)
+
+
+def invalidate_public_list(list_id: int):
+    public_list_cache.pop_where(lambda _, payload: payload.id == list_id)
+    recent_invalidations.set(list_id, True)
+
+
+async def get_public_list(
+    session: AsyncSession, shareable_link: str
+) -> WeddingListPublicGuest | None:
+    payload = public_list_cache.get(shareable_link)
+    if payload is not None:
+        return payload
+
+    wl = await session.scalar(
+        select(WeddingList)
+        .options(lazyload(WeddingList.rsvps))
+        .where(WeddingList.shareable_link == shareable_link)
+    )
+    if not wl:
+        return None
+
+    payload = WeddingListPublicGuest.model_validate(wl)
+    if not (session.info.get('replica') and recent_invalidations.get(wl.id)):
+        public_list_cache.set(shareable_link, payload)
+    return payload
+
+
+async def with_guest_reservations(
+    session: AsyncSession, payload: WeddingListPublicGuest, guest_id: int
+) -> WeddingListPublicGuest:
+    """Overlay ``my_reservation_id`` for one guest on the shared payload.
+
+    The cached payload is never mutated; only the reserved items (and the
+    list itself) are shallow-copied.
+    """
+    rows = await session.execute(
+        select(Reservation.gift_item_id, Reservation.id)
+        .join(GiftItem, GiftItem.id == Reservation.gift_item_id)
+        .where(
+            Reservation.guest_id == guest_id,
+            GiftItem.wedding_list_id == payload.id,
+        )
+    )
+    by_gift = dict(rows.all())
+    if not by_gift:
+        return payload
+
+    items = [
+        item.model_copy(update={'my_reservation_id': by_gift[item.id]})
+        if item.id in by_gift
+        else item
+        for item in payload.items
+    ]
+    return payload.model_copy(update={'items': items})
@@ -0,0 +1,245 @@
+import asyncio
+import logging
+import math
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from http import HTTPStatus
+from typing import Annotated, Protocol
+
+from fastapi import Depends, HTTPException, Request
+from fastapi.security import OAuth2PasswordRequestForm
+from sqlalchemy import delete, exc, func
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.cache import TTLCache
+from backend.database import async_session_maker, get_session
+from backend.models import RateLimitBucket
+from backend.settings import Settings
+
+settings = Settings()
+
+SECONDS_PER_MINUTE = 60
+# How often buckets that are full again get dropped
+PURGE_INTERVAL_SECONDS = 600
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Rate:
+    burst: int
+    per_second: float
+
+    @property
+    def refill_seconds(self) -> float:
+        """Time an empty bucket takes to be full again."""
+        return self.burst / self.per_second
+
+    @property
+    def retry_after(self) -> int:
+        """Whole seconds after which an empty bucket has a token."""
+        return math.ceil(1 / self.per_second)
+
+
+class Buckets(Protocol):
+    rate: Rate
+
+    async def take(self, session: AsyncSession, key: str) -> bool: ...
+
+    async def purge(self, session: AsyncSession) -> int: ...
+
+
+class MemoryBuckets:
+    """Token buckets of this process.
+
+    Held in a TTL cache: a bucket untouched for ``refill_seconds`` is full,
+    the same as having no entry, so the cache stays bounded.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        rate: Rate,
+        maxsize: int,
+        timer: Callable[[], float] = time.monotonic,
+    ):
+        self.rate = rate
+        self._timer = timer
+        self._buckets = TTLCache(
+            name, maxsize=maxsize, ttl=rate.refill_seconds, timer=timer
+        )
+
+    async def take(self, session: AsyncSession, key: str) -> bool:
+        now = self._timer()
+        tokens, updated_at = self._buckets.get(key, (self.rate.burst, now))
+        tokens = min(
+            self.rate.burst,
+            tokens + (now - updated_at) * self.rate.per_second,
+        )
+        if tokens < 1:
+            return False
+        self._buckets.set(key, (tokens - 1, now))
+        return True
+
+    async def purge(self, session: AsyncSession) -> int:
+        now = self._timer()
+        return self._buckets.pop_where(
+            lambda _, bucket: now - bucket[1] >= self.rate.refill_seconds
+        )
+
+
+class PostgresBuckets:
+    """Token buckets in ``rate_limit_buckets``, shared by every worker.
+
+    A single upsert takes the token; it only updates a bucket holding one,
+    so a row comes back only when the attempt is allowed.
+    """
+
+    def __init__(
+        self,
+        scope: str,
+        rate: Rate,
+        timer: Callable[[], float] = time.time,
+    ):
+        self.scope = scope
+        self.rate = rate
+        self._timer = timer
+
+    async def take(self, session: AsyncSession, key: str) -> bool:
+        now = self._timer()
+        refilled = func.least(
+            self.rate.burst,
+            RateLimitBucket.tokens
+            + (now - RateLimitBucket.updated_at) * self.rate.per_second,
+        )
+        stmt = postgresql.insert(RateLimitBucket).values(
+            key=f'{self.scope}:{key}',
+            tokens=self.rate.burst - 1,
+            updated_at=now,
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[RateLimitBucket.key],
+            set_={'tokens': refilled - 1, 'updated_at': now},
+            where=refilled >= 1,
+        )
+        taken = await session.scalar(stmt.returning(RateLimitBucket.key))
+        await session.commit()
+        return taken is not None
+
+    async def purge(self, session: AsyncSession) -> int:
+        result = await session.execute(
+            delete(RateLimitBucket).where(
+                RateLimitBucket.key.startswith(f'{self.scope}:'),
+                RateLimitBucket.updated_at
+                <= self._timer() - self.rate.refill_seconds,
+            )
+        )
+        await session.commit()
+        return result.rowcount
+
+
+class LoginRateLimiter:
+    """Token buckets in front of the login, one set per key kind.
+
+    Each attempt takes a token from every bucket of its keys, in order;
+    the first empty one rejects it with 429, before the user is looked up
+    or the password hashed.
+    """
+
+    def __init__(
+        self,
+        buckets: dict[str, Buckets],
+        purge_interval: float = PURGE_INTERVAL_SECONDS,
+    ):
+        self.buckets = buckets
+        self.purge_interval = purge_interval
+        self.allowed = 0
+        self.rejected = dict.fromkeys(buckets, 0)
+        self._purger: asyncio.Task | None = None
+
+    async def check(self, session: AsyncSession, keys: dict[str, str]):
+        for kind, key in keys.items():
+            buckets = self.buckets[kind]
+            if not await buckets.take(session, key):
+                self.rejected[kind] += 1
+                raise HTTPException(
+                    status_code=HTTPStatus.TOO_MANY_REQUESTS,
+                    detail='Too many login attempts',
+                    headers={'Retry-After': str(buckets.rate.retry_after)},
+                )
+        self.allowed += 1
+
+    def stats(self) -> dict[str, int]:
+        return {
+            'allowed': self.allowed,
+            **{f'rejected_{k}': n for k, n in self.rejected.items()},
+        }
+
+    async def start(self):
+        self._purger = asyncio.create_task(self._purge_periodically())
+
+    async def stop(self):
+        if self._purger:
+            self._purger.cancel()
+            try:
+                await self._purger
+            except asyncio.CancelledError:
+                pass
+            self._purger = None
+
+    async def _purge_periodically(self):
+        while True:
+            await asyncio.sleep(self.purge_interval)
+            try:
+                # Connects only if used, i.e. for the shared buckets
+                async with async_session_maker() as session:
+                    for buckets in self.buckets.values():
+                        await buckets.purge(session)
+            except (exc.SQLAlchemyError, OSError):
+                logger.warning('Purging login rate limits failed')
+
+
+def create_login_limiter(settings: Settings) -> LoginRateLimiter:
+    rates = {
+        'ip': Rate(
+            settings.LOGIN_IP_BURST,
+            settings.LOGIN_IP_PER_MINUTE / SECONDS_PER_MINUTE,
+        ),
+        'username': Rate(
+            settings.LOGIN_USERNAME_BURST,
+            settings.LOGIN_USERNAME_PER_MINUTE / SECONDS_PER_MINUTE,
+        ),
+    }
+    if settings.LOGIN_RATE_LIMIT_BACKEND == 'postgres':
+        return LoginRateLimiter({
+            kind: PostgresBuckets(kind, rate) for kind, rate in rates.items()
+        })
+    return LoginRateLimiter({
+        kind: MemoryBuckets(
+            f'login_attempts_{kind}',
+            rate,
+            settings.LOGIN_RATE_LIMIT_MAX_KEYS,
+        )
+        for kind, rate in rates.items()
+    })
+
+
+login_limiter = create_login_limiter(settings)
+
+
+async def limit_login_attempts(
+    request: Request,
+    form_data: Annotated[OAuth2PasswordRequestForm, Depends()],
+    session: Annotated[AsyncSession, Depends(get_session)],
+):
+    # Behind a proxy, uvicorn reports the client's address only for the
+    # proxies listed in FORWARDED_ALLOW_IPS
+    await login_limiter.check(
+        session,
+        {
+            'ip': request.client.host if request.client else '',
+            'username': form_data.username.strip().lower(),
+        },
+    )
@@ -0,0 +1,44 @@
+from functools import cache
+from http import HTTPStatus
+from typing import Any
+
+from fastapi import Response
+from pydantic import TypeAdapter
+
+
+@cache
+def type_adapter(schema: Any) -> TypeAdapter:
+    return TypeAdapter(schema)
+
+
+def dump_json(schema: Any, content: Any) -> bytes:
+    """Serialize ``content`` as ``schema`` straight to JSON bytes.
+
+    ORM objects and dicts are validated (from attributes) first; instances
+    of ``schema`` are dumped as they are.
+    """
+    adapter = type_adapter(schema)
+    if not (isinstance(schema, type) and isinstance(content, schema)):
+        content = adapter.validate_python(content, from_attributes=True)
+    return adapter.dump_json(content, by_alias=True)
+
+
+class ModelResponse(Response):
+    """JSON response rendered by pydantic-core from a response schema.
+
+    Returning a ``Response`` skips FastAPI's ``response_model`` handling
+    (validate, dump to Python objects, ``json.dumps``), which dominates the
+    time of large payloads such as lists with hundreds of items. Keep
+    ``response_model`` on the route for the OpenAPI schema.
+    """
+
+    media_type = 'application/json'
+
+    def __init__(
+        self,
+        schema: Any,
+        content: Any,
+        status_code: int = HTTPStatus.OK,
+        headers: dict[str, str] | None = None,
+    ):
+        super().__init__(dump_json(schema, content), status_code, headers)
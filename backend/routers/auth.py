@@ -8,21 +8,27 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from backend.database import get_session
 from backend.models import User
+from backend.rate_limit import limit_login_attempts
 from backend.schemas import Token
 from backend.security import (
+    Principal,
     create_access_token,
     get_current_user,
-    verify_password,
+    verify_password_async,
 )
 
 router = APIRouter(prefix='/auth', tags=['auth'])
 
 OAuth2Form = Annotated[OAuth2PasswordRequestForm, Depends()]
 Session = Annotated[AsyncSession, Depends(get_session)]
-CurrentUser = Annotated[User, Depends(get_current_user)]
+CurrentUser = Annotated[Principal, Depends(get_current_user)]
 
 
-@router.post('/token', response_model=Token)
+@router.post(
+    '/token',
+    response_model=Token,
+    dependencies=[Depends(limit_login_attempts)],
+)
 async def login_for_access_token(form_data: OAuth2Form, session: Session):
     # Permite login tanto por email quanto por username (ex.: CPF informado como username)
     user = await session.scalar(
@@ -37,7 +43,7 @@ async def login_for_access_token(form_data: OAuth2Form, session: Session):
             detail='Incorrect email or password',
         )
 
-    if not verify_password(form_data.password, user.password):
+    if not await verify_password_async(form_data.password, user.password):
         raise HTTPException(
             status_code=HTTPStatus.UNAUTHORIZED,
             detail='Incorrect email or password',
@@ -2,20 +2,34 @@ from http import HTTPStatus
 from typing import Annotated
 
 from fastapi import APIRouter, Depends, HTTPException, Body, Query
-from sqlalchemy import select
+from fastapi.responses import StreamingResponse
+from sqlalchemy import delete, insert, literal, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import lazyload
+from sqlalchemy.orm.attributes import set_committed_value
 
-from backend.database import get_session
+from backend.database import dialect_insert, get_read_session, get_session
+from backend.events import broker, gift_event_stream
+from backend.idempotency import (
+    IdempotentRequest,
+    get_idempotent_request,
+)
 from backend.models import (
     GiftItem,
     GiftStatus,
     Reservation,
     Rsvp,
+    RsvpCompanion,
     RsvpStatus,
-    User,
     UserRole,
     WeddingList,
 )
+from backend.public_lists import (
+    get_public_list,
+    invalidate_public_list,
+    with_guest_reservations,
+)
+from backend.responses import ModelResponse
 from backend.schemas import (
     GuestDetails,
     Message,
@@ -24,51 +38,86 @@ from backend.schemas import (
     WeddingListPublicGuest,
     WeddingListSummary,
 )
-from backend.security import get_current_user
+from backend.security import Principal, get_current_user
 
 router = APIRouter(prefix='/guest', tags=['guest'])
 
 Session = Annotated[AsyncSession, Depends(get_session)]
-CurrentUser = Annotated[User, Depends(get_current_user)]
+ReadSession = Annotated[AsyncSession, Depends(get_read_session)]
+CurrentUser = Annotated[Principal, Depends(get_current_user)]
+# Retries carrying the same Idempotency-Key get the first response back
+Idempotent = Annotated[IdempotentRequest, Depends(get_idempotent_request)]
 
 
 @router.get('/lists/{shareable_link}', response_model=WeddingListPublicGuest)
-async def public_list(shareable_link: str, session: Session, user: CurrentUser):
+async def public_list(shareable_link: str, session: ReadSession, user: CurrentUser):
     if user.role != UserRole.CONVIDADO:
         raise HTTPException(status_code=HTTPStatus.FORBIDDEN, detail='Only CONVIDADO can view lists')
-    wl = await session.scalar(
-        select(WeddingList).where(WeddingList.shareable_link == shareable_link)
+    # Shared (cached) list payload + this guest's reservations on top
+    payload = await get_public_list(session, shareable_link)
+    if not payload:
+        raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail='List not found')
+    return ModelResponse(
+        WeddingListPublicGuest,
+        await with_guest_reservations(session, payload, user.id),
     )
-    if not wl:
+
+
+@router.get('/lists/{shareable_link}/events')
+async def list_events(shareable_link: str, session: Session, user: CurrentUser):
+    if user.role != UserRole.CONVIDADO:
+        raise HTTPException(status_code=HTTPStatus.FORBIDDEN, detail='Only CONVIDADO can view lists')
+    payload = await get_public_list(session, shareable_link)
+    if not payload:
         raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail='List not found')
-    # Map reservations by gift for this user
-    res_rows = await session.scalars(
-        select(Reservation).where(Reservation.gift_item_id.in_([g.id for g in wl.items]), Reservation.guest_id == user.id)
+    # Pushes item deltas instead of having guests poll the list endpoint
+    return StreamingResponse(
+        gift_event_stream(payload.id),
+        media_type='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
     )
-    by_gift = {r.gift_item_id: r for r in res_rows.all()}
-    # Mutate item dataclasses copy for serialization
-    for gi in wl.items:
-        setattr(gi, 'my_reservation_id', by_gift.get(gi.id).id if gi.id in by_gift else None)
-    return wl
 
 
 @router.post('/items/{item_id}/reserve', response_model=ReservationPublic, status_code=HTTPStatus.CREATED)
-async def reserve_item(item_id: int, session: Session, user: CurrentUser):
+async def reserve_item(
+    item_id: int, session: Session, user: CurrentUser, idempotent: Idempotent
+):
     if user.role != UserRole.CONVIDADO:
         raise HTTPException(status_code=HTTPStatus.FORBIDDEN, detail='Only CONVIDADO can reserve items')
-    item = await session.scalar(select(GiftItem).where(GiftItem.id == item_id))
-    if not item:
-        raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail='Item not found')
-    if item.status != GiftStatus.available:
+    if (replayed := await idempotent.replay()) is not None:
+        return replayed
+    # Conditional update: concurrent guests race on the row lock and only
+    # the first one still sees the item as available.
+    reserved = (
+        await session.execute(
+            update(GiftItem)
+            .where(GiftItem.id == item_id, GiftItem.status == GiftStatus.available)
+            .values(status=GiftStatus.reserved, reserved_by_id=user.id)
+            .returning(GiftItem.id, GiftItem.wedding_list_id)
+        )
+    ).first()
+    if reserved is None:
+        exists = await session.scalar(select(GiftItem.id).where(GiftItem.id == item_id))
+        if not exists:
+            raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail='Item not found')
         raise HTTPException(status_code=HTTPStatus.CONFLICT, detail='Item not available')
-    item.status = GiftStatus.reserved
-    item.reserved_by_id = user.id
-    reservation = Reservation(gift_item_id=item.id, guest_id=user.id)
+    reservation = Reservation(gift_item_id=reserved.id, guest_id=user.id)
     session.add(reservation)
-    session.add(item)
+    response = await idempotent.save(
+        ReservationPublic, reservation, HTTPStatus.CREATED
+    )
     await session.commit()
-    await session.refresh(reservation)
-    return reservation
+    invalidate_public_list(reserved.wedding_list_id)
+    await broker.publish(
+        reserved.wedding_list_id,
+        'item',
+        {
+            'id': reserved.id,
+            'status': GiftStatus.reserved.value,
+            'reserved_by_id': user.id,
+        },
+    )
+    return response
 
 
 @router.delete('/reservations/{reservation_id}', response_model=Message)
@@ -78,49 +127,99 @@ async def cancel_reservation(reservation_id: int, session: Session, user: Curren
         raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail='Reservation not found')
     if reservation.guest_id != user.id:
         raise HTTPException(status_code=HTTPStatus.FORBIDDEN, detail='Not your reservation')
-    item = await session.scalar(select(GiftItem).where(GiftItem.id == reservation.gift_item_id))
-    if item:
-        item.status = GiftStatus.available
-        item.reserved_by_id = None
-        session.add(item)
+    list_id = await session.scalar(
+        update(GiftItem)
+        .where(GiftItem.id == reservation.gift_item_id, GiftItem.reserved_by_id == user.id)
+        .values(status=GiftStatus.available, reserved_by_id=None)
+        .returning(GiftItem.wedding_list_id)
+    )
     await session.delete(reservation)
     await session.commit()
+    if list_id is not None:
+        invalidate_public_list(list_id)
+        await broker.publish(
+            list_id,
+            'item',
+            {
+                'id': reservation.gift_item_id,
+                'status': GiftStatus.available.value,
+                'reserved_by_id': None,
+            },
+        )
     return {'message': 'Reservation cancelled'}
 
 
+def _companion_names(payload: dict | None) -> list[str]:
+    names = (payload or {}).get('companions')
+    if names is None:
+        # Older clients send companions as a comma-separated string
+        names = ((payload or {}).get('additional_guests') or '').split(',')
+    if not isinstance(names, list) or not all(isinstance(n, str) for n in names):
+        raise HTTPException(status_code=HTTPStatus.BAD_REQUEST, detail='Invalid companions')
+    return [n.strip() for n in names if n.strip()]
+
+
+async def rsvp_submission(
+    status: str | None = Query(None), payload: dict | None = Body(None)
+) -> tuple[RsvpStatus, list[str]]:
+    status_value = (payload or {}).get('status') if payload else status
+    if status_value not in [s.value for s in RsvpStatus]:
+        raise HTTPException(status_code=HTTPStatus.BAD_REQUEST, detail='Invalid status')
+    return RsvpStatus(status_value), _companion_names(payload)
+
+
+RsvpSubmission = Annotated[
+    tuple[RsvpStatus, list[str]], Depends(rsvp_submission)
+]
+
+
 @router.post('/lists/{list_id}/rsvp', response_model=RsvpPublic, status_code=HTTPStatus.CREATED)
 async def send_rsvp(
     list_id: int,
     session: Session,
     user: CurrentUser,
-    status: str | None = Query(None),
-    payload: dict | None = Body(None),
+    idempotent: Idempotent,
+    submission: RsvpSubmission,
 ):
     if user.role != UserRole.CONVIDADO:
         raise HTTPException(status_code=HTTPStatus.FORBIDDEN, detail='Only CONVIDADO can RSVP')
-    wl = await session.scalar(select(WeddingList).where(WeddingList.id == list_id))
-    if not wl:
-        raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail='List not found')
-    status_value = (payload or {}).get('status') if payload else status
-    additional_guests = (payload or {}).get('additional_guests') if payload else None
-    if status_value not in [s.value for s in RsvpStatus]:
-        raise HTTPException(status_code=HTTPStatus.BAD_REQUEST, detail='Invalid status')
-    status = RsvpStatus(status_value)
-    existing = await session.scalar(
-        select(Rsvp).where(Rsvp.wedding_list_id == list_id, Rsvp.guest_id == user.id)
+    if (replayed := await idempotent.replay()) is not None:
+        return replayed
+    rsvp_status, companion_names = submission
+    # Single INSERT ... SELECT ... ON CONFLICT DO UPDATE: the SELECT yields
+    # no row for an unknown list, and the unique (list, guest) constraint
+    # turns repeated submissions into updates of the same RSVP.
+    rsvp_insert = dialect_insert(session)
+    stmt = rsvp_insert(Rsvp).from_select(
+        ['wedding_list_id', 'guest_id', 'status'],
+        select(
+            WeddingList.id,
+            literal(user.id),
+            literal(rsvp_status, Rsvp.__table__.c.status.type),
+        ).where(WeddingList.id == list_id),
     )
-    if existing:
-        existing.status = status
-        existing.additional_guests = additional_guests
-        session.add(existing)
-        await session.commit()
-        await session.refresh(existing)
-        return existing
-    rsvp = Rsvp(wedding_list_id=list_id, guest_id=user.id, status=status, additional_guests=additional_guests)
-    session.add(rsvp)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[Rsvp.wedding_list_id, Rsvp.guest_id],
+        set_={'status': stmt.excluded.status},
+    )
+    rsvp = await session.scalar(
+        stmt.returning(Rsvp).options(lazyload(Rsvp.companions)),
+        execution_options={'populate_existing': True},
+    )
+    if rsvp is None:
+        raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail='List not found')
+    # Each submission replaces the companion list
+    await session.execute(delete(RsvpCompanion).where(RsvpCompanion.rsvp_id == rsvp.id))
+    companions = []
+    if companion_names:
+        companions = await session.scalars(
+            insert(RsvpCompanion).returning(RsvpCompanion, sort_by_parameter_order=True),
+            [{'rsvp_id': rsvp.id, 'name': name} for name in companion_names],
+        )
+    set_committed_value(rsvp, 'companions', list(companions))
+    response = await idempotent.save(RsvpPublic, rsvp, HTTPStatus.CREATED)
     await session.commit()
-    await session.refresh(rsvp)
-    return rsvp
+    return response
 
 
 @router.get('/me/details', response_model=GuestDetails)
@@ -141,4 +240,4 @@ async def my_details(session: Session, user: CurrentUser):
         if not wl:
             continue
         events.append({'rsvp': r, 'wedding_list': wl})
-    return {'user_id': user.id, 'events': events}
+    return ModelResponse(GuestDetails, {'user_id': user.id, 'events': events})
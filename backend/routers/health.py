@@ -0,0 +1,20 @@
+from fastapi import APIRouter, Depends
+
+from backend.database import pool_stats, replica_stats
+from backend.security import require_metrics_token
+
+router = APIRouter(prefix='/health', tags=['health'])
+
+
+@router.get('/')
+async def health():
+    return {'status': 'ok'}
+
+
+@router.get('/details', dependencies=[Depends(require_metrics_token)])
+async def health_details():
+    return {
+        'status': 'ok',
+        'db_pool': pool_stats(),
+        'db_replica': replica_stats(),
+    }
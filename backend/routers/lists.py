@@ -1,23 +1,32 @@
 from http import HTTPStatus
+from operator import attrgetter
 from typing import Annotated
 import secrets
 
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import select
-from sqlalchemy.orm import selectinload
+from fastapi.responses import StreamingResponse
+from sqlalchemy import delete, insert, literal, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from backend.database import get_session
+from backend.database import get_read_session, get_session
+from backend.events import broker
 from backend.models import (
     GiftItem,
-    User,
+    GiftStatus,
+    Reservation,
+    TemplateGiftItem,
     UserRole,
     WeddingList,
-    Rsvp,
 )
+from backend.public_lists import invalidate_public_list
+from backend.responses import ModelResponse
 from backend.schemas import (
+    GiftItemBatch,
+    GiftItemBatchResult,
     GiftItemCreate,
+    GiftItemList,
     GiftItemPublic,
+    GiftItemsFromTemplates,
     GiftItemUpdate,
     Message,
     TrackingResponse,
@@ -26,15 +35,26 @@ from backend.schemas import (
     WeddingListPublic,
     WeddingListUpdate,
 )
-from backend.security import get_current_user
+from backend.security import Principal, get_current_user
+from backend.tracking import (
+    ExportFormat,
+    get_tracking,
+    stream_tracking_export,
+)
 
 router = APIRouter(prefix='/lists', tags=['lists'])
 
 Session = Annotated[AsyncSession, Depends(get_session)]
-CurrentUser = Annotated[User, Depends(get_current_user)]
+ReadSession = Annotated[AsyncSession, Depends(get_read_session)]
+CurrentUser = Annotated[Principal, Depends(get_current_user)]
+
+# Columns a batch update cannot set to null
+NOT_NULL_ITEM_FIELDS = frozenset(
+    column.name for column in GiftItem.__table__.columns if not column.nullable
+)
 
 
-def _ensure_casal(user: User):
+def _ensure_casal(user: Principal):
     if user.role != UserRole.CASAL:
         raise HTTPException(
             status_code=HTTPStatus.FORBIDDEN,
@@ -42,7 +62,7 @@ def _ensure_casal(user: User):
         )
 
 
-def _ensure_owner(user: User, wedding_list: WeddingList):
+def _ensure_owner(user: Principal, wedding_list: WeddingList):
     if wedding_list.owner_id != user.id:
         raise HTTPException(
             status_code=HTTPStatus.FORBIDDEN,
@@ -74,12 +94,12 @@ async def create_wedding_list(
 
 
 @router.get('/my-lists', response_model=WeddingListList)
-async def get_my_lists(session: Session, user: CurrentUser):
+async def get_my_lists(session: ReadSession, user: CurrentUser):
     _ensure_casal(user)
     lists = await session.scalars(
         select(WeddingList).where(WeddingList.owner_id == user.id)
     )
-    return {'lists': lists.all()}
+    return ModelResponse(WeddingListList, {'lists': lists.all()})
 
 
 @router.put('/{list_id}', response_model=WeddingListPublic)
@@ -103,7 +123,8 @@ async def update_list(
     session.add(wl)
     await session.commit()
     await session.refresh(wl)
-    return wl
+    invalidate_public_list(wl.id)
+    return ModelResponse(WeddingListPublic, wl)
 
 
 @router.post('/{list_id}/generate-link', response_model=WeddingListPublic)
@@ -126,7 +147,8 @@ async def generate_shareable_link(list_id: int, session: Session, user: CurrentU
     session.add(wl)
     await session.commit()
     await session.refresh(wl)
-    return wl
+    invalidate_public_list(wl.id)
+    return ModelResponse(WeddingListPublic, wl)
 
 
 @router.delete('/{list_id}', response_model=Message)
@@ -143,6 +165,7 @@ async def delete_list(list_id: int, session: Session, user: CurrentUser):
         )
     await session.delete(wl)
     await session.commit()
+    invalidate_public_list(list_id)
     return {'message': 'List deleted'}
 
 
@@ -172,9 +195,195 @@ async def create_gift_item(
     session.add(item)
     await session.commit()
     await session.refresh(item)
+    invalidate_public_list(wl.id)
     return item
 
 
+@router.post('/{list_id}/items/batch', response_model=GiftItemBatchResult)
+async def batch_gift_items(
+    list_id: int, data: GiftItemBatch, session: Session, user: CurrentUser
+):
+    """Apply many gift item creates/updates/deletes in one transaction.
+
+    Valid operations are applied with multi-row statements; operations that
+    cannot be applied are skipped and reported in ``errors`` by position.
+    """
+    owned = await session.scalar(
+        select(WeddingList.id).where(
+            WeddingList.id == list_id, WeddingList.owner_id == user.id
+        )
+    )
+    if not owned:
+        raise HTTPException(
+            status_code=HTTPStatus.NOT_FOUND, detail='List not found'
+        )
+
+    errors = []
+    target_ids = [change.id for change in data.update] + data.delete
+    existing = set()
+    reserved = set()
+    if target_ids:
+        existing = set(
+            await session.scalars(
+                select(GiftItem.id).where(
+                    GiftItem.wedding_list_id == list_id,
+                    GiftItem.id.in_(target_ids),
+                )
+            )
+        )
+    if data.delete:
+        reserved = set(
+            await session.scalars(
+                select(Reservation.gift_item_id)
+                .where(Reservation.gift_item_id.in_(data.delete))
+                .distinct()
+            )
+        )
+
+    seen = set()
+
+    def check(operation, index, item_id, values=None):
+        nulls = sorted(
+            key
+            for key, value in (values or {}).items()
+            if value is None and key in NOT_NULL_ITEM_FIELDS
+        )
+        detail = None
+        if item_id not in existing:
+            detail = 'Item not found'
+        elif item_id in seen:
+            detail = 'Duplicate item id'
+        elif nulls:
+            detail = f'Fields cannot be null: {", ".join(nulls)}'
+        elif operation == 'delete' and item_id in reserved:
+            detail = 'Item has reservations'
+        if detail:
+            errors.append({
+                'operation': operation,
+                'index': index,
+                'item_id': item_id,
+                'detail': detail,
+            })
+            return False
+        seen.add(item_id)
+        return True
+
+    # Group updates by the set of fields they touch: one executemany each
+    updates_by_fields = {}
+    updated_ids = []
+    for index, change in enumerate(data.update):
+        values = change.model_dump(exclude_unset=True)
+        if check('update', index, change.id, values):
+            updated_ids.append(change.id)
+            if len(values) > 1:
+                updates_by_fields.setdefault(tuple(sorted(values)), []).append(
+                    values
+                )
+    deleted_ids = [
+        item_id
+        for index, item_id in enumerate(data.delete)
+        if check('delete', index, item_id)
+    ]
+
+    if deleted_ids:
+        await session.execute(
+            delete(GiftItem).where(GiftItem.id.in_(deleted_ids))
+        )
+    for rows in updates_by_fields.values():
+        await session.execute(update(GiftItem), rows)
+
+    items = []
+    if data.create:
+        created = await session.scalars(
+            insert(GiftItem).returning(GiftItem),
+            [
+                {**item.model_dump(), 'wedding_list_id': list_id}
+                for item in data.create
+            ],
+        )
+        items.extend(created.all())
+    if updated_ids:
+        updated = await session.scalars(
+            select(GiftItem)
+            .where(GiftItem.id.in_(updated_ids))
+            .order_by(GiftItem.id)
+            .execution_options(populate_existing=True)
+        )
+        items.extend(updated.all())
+
+    await session.commit()
+    invalidate_public_list(list_id)
+    if items or deleted_ids:
+        # One refetch for the streams rather than an event per item
+        await broker.publish(list_id, 'reset', {})
+    return ModelResponse(
+        GiftItemBatchResult,
+        {'items': items, 'deleted': deleted_ids, 'errors': errors},
+    )
+
+
+@router.post(
+    '/{list_id}/items/from-templates',
+    response_model=GiftItemList,
+    status_code=HTTPStatus.CREATED,
+)
+async def create_gift_items_from_templates(
+    list_id: int,
+    data: GiftItemsFromTemplates,
+    session: Session,
+    user: CurrentUser,
+):
+    # Single INSERT ... SELECT from the catalog; joining the owned list makes
+    # the ownership check part of the same statement.
+    source = (
+        select(
+            TemplateGiftItem.name,
+            TemplateGiftItem.description,
+            WeddingList.id,
+            literal(GiftStatus.available, GiftItem.__table__.c.status.type),
+        )
+        .join(
+            WeddingList,
+            (WeddingList.id == list_id) & (WeddingList.owner_id == user.id),
+        )
+        .where(
+            TemplateGiftItem.id.in_(sorted(set(data.template_ids)))
+            | TemplateGiftItem.category_id.in_(sorted(set(data.category_ids)))
+        )
+        .order_by(TemplateGiftItem.id)
+    )
+    created = await session.scalars(
+        insert(GiftItem)
+        .from_select(
+            ['name', 'description', 'wedding_list_id', 'status'], source
+        )
+        .returning(GiftItem)
+    )
+    # RETURNING order is not guaranteed; ids follow the catalog order
+    items = sorted(created.all(), key=attrgetter('id'))
+
+    if not items:
+        owned = await session.scalar(
+            select(WeddingList.id).where(
+                WeddingList.id == list_id, WeddingList.owner_id == user.id
+            )
+        )
+        if not owned:
+            raise HTTPException(
+                status_code=HTTPStatus.NOT_FOUND, detail='List not found'
+            )
+        return ModelResponse(
+            GiftItemList, {'items': []}, status_code=HTTPStatus.CREATED
+        )
+
+    await session.commit()
+    invalidate_public_list(list_id)
+    await broker.publish(list_id, 'reset', {})
+    return ModelResponse(
+        GiftItemList, {'items': items}, status_code=HTTPStatus.CREATED
+    )
+
+
 @router.put('/{list_id}/items/{item_id}', response_model=GiftItemPublic)
 async def update_gift_item(
     list_id: int,
@@ -207,6 +416,14 @@ async def update_gift_item(
     session.add(item)
     await session.commit()
     await session.refresh(item)
+    invalidate_public_list(wl.id)
+    await broker.publish(
+        wl.id,
+        'item',
+        GiftItemPublic.model_validate(item).model_dump(
+            mode='json', exclude={'my_reservation_id'}
+        ),
+    )
     return item
 
 
@@ -234,63 +451,47 @@ async def delete_gift_item(
         )
     await session.delete(item)
     await session.commit()
+    invalidate_public_list(wl.id)
+    await broker.publish(wl.id, 'item_deleted', {'id': item_id})
     return {'message': 'Item deleted'}
 
 
 @router.get('/{list_id}/tracking', response_model=TrackingResponse)
-async def tracking(list_id: int, session: Session, user: CurrentUser):
-    # Load list with items (and reserved_by) + rsvps (and guest)
-    wl = await session.scalar(
-        select(WeddingList)
-        .options(
-            selectinload(WeddingList.items).selectinload(GiftItem.reserved_by),
-            selectinload(WeddingList.rsvps).selectinload(Rsvp.guest),
-        )
-        .where(WeddingList.id == list_id, WeddingList.owner_id == user.id)
-    )
-    if not wl:
+async def tracking(list_id: int, session: ReadSession, user: CurrentUser):
+    # Reserved gifts and RSVPs aggregated to JSON by a single statement
+    report = await get_tracking(session, list_id, user.id)
+    if not report:
         raise HTTPException(
             status_code=HTTPStatus.NOT_FOUND, detail='List not found'
         )
+    return ModelResponse(TrackingResponse, report)
 
-    gifts = []
-    for gi in wl.items:
-        if gi.reserved_by_id:  # only show reserved gifts
-            gifts.append(
-                {
-                    'gift': gi,
-                    'reserved_by_id': gi.reserved_by_id,
-                    'reserved_by_name': getattr(gi.reserved_by, 'username', None),
-                }
-            )
 
-    rsvps = []
-    for r in wl.rsvps:
-        base = {
-            'id': r.id,
-            'guest_id': r.guest_id,
-            'guest_name': getattr(r.guest, 'username', None),
-            'status': r.status,
-            'additional_guests': r.additional_guests,
-        }
-        rsvps.append(base)
-        # expand companions
-        if r.additional_guests:
-            for idx, name in enumerate(
-                [n.strip() for n in r.additional_guests.split(',') if n.strip()]
-            ):
-                rsvps.append(
-                    {
-                        'id': int(f"{r.id}000{idx}"),  # synthetic id
-                        'guest_id': r.guest_id,
-                        'guest_name': name,
-                        'status': r.status,
-                        'additional_guests': None,
-                    }
-                )
+EXPORT_MEDIA_TYPES = {'csv': 'text/csv', 'ndjson': 'application/x-ndjson'}
+
 
-    return {
-        'list_id': wl.id,
-        'gifts': gifts,
-        'rsvps': rsvps,
-    }
+@router.get('/{list_id}/tracking/export')
+async def export_tracking(
+    list_id: int,
+    session: ReadSession,
+    user: CurrentUser,
+    format: ExportFormat = 'csv',
+):
+    owned = await session.scalar(
+        select(WeddingList.id).where(
+            WeddingList.id == list_id, WeddingList.owner_id == user.id
+        )
+    )
+    if not owned:
+        raise HTTPException(
+            status_code=HTTPStatus.NOT_FOUND, detail='List not found'
+        )
+    return StreamingResponse(
+        stream_tracking_export(session.bind, list_id, format),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={
+            'Content-Disposition': (
+                f'attachment; filename="tracking-{list_id}.{format}"'
+            )
+        },
+    )
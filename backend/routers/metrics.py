@@ -0,0 +1,15 @@
+from fastapi import APIRouter, Depends, Response
+
+from backend.metrics import CONTENT_TYPE, registry
+from backend.security import require_metrics_token
+
+router = APIRouter(tags=['metrics'])
+
+
+@router.get(
+    '/metrics',
+    include_in_schema=False,
+    dependencies=[Depends(require_metrics_token)],
+)
+async def metrics():
+    return Response(registry.render(), media_type=CONTENT_TYPE)
@@ -1,20 +1,23 @@
+import hashlib
 from http import HTTPStatus
 import sys, asyncio
 from typing import Annotated, Dict, List
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException, Response
 from sqlalchemy import select
 from sqlalchemy.orm import joinedload
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from backend.database import get_session
-from backend.models import TemplateGiftItem, Category, User, UserRole
+from backend.cache import TTLCache
+from backend.database import get_read_session
+from backend.models import TemplateGiftItem, Category, UserRole
+from backend.responses import dump_json
 from backend.schemas import (
     TemplateGiftItemListResponse,
     TemplateGiftItemPublic,
     CategoryPublic,
 )
-from backend.security import get_current_user
+from backend.security import Principal, get_current_user
 
 router = APIRouter(prefix='/template-items', tags=['template-items'])
 
@@ -24,17 +27,38 @@ if sys.platform == 'win32':  # pragma: no cover
     except Exception:  # pragma: no cover
         pass
 
-Session = Annotated[AsyncSession, Depends(get_session)]
-CurrentUser = Annotated[User, Depends(get_current_user)]
+ReadSession = Annotated[AsyncSession, Depends(get_read_session)]
+CurrentUser = Annotated[Principal, Depends(get_current_user)]
 
+# Serialized catalog (etag, body) keyed by catalog version. The catalog
+# changes when seed.py runs or rows are edited by hand, possibly in another
+# process, so the version is read on every call and any change simply
+# misses the cache.
+catalog_cache = TTLCache('template_catalog', maxsize=4, ttl=3600)
+
+
+async def _catalog_version(session: AsyncSession) -> str:
+    # Hash of every column the catalog shows: counts or max(id) would miss
+    # in-place updates. Still far cheaper than loading and serializing it.
+    rows = await session.execute(
+        select(
+            TemplateGiftItem.id,
+            TemplateGiftItem.name,
+            TemplateGiftItem.description,
+            Category.id,
+            Category.name,
+        )
+        .join(Category, Category.id == TemplateGiftItem.category_id)
+        .order_by(TemplateGiftItem.id)
+    )
+    return hashlib.sha256(repr(rows.all()).encode()).hexdigest()
 
-@router.get('', response_model=TemplateGiftItemListResponse)
-async def list_template_items(session: Session, user: CurrentUser):
-    if user.role != UserRole.CASAL:
-        raise HTTPException(status_code=HTTPStatus.FORBIDDEN, detail='Only CASAL users can access template items')
 
+async def _build_catalog(session: AsyncSession) -> tuple[str, bytes]:
     # Preload categories with joinedload to avoid MissingGreenlet due to lazy access
-    stmt = select(TemplateGiftItem).options(joinedload(TemplateGiftItem.category))
+    stmt = select(TemplateGiftItem).options(
+        joinedload(TemplateGiftItem.category).lazyload(Category.template_items)
+    )
     items = await session.scalars(stmt)
     grouped: Dict[int, List[TemplateGiftItem]] = {}
     category_map: Dict[int, Category] = {}
@@ -55,4 +79,37 @@ async def list_template_items(session: Session, user: CurrentUser):
 
     # Sort groups by category name for consistency
     groups.sort(key=lambda g: g['category'].name.lower())
-    return {'groups': groups}
+    body = dump_json(TemplateGiftItemListResponse, {'groups': groups})
+    etag = '"%s"' % hashlib.sha256(body).hexdigest()[:32]
+    return etag, body
+
+
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    tags = [t.strip().removeprefix('W/') for t in if_none_match.split(',')]
+    return '*' in tags or etag in tags
+
+
+@router.get('', response_model=TemplateGiftItemListResponse)
+async def list_template_items(
+    session: ReadSession,
+    user: CurrentUser,
+    if_none_match: Annotated[str | None, Header()] = None,
+):
+    if user.role != UserRole.CASAL:
+        raise HTTPException(status_code=HTTPStatus.FORBIDDEN, detail='Only CASAL users can access template items')
+
+    version = await _catalog_version(session)
+    cached = catalog_cache.get(version)
+    if cached is None:
+        cached = await _build_catalog(session)
+        catalog_cache.set(version, cached)
+    etag, body = cached
+
+    headers = {'ETag': etag, 'Cache-Control': 'private, no-cache'}
+    if _etag_matches(if_none_match, etag):
+        return Response(status_code=HTTPStatus.NOT_MODIFIED, headers=headers)
+    return Response(
+        content=body, media_type='application/json', headers=headers
+    )
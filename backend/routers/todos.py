@@ -6,7 +6,8 @@ from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from backend.database import get_session
-from backend.models import Todo, User
+from backend.models import Todo
+from backend.pagination import paginate
 from backend.schemas import (
     FilterTodo,
     Message,
@@ -15,12 +16,12 @@ from backend.schemas import (
     TodoSchema,
     TodoUpdate,
 )
-from backend.security import get_current_user
+from backend.security import Principal, get_current_user
 
 router = APIRouter()
 
 Session = Annotated[AsyncSession, Depends(get_session)]
-CurrentUser = Annotated[User, Depends(get_current_user)]
+CurrentUser = Annotated[Principal, Depends(get_current_user)]
 
 router = APIRouter(prefix='/todos', tags=['todos'])
 
@@ -63,11 +64,9 @@ async def list_todos(
     if todo_filter.state:
         query = query.filter(Todo.state == todo_filter.state)
 
-    todos = await session.scalars(
-        query.offset(todo_filter.offset).limit(todo_filter.limit)
-    )
+    todos, next_cursor = await paginate(session, query, todo_filter, Todo.id)
 
-    return {'todos': todos.all()}
+    return {'todos': todos, 'next_cursor': next_cursor}
 
 
 @router.patch('/{todo_id}', response_model=TodoPublic)
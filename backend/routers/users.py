@@ -5,9 +5,11 @@ from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy import select
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import lazyload
 
-from backend.database import get_session
+from backend.database import get_read_session, get_session
 from backend.models import User
+from backend.pagination import paginate
 from backend.schemas import (
     FilterPage,
     Message,
@@ -16,13 +18,16 @@ from backend.schemas import (
     UserSchema,
 )
 from backend.security import (
+    Principal,
     get_current_user,
-    get_password_hash,
+    get_password_hash_async,
+    invalidate_user,
 )
 
 router = APIRouter(prefix='/users', tags=['users'])
 Session = Annotated[AsyncSession, Depends(get_session)]
-CurrentUser = Annotated[User, Depends(get_current_user)]
+ReadSession = Annotated[AsyncSession, Depends(get_read_session)]
+CurrentUser = Annotated[Principal, Depends(get_current_user)]
 
 
 @router.post('/', status_code=HTTPStatus.CREATED, response_model=UserPublic)
@@ -45,7 +50,7 @@ async def create_user(user: UserSchema, session: Session):
                 detail='Email already exists',
             )
 
-    hashed_password = get_password_hash(user.password)
+    hashed_password = await get_password_hash_async(user.password)
 
     db_user = User(
         email=user.email,
@@ -63,15 +68,13 @@ async def create_user(user: UserSchema, session: Session):
 
 @router.get('/', response_model=UserList)
 async def read_users(
-    session: Session, filter_users: Annotated[FilterPage, Query()]
+    session: ReadSession, filter_users: Annotated[FilterPage, Query()]
 ):
-    query = await session.scalars(
-        select(User).offset(filter_users.offset).limit(filter_users.limit)
+    users, next_cursor = await paginate(
+        session, select(User), filter_users, User.id
     )
 
-    users = query.all()
-
-    return {'users': users}
+    return {'users': users, 'next_cursor': next_cursor}
 
 
 @router.put('/{user_id}', response_model=UserPublic)
@@ -85,14 +88,22 @@ async def update_user(
         raise HTTPException(
             status_code=HTTPStatus.FORBIDDEN, detail='Not enough permissions'
         )
+    # Only scalar columns are touched, so skip the selectin relationships
+    db_user = await session.get(
+        User, current_user.id, options=[lazyload('*')]
+    )
+    if not db_user:
+        raise HTTPException(
+            status_code=HTTPStatus.NOT_FOUND, detail='User not found'
+        )
     try:
-        current_user.username = user.username
-        current_user.password = get_password_hash(user.password)
-        current_user.email = user.email
-        current_user.role = user.role
+        db_user.username = user.username
+        db_user.password = await get_password_hash_async(user.password)
+        db_user.email = user.email
+        db_user.role = user.role
         await session.commit()
-        await session.refresh(current_user)
-        return current_user
+        invalidate_user(current_user.email)
+        return db_user
     except IntegrityError:
         raise HTTPException(
             status_code=HTTPStatus.CONFLICT,
@@ -116,7 +127,11 @@ async def delete_user(
             status_code=HTTPStatus.FORBIDDEN, detail='Not enough permissions'
         )
 
-    await session.delete(current_user)
-    await session.commit()
+    # Full ORM load here: cascades need the owned rows
+    db_user = await session.get(User, current_user.id)
+    if db_user:
+        await session.delete(db_user)
+        await session.commit()
+    invalidate_user(current_user.email)
 
     return {'message': 'User deleted'}
@@ -9,10 +9,17 @@ from .todos import (
 )
 from .users import UserList, UserPublic, UserSchema
 from .wedding import (
+    GiftItemBatch,
+    GiftItemBatchError,
+    GiftItemBatchResult,
+    GiftItemBatchUpdate,
     GiftItemCreate,
+    GiftItemList,
     GiftItemPublic,
+    GiftItemsFromTemplates,
     GiftItemUpdate,
     GuestDetails,
+    RsvpCompanionPublic,
     RsvpPublic,
     TrackingResponse,
     WeddingListCreate,
@@ -47,6 +54,13 @@ __all__ = [
     'GiftItemCreate',
     'GiftItemUpdate',
     'GiftItemPublic',
+    'GiftItemBatch',
+    'GiftItemBatchUpdate',
+    'GiftItemBatchError',
+    'GiftItemBatchResult',
+    'GiftItemList',
+    'GiftItemsFromTemplates',
+    'RsvpCompanionPublic',
     'RsvpPublic',
     'TrackingResponse',
     'GuestDetails',
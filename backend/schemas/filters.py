@@ -2,10 +2,15 @@ from pydantic import BaseModel, Field
 
 from backend.models import TodoState
 
+MAX_PAGE_SIZE = 100
+
 
 class FilterPage(BaseModel):
     offset: int = Field(0, ge=0)
-    limit: int = Field(100, ge=1)
+    limit: int = Field(MAX_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE)
+    # Opaque keyset cursor (next_cursor of the previous page); wins over
+    # offset when present
+    cursor: str | None = None
 
 
 class FilterTodo(FilterPage):
@@ -15,6 +15,7 @@ class TodoPublic(TodoSchema):
 
 class TodoList(BaseModel):
     todos: list[TodoPublic]
+    next_cursor: str | None = None
 
 
 class TodoUpdate(BaseModel):
@@ -1,6 +1,7 @@
 from datetime import date
+from typing import Literal
 
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, Field, computed_field
 
 from backend.models import GiftStatus, RsvpStatus
 
@@ -40,6 +41,43 @@ class GiftItemPublic(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 
+MAX_BATCH_OPERATIONS = 500
+
+
+class GiftItemBatchUpdate(GiftItemUpdate):
+    id: int
+
+
+class GiftItemBatch(BaseModel):
+    create: list[GiftItemCreate] = Field([], max_length=MAX_BATCH_OPERATIONS)
+    update: list[GiftItemBatchUpdate] = Field(
+        [], max_length=MAX_BATCH_OPERATIONS
+    )
+    delete: list[int] = Field([], max_length=MAX_BATCH_OPERATIONS)
+
+
+class GiftItemBatchError(BaseModel):
+    operation: Literal['create', 'update', 'delete']
+    index: int
+    item_id: int | None = None
+    detail: str
+
+
+class GiftItemBatchResult(BaseModel):
+    items: list[GiftItemPublic]
+    deleted: list[int]
+    errors: list[GiftItemBatchError]
+
+
+class GiftItemsFromTemplates(BaseModel):
+    template_ids: list[int] = Field([], max_length=MAX_BATCH_OPERATIONS)
+    category_ids: list[int] = Field([], max_length=MAX_BATCH_OPERATIONS)
+
+
+class GiftItemList(BaseModel):
+    items: list[GiftItemPublic]
+
+
 class WeddingListPublic(BaseModel):
     id: int
     title: str
@@ -66,14 +104,26 @@ class WeddingListSummary(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 
+class RsvpCompanionPublic(BaseModel):
+    id: int
+    name: str
+    model_config = ConfigDict(from_attributes=True)
+
+
 class RsvpPublic(BaseModel):
     id: int
     guest_id: int
     guest_name: str | None = None
     status: RsvpStatus
-    additional_guests: str | None = None
+    companions: list[RsvpCompanionPublic] = []
     model_config = ConfigDict(from_attributes=True)
 
+    @computed_field
+    @property
+    def additional_guests(self) -> str | None:
+        """Companion names joined by commas, kept for older clients."""
+        return ', '.join(c.name for c in self.companions) or None
+
 
 class TrackingEntry(BaseModel):
     gift: GiftItemPublic
@@ -85,6 +135,8 @@ class TrackingResponse(BaseModel):
     list_id: int
     gifts: list[TrackingEntry]
     rsvps: list[RsvpPublic]
+    # Confirmed guests plus their companions
+    headcount: int
 
 
 class ReservationPublic(BaseModel):
@@ -1,16 +1,30 @@
+import asyncio
+import secrets
+from collections.abc import Callable
+from concurrent.futures import (
+    Executor,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+)
+from dataclasses import dataclass
 from datetime import datetime, timedelta
 from http import HTTPStatus
 from zoneinfo import ZoneInfo
 
 from fastapi import Depends, HTTPException
-from fastapi.security import OAuth2PasswordBearer
+from fastapi.security import (
+    HTTPAuthorizationCredentials,
+    HTTPBearer,
+    OAuth2PasswordBearer,
+)
 from jwt import DecodeError, ExpiredSignatureError, decode, encode
 from pwdlib import PasswordHash
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from backend.cache import TTLCache
 from backend.database import get_session
-from backend.models import User
+from backend.models import User, UserRole
 from backend.settings import Settings
 
 settings = Settings()
@@ -18,6 +32,86 @@ pwd_context = PasswordHash.recommended()
 oauth2_scheme = OAuth2PasswordBearer(
     tokenUrl='auth/token', refreshUrl='auth/refresh'
 )
+metrics_scheme = HTTPBearer(auto_error=False)
+
+# Principals keyed by token subject (email). Entries are dropped by
+# invalidate_user() when the account changes in this process; other
+# workers catch up once the TTL expires.
+user_cache = TTLCache(
+    'users',
+    maxsize=settings.USER_CACHE_MAX_SIZE,
+    ttl=settings.USER_CACHE_TTL_SECONDS,
+)
+
+
+@dataclass(frozen=True, slots=True)
+class Principal:
+    """Authenticated user as seen by request handlers.
+
+    Only the columns needed for authorization are loaded, so resolving a
+    principal never touches the ``selectin`` relationships of ``User``.
+    Endpoints that need the ORM object load it explicitly by ``id``.
+    """
+
+    id: int
+    username: str
+    email: str
+    role: UserRole
+
+
+class PasswordHashPool:
+    """Runs argon2 hashing and verification off the event loop.
+
+    At most ``max_workers`` hashes run at once; extra calls wait in the
+    executor queue, whose size is reported as ``queue_depth``.
+    """
+
+    def __init__(self, max_workers: int, kind: str = 'thread'):
+        self.max_workers = max_workers
+        self.kind = kind
+        self.pending = 0
+        self._executor: Executor | None = None
+
+    @property
+    def queue_depth(self) -> int:
+        return max(0, self.pending - self.max_workers)
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.kind == 'process':
+                self._executor = ProcessPoolExecutor(self.max_workers)
+            else:
+                self._executor = ThreadPoolExecutor(
+                    self.max_workers, thread_name_prefix='password-hash'
+                )
+        return self._executor
+
+    async def run(self, func: Callable, *args):
+        loop = asyncio.get_running_loop()
+        self.pending += 1
+        try:
+            return await loop.run_in_executor(
+                self._get_executor(), func, *args
+            )
+        finally:
+            self.pending -= 1
+
+    def stats(self) -> dict[str, int]:
+        return {
+            'max_workers': self.max_workers,
+            'pending': self.pending,
+            'queue_depth': self.queue_depth,
+        }
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+
+password_hash_pool = PasswordHashPool(
+    settings.PASSWORD_HASH_WORKERS, settings.PASSWORD_HASH_EXECUTOR
+)
 
 
 def create_access_token(data: dict):
@@ -32,6 +126,10 @@ def create_access_token(data: dict):
     return encoded_jwt
 
 
+def invalidate_user(email: str):
+    user_cache.pop(email)
+
+
 def get_password_hash(password: str):
     return pwd_context.hash(password)
 
@@ -40,10 +138,22 @@ def verify_password(plain_password: str, hashed_password: str):
     return pwd_context.verify(plain_password, hashed_password)
 
 
+async def get_password_hash_async(password: str) -> str:
+    return await password_hash_pool.run(get_password_hash, password)
+
+
+async def verify_password_async(
+    plain_password: str, hashed_password: str
+) -> bool:
+    return await password_hash_pool.run(
+        verify_password, plain_password, hashed_password
+    )
+
+
 async def get_current_user(
     session: AsyncSession = Depends(get_session),
     token: str = Depends(oauth2_scheme),
-):
+) -> Principal:
     credentials_exception = HTTPException(
         status_code=HTTPStatus.UNAUTHORIZED,
         detail='Could not validate credentials',
@@ -65,11 +175,42 @@ async def get_current_user(
     except ExpiredSignatureError:
         raise credentials_exception
 
-    user = await session.scalar(
-        select(User).where(User.email == subject_email)
-    )
+    principal = user_cache.get(subject_email)
+    if principal:
+        return principal
+
+    row = (
+        await session.execute(
+            select(User.id, User.username, User.email, User.role).where(
+                User.email == subject_email
+            )
+        )
+    ).first()
 
-    if not user:
+    if not row:
         raise credentials_exception
 
-    return user
+    principal = Principal(*row)
+    user_cache.set(subject_email, principal)
+
+    return principal
+
+
+def require_metrics_token(
+    credentials: HTTPAuthorizationCredentials | None = Depends(metrics_scheme),
+):
+    """Guard of the operational endpoints (pool, cache and route stats).
+
+    They do not exist unless ``METRICS_TOKEN`` is set, and then need it as
+    a Bearer token.
+    """
+    if not settings.METRICS_TOKEN:
+        raise HTTPException(status_code=HTTPStatus.NOT_FOUND)
+    if credentials is None or not secrets.compare_digest(
+        credentials.credentials.encode(), settings.METRICS_TOKEN.encode()
+    ):
+        raise HTTPException(
+            status_code=HTTPStatus.UNAUTHORIZED,
+            detail='Invalid metrics token',
+            headers={'WWW-Authenticate': 'Bearer'},
+        )
@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+from typing import Literal
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -14,33 +16,100 @@ class Settings(BaseSettings):
     ALGORITHM: str
     ACCESS_TOKEN_EXPIRE_MINUTES: int
 
+    # Connection pool per worker process; pre-ping costs a round trip on
+    # every checkout, recycle (seconds, -1 = never) is the cheaper way to
+    # avoid connections dropped by the server or a proxy
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30
+    DB_POOL_RECYCLE: int = -1
+    DB_POOL_PRE_PING: bool = True
+
+    # Optional hot standby for read-only endpoints; reads go back to the
+    # primary while its replay lag exceeds REPLICA_MAX_LAG_SECONDS (checked
+    # at most every REPLICA_LAG_CHECK_SECONDS)
+    DATABASE_REPLICA_URL: str | None = None
+    REPLICA_MAX_LAG_SECONDS: float = 5
+    REPLICA_LAG_CHECK_SECONDS: float = 1
+
+    # Bearer token for /metrics and /health/details; both are off (404)
+    # while it is unset
+    METRICS_TOKEN: str | None = None
+
     # Optional, comma-separated list for CORS
     FRONTEND_ORIGINS: str | None = None
 
+    # Responses smaller than this many bytes are sent uncompressed
+    COMPRESSION_MINIMUM_SIZE: int = 1024
+
+    # In-process cache of authenticated users (0 disables it)
+    USER_CACHE_TTL_SECONDS: float = 60
+    USER_CACHE_MAX_SIZE: int = 4096
+
+    # Shared guest view of wedding lists, keyed by shareable link
+    PUBLIC_LIST_CACHE_TTL_SECONDS: float = 30
+    PUBLIC_LIST_CACHE_MAX_SIZE: int = 1024
+
+    # Idempotency-Key on guest writes: responses are replayed for at least
+    # IDEMPOTENCY_KEY_TTL_SECONDS, expired keys purged every
+    # IDEMPOTENCY_PURGE_INTERVAL_SECONDS
+    IDEMPOTENCY_KEY_TTL_SECONDS: float = 86400
+    IDEMPOTENCY_PURGE_INTERVAL_SECONDS: float = 3600
+    IDEMPOTENCY_CACHE_MAX_SIZE: int = 4096
+
+    # Login attempts take a token from a bucket per username and one per
+    # client IP, refilled at *_PER_MINUTE; 'postgres' shares the buckets
+    # between workers
+    LOGIN_RATE_LIMIT_BACKEND: Literal['memory', 'postgres'] = 'memory'
+    LOGIN_USERNAME_BURST: int = 5
+    LOGIN_USERNAME_PER_MINUTE: float = 5
+    LOGIN_IP_BURST: int = 20
+    LOGIN_IP_PER_MINUTE: float = 60
+    LOGIN_RATE_LIMIT_MAX_KEYS: int = 65536
+
+    # Worker pool for argon2 hashing/verification, kept off the event loop
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_EXECUTOR: Literal['thread', 'process'] = 'thread'
+
+    # Live gift status streams (SSE); 'postgres' relays events between
+    # workers through LISTEN/NOTIFY
+    EVENTS_BACKEND: Literal['memory', 'postgres'] = 'memory'
+    EVENTS_QUEUE_SIZE: int = 100
+    EVENTS_KEEPALIVE_SECONDS: float = 15
+
     def database_url_async(self) -> str:
-        """Return DATABASE_URL normalized for async psycopg.
-
-        Accepts common inputs (postgres://, postgresql://, psycopg2) and
-        coerces to postgresql+psycopg://. Appends sslmode=require for
-        common managed providers when missing.
-        """
-        url = (self.DATABASE_URL or '').strip()
-        # Normalize scheme to async psycopg (SQLAlchemy auto-selects async
-        # when create_async_engine is used with +psycopg)
-        if url.startswith('postgres://'):
-            url = 'postgresql+psycopg://' + url[len('postgres://') :]
-        elif url.startswith('postgresql://'):
-            url = 'postgresql+psycopg://' + url[len('postgresql://') :]
-        elif url.startswith('postgresql+psycopg2://'):
-            url = 'postgresql+psycopg://' + url[len('postgresql+psycopg2://') :]
-
-        # If pointing to DigitalOcean managed DB and sslmode missing, add it
-        if 'ondigitalocean.com' in url and 'sslmode=' not in url:
-            url += ('&' if '?' in url else '?') + 'sslmode=require'
-
-        return url
+        return _async_url(self.DATABASE_URL)
+
+    def database_replica_url_async(self) -> str | None:
+        if not self.DATABASE_REPLICA_URL:
+            return None
+        return _async_url(self.DATABASE_REPLICA_URL)
 
     def cors_origins(self) -> list[str]:
         if not self.FRONTEND_ORIGINS:
             return []
         return [o.strip() for o in self.FRONTEND_ORIGINS.split(',') if o.strip()]
+
+
+def _async_url(url: str) -> str:
+    """Return a database URL normalized for async psycopg.
+
+    Accepts common inputs (postgres://, postgresql://, psycopg2) and
+    coerces to postgresql+psycopg://. Appends sslmode=require for
+    common managed providers when missing.
+    """
+    url = (url or '').strip()
+    # Normalize scheme to async psycopg (SQLAlchemy auto-selects async
+    # when create_async_engine is used with +psycopg)
+    if url.startswith('postgres://'):
+        url = 'postgresql+psycopg://' + url[len('postgres://') :]
+    elif url.startswith('postgresql://'):
+        url = 'postgresql+psycopg://' + url[len('postgresql://') :]
+    elif url.startswith('postgresql+psycopg2://'):
+        url = 'postgresql+psycopg://' + url[len('postgresql+psycopg2://') :]
+
+    # If pointing to DigitalOcean managed DB and sslmode missing, add it
+    if 'ondigitalocean.com' in url and 'sslmode=' not in url:
+        url += ('&' if '?' in url else '?') + 'sslmode=require'
+
+    return url
@@ -0,0 +1,292 @@
+import csv
+import io
+import json
+from collections.abc import AsyncIterator
+from typing import Literal
+
+from sqlalchemy import (
+    JSON,
+    Select,
+    distinct,
+    func,
+    literal,
+    select,
+    type_coerce,
+)
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from sqlalchemy.orm import aliased
+
+from backend.models import (
+    GiftItem,
+    Rsvp,
+    RsvpCompanion,
+    RsvpStatus,
+    User,
+    WeddingList,
+)
+
+ExportFormat = Literal['csv', 'ndjson']
+
+EXPORT_COLUMNS = (
+    'kind',
+    'id',
+    'name',
+    'description',
+    'status',
+    'guest_id',
+    'guest_name',
+)
+EXPORT_BATCH_SIZE = 500
+
+
+def _json_object(dialect: str, **fields):
+    if dialect == 'postgresql':
+        build = func.json_build_object
+    else:
+        build = func.json_object
+    args = []
+    for key, value in fields.items():
+        args += [literal(key, literal_execute=True), value]
+    return build(*args)
+
+
+def _json_agg(dialect: str, item, order_by):
+    """JSON array aggregate, ``[]`` when there are no rows.
+
+    Postgres uses ``json_agg`` ordered by ``order_by``; SQLite has the
+    equivalent ``json_group_array``, which keeps the order rows are read.
+    """
+    if dialect == 'postgresql':
+        return func.coalesce(
+            func.json_agg(aggregate_order_by(item, order_by)),
+            func.json_build_array(),
+        )
+    return func.json_group_array(item)
+
+
+def _nested_json(dialect: str, subquery):
+    # SQLite drops the JSON subtype of a subquery result; json() restores
+    # it so the value is embedded as an array instead of a string.
+    return subquery if dialect == 'postgresql' else func.json(subquery)
+
+
+def _json_array(dialect: str, rows: Select, **fields):
+    """Aggregate ``rows`` (ordered by their ``id``) into a JSON array."""
+    rows = rows.subquery()
+    item = _json_object(
+        dialect, **{key: field(rows.c) for key, field in fields.items()}
+    )
+    return type_coerce(
+        select(_json_agg(dialect, item, rows.c.id))
+        .select_from(rows)
+        .scalar_subquery(),
+        JSON,
+    )
+
+
+def _companions_json(dialect: str, rsvp_id):
+    item = _json_object(dialect, id=RsvpCompanion.id, name=RsvpCompanion.name)
+    return _nested_json(
+        dialect,
+        select(_json_agg(dialect, item, RsvpCompanion.id))
+        .where(RsvpCompanion.rsvp_id == rsvp_id)
+        .scalar_subquery(),
+    )
+
+
+def _headcount(list_id: int):
+    """Confirmed guests plus their companions."""
+    return (
+        select(func.count(distinct(Rsvp.id)) + func.count(RsvpCompanion.id))
+        .select_from(Rsvp)
+        .outerjoin(RsvpCompanion, RsvpCompanion.rsvp_id == Rsvp.id)
+        .where(
+            Rsvp.wedding_list_id == list_id,
+            Rsvp.status == RsvpStatus.confirmed,
+        )
+        .scalar_subquery()
+    )
+
+
+def _reserved_gifts(list_id: int) -> Select:
+    reserved_by = aliased(User)
+    return (
+        select(
+            GiftItem.id,
+            GiftItem.name,
+            GiftItem.description,
+            GiftItem.status,
+            GiftItem.reserved_by_id,
+            reserved_by.username.label('reserved_by_name'),
+        )
+        .outerjoin(reserved_by, reserved_by.id == GiftItem.reserved_by_id)
+        .where(
+            GiftItem.wedding_list_id == list_id,
+            GiftItem.reserved_by_id.is_not(None),
+        )
+        .order_by(GiftItem.id)
+    )
+
+
+def _rsvps(list_id: int) -> Select:
+    guest = aliased(User)
+    return (
+        select(
+            Rsvp.id,
+            Rsvp.guest_id,
+            guest.username.label('guest_name'),
+            Rsvp.status,
+        )
+        .outerjoin(guest, guest.id == Rsvp.guest_id)
+        .where(Rsvp.wedding_list_id == list_id)
+        .order_by(Rsvp.id)
+    )
+
+
+def tracking_query(dialect: str, list_id: int, owner_id: int) -> Select:
+    """Single statement returning the whole tracking report of a list.
+
+    Reserved gifts, RSVPs with their companions and the headcount are all
+    aggregated by the database.
+
+    No row comes back when the list does not exist or belongs to someone
+    else.
+    """
+    gifts = _json_array(
+        dialect,
+        _reserved_gifts(list_id),
+        gift=lambda c: _json_object(
+            dialect,
+            id=c.id,
+            name=c.name,
+            description=c.description,
+            status=c.status,
+            reserved_by_id=c.reserved_by_id,
+        ),
+        reserved_by_id=lambda c: c.reserved_by_id,
+        reserved_by_name=lambda c: c.reserved_by_name,
+    )
+    rsvps = _json_array(
+        dialect,
+        _rsvps(list_id),
+        id=lambda c: c.id,
+        guest_id=lambda c: c.guest_id,
+        guest_name=lambda c: c.guest_name,
+        status=lambda c: c.status,
+        companions=lambda c: _companions_json(dialect, c.id),
+    )
+
+    return select(
+        WeddingList.id,
+        gifts.label('gifts'),
+        rsvps.label('rsvps'),
+        _headcount(list_id).label('headcount'),
+    ).where(WeddingList.id == list_id, WeddingList.owner_id == owner_id)
+
+
+async def get_tracking(
+    session: AsyncSession, list_id: int, owner_id: int
+) -> dict | None:
+    dialect = session.get_bind().dialect.name
+    row = (
+        await session.execute(tracking_query(dialect, list_id, owner_id))
+    ).first()
+    if row is None:
+        return None
+    return {
+        'list_id': row.id,
+        'gifts': row.gifts,
+        'rsvps': row.rsvps,
+        'headcount': row.headcount,
+    }
+
+
+async def export_rows(
+    session: AsyncSession, list_id: int
+) -> AsyncIterator[list[dict]]:
+    """Yield the tracking data as flat rows, one batch at a time.
+
+    Both queries run on a server-side cursor (``yield_per``), so only one
+    batch of rows is held in memory whatever the size of the list.
+    """
+    gifts = await session.stream(
+        _reserved_gifts(list_id).execution_options(yield_per=EXPORT_BATCH_SIZE)
+    )
+    async for batch in gifts.partitions():
+        yield [
+            {
+                'kind': 'gift',
+                'id': r.id,
+                'name': r.name,
+                'description': r.description,
+                'status': r.status.value,
+                'guest_id': r.reserved_by_id,
+                'guest_name': r.reserved_by_name,
+            }
+            for r in batch
+        ]
+
+    # One row per RSVP/companion pair; an RSVP's companions may span
+    # two batches, so the last RSVP seen is carried over.
+    rsvps = await session.stream(
+        _rsvps(list_id)
+        .add_columns(
+            RsvpCompanion.id.label('companion_id'),
+            RsvpCompanion.name.label('companion_name'),
+        )
+        .outerjoin(RsvpCompanion, RsvpCompanion.rsvp_id == Rsvp.id)
+        .order_by(RsvpCompanion.id)
+        .execution_options(yield_per=EXPORT_BATCH_SIZE)
+    )
+    last_rsvp_id = None
+    async for batch in rsvps.partitions():
+        rows = []
+        for r in batch:
+            rsvp = {
+                'kind': 'rsvp',
+                'id': r.id,
+                'name': None,
+                'description': None,
+                'status': r.status.value,
+                'guest_id': r.guest_id,
+                'guest_name': r.guest_name,
+            }
+            if r.id != last_rsvp_id:
+                rows.append(rsvp)
+                last_rsvp_id = r.id
+            if r.companion_id is not None:
+                rows.append({
+                    **rsvp,
+                    'kind': 'companion',
+                    'id': r.companion_id,
+                    'guest_name': r.companion_name,
+                })
+        yield rows
+
+
+async def stream_tracking_export(
+    bind: AsyncEngine, list_id: int, format: ExportFormat
+) -> AsyncIterator[str]:
+    """Encode :func:`export_rows` as CSV or NDJSON chunks.
+
+    The request session is already closed when the response body streams,
+    so the export opens (and closes) its own session on the same engine.
+    """
+    async with AsyncSession(bind, expire_on_commit=False) as session:
+        if format == 'ndjson':
+            async for rows in export_rows(session, list_id):
+                yield ''.join(json.dumps(row) + '\n' for row in rows)
+            return
+
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, EXPORT_COLUMNS)
+        # BOM so spreadsheet apps detect UTF-8 (accented names)
+        buffer.write('\ufeff')
+        writer.writeheader()
+        yield buffer.getvalue()
+        async for rows in export_rows(session, list_id):
+            buffer.seek(0)
+            buffer.truncate()
+            writer.writerows(rows)
+            yield buffer.getvalue()
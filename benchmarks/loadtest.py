@@ -0,0 +1,451 @@
+"""HTTP load test for the guest and couple flows.
+
+Run: `poetry run python -m benchmarks.loadtest --output results.json`
+
+Async httpx workers drive the ASGI app in-process (no server, no network)
+against SQLite by default or any database given with `--database-url`.
+ALL TABLES OF THAT DATABASE ARE DROPPED AND RECREATED: point it at a
+scratch database, never at real data.
+
+Each scenario runs a fixed number of operations with a seeded random
+generator per worker, so two runs with the same options issue the same
+requests. Latency percentiles and throughput per scenario go to a JSON
+file; `--compare old.json` prints the changes against an earlier run.
+The login rate limiter is disabled: every request comes from one client.
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import asdict, dataclass, field
+from datetime import UTC, datetime
+from pathlib import Path
+
+import httpx
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from backend.app import app
+from backend.cache import clear_caches
+from backend.database import get_session
+from backend.models import (
+    GiftItem,
+    RsvpStatus,
+    User,
+    UserRole,
+    WeddingList,
+    table_registry,
+)
+from backend.rate_limit import limit_login_attempts
+from backend.security import create_access_token, get_password_hash
+
+PASSWORD = 'loadtest'
+COMPANIONS = ('Ana', 'Bia', 'Caio')
+PERCENTILES = (50, 95, 99)
+
+
+@dataclass(frozen=True)
+class LoadTestConfig:
+    database_url: str
+    scenarios: tuple[str, ...]
+    operations: int = 200
+    warmup: int = 10
+    concurrency: int = 10
+    guests: int = 50
+    items: int = 200
+    seed: int = 0
+
+
+@dataclass
+class Dataset:
+    couple_email: str
+    guest_emails: list[str]
+    list_id: int
+    shareable_link: str
+    item_ids: list[int]
+
+
+@dataclass
+class Recorder:
+    latencies: dict[str, list[float]] = field(default_factory=dict)
+    errors: dict[str, int] = field(default_factory=dict)
+    recording: bool = True
+
+    def record(self, name: str, elapsed: float, ok: bool):
+        if not self.recording:
+            return
+        self.latencies.setdefault(name, []).append(elapsed)
+        if not ok:
+            self.errors[name] = self.errors.get(name, 0) + 1
+
+
+@dataclass
+class Worker:
+    """State of one concurrent client: its guest, RNG and item slice."""
+
+    client: httpx.AsyncClient
+    recorder: Recorder
+    dataset: Dataset
+    rng: random.Random
+    guest_headers: dict[str, str]
+    couple_headers: dict[str, str]
+    items: list[int]
+    next_item: int = 0
+
+    async def request(self, name: str, method: str, url: str, **kwargs):
+        start = time.perf_counter()
+        response = await self.client.request(method, url, **kwargs)
+        elapsed = time.perf_counter() - start
+        self.recorder.record(name, elapsed, response.is_success)
+        return response
+
+
+def _auth_headers(email: str) -> dict[str, str]:
+    return {'Authorization': f'Bearer {create_access_token({"sub": email})}'}
+
+
+async def login(worker: Worker):
+    email = worker.rng.choice(worker.dataset.guest_emails)
+    await worker.request(
+        'login',
+        'POST',
+        '/auth/token',
+        data={'username': email, 'password': PASSWORD},
+    )
+
+
+async def browse(worker: Worker):
+    await worker.request(
+        'browse',
+        'GET',
+        f'/guest/lists/{worker.dataset.shareable_link}',
+        headers=worker.guest_headers,
+    )
+
+
+async def reserve_cancel(worker: Worker):
+    # Workers own disjoint item slices, so reservations never conflict
+    item_id = worker.items[worker.next_item % len(worker.items)]
+    worker.next_item += 1
+    headers = worker.guest_headers
+    response = await worker.request(
+        'reserve', 'POST', f'/guest/items/{item_id}/reserve', headers=headers
+    )
+    if response.is_success:
+        await worker.request(
+            'cancel',
+            'DELETE',
+            f'/guest/reservations/{response.json()["id"]}',
+            headers=headers,
+        )
+
+
+async def rsvp(worker: Worker):
+    await worker.request(
+        'rsvp',
+        'POST',
+        f'/guest/lists/{worker.dataset.list_id}/rsvp',
+        headers=worker.guest_headers,
+        json={
+            'status': worker.rng.choice([s.value for s in RsvpStatus]),
+            'companions': worker.rng.sample(
+                COMPANIONS, worker.rng.randint(0, len(COMPANIONS))
+            ),
+        },
+    )
+
+
+async def tracking(worker: Worker):
+    await worker.request(
+        'tracking',
+        'GET',
+        f'/lists/{worker.dataset.list_id}/tracking',
+        headers=worker.couple_headers,
+    )
+
+
+SCENARIOS: dict[str, Callable[[Worker], Awaitable[None]]] = {
+    'login': login,
+    'browse': browse,
+    'reserve_cancel': reserve_cancel,
+    'rsvp': rsvp,
+    'tracking': tracking,
+}
+
+
+async def seed(session_maker, config: LoadTestConfig) -> Dataset:
+    # Hashing is deliberately slow; every user shares one hash
+    password = get_password_hash(PASSWORD)
+    couple = User(
+        username='loadtest-couple',
+        email='couple@loadtest.example',
+        password=password,
+    )
+    guests = [
+        User(
+            username=f'loadtest-guest-{n}',
+            email=f'guest{n}@loadtest.example',
+            password=password,
+            role=UserRole.CONVIDADO,
+        )
+        for n in range(config.guests)
+    ]
+    async with session_maker() as session:
+        session.add_all([couple, *guests])
+        await session.flush()
+        wl = WeddingList(
+            title='Load test',
+            message=None,
+            event_date=None,
+            shareable_link='loadtest',
+            owner_id=couple.id,
+        )
+        session.add(wl)
+        await session.flush()
+        items = [
+            GiftItem(
+                name=f'Presente {n}', description=None, wedding_list_id=wl.id
+            )
+            for n in range(config.items)
+        ]
+        session.add_all(items)
+        await session.commit()
+        return Dataset(
+            couple_email=couple.email,
+            guest_emails=[guest.email for guest in guests],
+            list_id=wl.id,
+            shareable_link=wl.shareable_link,
+            item_ids=[item.id for item in items],
+        )
+
+
+def percentile(sorted_values: list[float], p: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    rank = max(math.ceil(p / 100 * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+
+def summarize(recorder: Recorder, elapsed: float) -> dict:
+    requests = {}
+    for name, latencies in recorder.latencies.items():
+        ordered = sorted(latencies)
+        requests[name] = {
+            'count': len(ordered),
+            'errors': recorder.errors.get(name, 0),
+            'latency_ms': {
+                **{
+                    f'p{p}': round(percentile(ordered, p) * 1000, 3)
+                    for p in PERCENTILES
+                },
+                'mean': round(sum(ordered) / len(ordered) * 1000, 3),
+                'max': round(ordered[-1] * 1000, 3),
+            },
+        }
+    total = sum(len(values) for values in recorder.latencies.values())
+    return {
+        'requests': total,
+        'errors': sum(recorder.errors.values()),
+        'elapsed_s': round(elapsed, 3),
+        'throughput_rps': round(total / elapsed, 1) if elapsed else 0.0,
+        'by_request': requests,
+    }
+
+
+async def run_scenario(
+    client: httpx.AsyncClient,
+    dataset: Dataset,
+    name: str,
+    config: LoadTestConfig,
+) -> dict:
+    recorder = Recorder()
+    workers = [
+        Worker(
+            client=client,
+            recorder=recorder,
+            dataset=dataset,
+            rng=random.Random(f'{config.seed}-{name}-{n}'),
+            guest_headers=_auth_headers(
+                dataset.guest_emails[n % len(dataset.guest_emails)]
+            ),
+            couple_headers=_auth_headers(dataset.couple_email),
+            items=dataset.item_ids[n :: config.concurrency],
+        )
+        for n in range(config.concurrency)
+    ]
+    scenario = SCENARIOS[name]
+
+    async def drive(worker: Worker, operations):
+        # The iterator is shared: workers pull until the budget runs out
+        for _ in operations:
+            await scenario(worker)
+
+    clear_caches()
+    recorder.recording = False
+    warmup = iter(range(config.warmup))
+    await asyncio.gather(*(drive(w, warmup) for w in workers))
+
+    recorder.recording = True
+    operations = iter(range(config.operations))
+    start = time.perf_counter()
+    await asyncio.gather(*(drive(w, operations) for w in workers))
+    return summarize(recorder, time.perf_counter() - start)
+
+
+def _git_commit() -> str | None:
+    result = subprocess.run(
+        ['git', 'rev-parse', '--short', 'HEAD'],
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    return result.stdout.strip() or None
+
+
+async def run_loadtest(config: LoadTestConfig) -> dict:
+    engine = create_async_engine(config.database_url)
+    session_maker = async_sessionmaker(engine, expire_on_commit=False)
+
+    async def get_session_override():
+        async with session_maker() as session:
+            yield session
+
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(table_registry.metadata.drop_all)
+            await conn.run_sync(table_registry.metadata.create_all)
+        dataset = await seed(session_maker, config)
+
+        app.dependency_overrides[get_session] = get_session_override
+        app.dependency_overrides[limit_login_attempts] = lambda: None
+        async with (
+            app.router.lifespan_context(app),
+            httpx.AsyncClient(
+                transport=httpx.ASGITransport(app=app),
+                base_url='http://loadtest',
+            ) as client,
+        ):
+            results = {
+                name: await run_scenario(client, dataset, name, config)
+                for name in config.scenarios
+            }
+    finally:
+        app.dependency_overrides.pop(get_session, None)
+        app.dependency_overrides.pop(limit_login_attempts, None)
+        await engine.dispose()
+
+    return {
+        'meta': {
+            'commit': _git_commit(),
+            'started_at': datetime.now(UTC).isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'database': engine.dialect.name,
+            'config': {
+                **asdict(config),
+                'database_url': engine.url.render_as_string(),
+            },
+        },
+        'scenarios': results,
+    }
+
+
+def compare(baseline: dict, current: dict) -> list[str]:
+    """One line per scenario with the p95 and throughput changes."""
+
+    def change(old, new):
+        if not old:
+            return 'n/a'
+        return f'{(new - old) / old:+.1%}'
+
+    lines = []
+    for name, result in current['scenarios'].items():
+        old = baseline['scenarios'].get(name)
+        if old is None:
+            lines.append(f'{name}: not in baseline')
+            continue
+        for request, stats in result['by_request'].items():
+            before = old['by_request'].get(request)
+            if before is None:
+                continue
+            old_p95 = before['latency_ms']['p95']
+            new_p95 = stats['latency_ms']['p95']
+            lines.append(
+                f'{name}/{request}: p95 {old_p95}ms -> {new_p95}ms '
+                f'({change(old_p95, new_p95)})'
+            )
+        lines.append(
+            f'{name}: {old["throughput_rps"]} -> '
+            f'{result["throughput_rps"]} req/s '
+            f'({change(old["throughput_rps"], result["throughput_rps"])})'
+        )
+    return lines
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        '--database-url',
+        help='Scratch database (all tables are dropped); default: a '
+        'temporary SQLite file',
+    )
+    parser.add_argument(
+        '--scenario',
+        action='append',
+        choices=sorted(SCENARIOS),
+        help='Repeat to run several; default: all',
+    )
+    defaults = LoadTestConfig(database_url='', scenarios=())
+    for option in ('operations', 'warmup', 'concurrency', 'guests', 'items'):
+        parser.add_argument(
+            f'--{option}', type=int, default=getattr(defaults, option)
+        )
+    parser.add_argument('--seed', type=int, default=defaults.seed)
+    parser.add_argument('--output', type=Path, default=Path('loadtest.json'))
+    parser.add_argument(
+        '--compare', type=Path, help='Earlier result file to compare with'
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    with tempfile.TemporaryDirectory() as tmp:
+        config = LoadTestConfig(
+            database_url=args.database_url
+            or f'sqlite+aiosqlite:///{Path(tmp) / "loadtest.db"}',
+            scenarios=tuple(args.scenario or SCENARIOS),
+            operations=args.operations,
+            warmup=args.warmup,
+            concurrency=args.concurrency,
+            guests=args.guests,
+            items=args.items,
+            seed=args.seed,
+        )
+        result = asyncio.run(run_loadtest(config))
+
+    args.output.write_text(json.dumps(result, indent=2) + '\n')
+    for name, scenario in result['scenarios'].items():
+        print(
+            f'{name}: {scenario["requests"]} requests, '
+            f'{scenario["errors"]} errors, {scenario["throughput_rps"]} req/s'
+        )
+        for request, stats in scenario['by_request'].items():
+            latency = stats['latency_ms']
+            print(
+                f'  {request}: p50 {latency["p50"]}ms, '
+                f'p95 {latency["p95"]}ms, p99 {latency["p99"]}ms'
+            )
+    if args.compare:
+        baseline = json.loads(args.compare.read_text())
+        print('\n'.join(compare(baseline, result)))
+    print(f'Results written to {args.output}')
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,227 @@
+"""Timings of database paths on data sets too large for the unit tests.
+
+Run: `poetry run python -m benchmarks.queries --database-url
+postgresql+psycopg://...`
+
+Postgres only: what is measured (trigram indexes, row locks) does not
+exist on SQLite. ALL TABLES OF THAT DATABASE ARE DROPPED AND RECREATED
+before each benchmark: point it at a scratch database, never at real data.
+"""
+
+import argparse
+import asyncio
+import time
+from collections.abc import Awaitable, Callable
+
+import httpx
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    async_sessionmaker,
+    create_async_engine,
+)
+
+from backend.app import app
+from backend.cache import clear_caches
+from backend.database import get_session
+from backend.models import (
+    GiftItem,
+    User,
+    UserRole,
+    WeddingList,
+    table_registry,
+)
+from backend.security import create_access_token
+from benchmarks.loadtest import percentile
+
+TODOS = 100_000
+# One todo in this many has the searched word in its title
+TODO_MATCH_EVERY = 1000
+# Guests racing for the same gift in each round
+CONCURRENT_GUESTS = 200
+
+
+def _auth_headers(email: str) -> dict[str, str]:
+    return {'Authorization': f'Bearer {create_access_token({"sub": email})}'}
+
+
+def _latencies(timings: list[float]) -> str:
+    ordered = sorted(timings)
+    return (
+        f'p50 {percentile(ordered, 50) * 1000:.1f}ms, '
+        f'max {ordered[-1] * 1000:.1f}ms'
+    )
+
+
+async def todo_search(
+    session_maker: async_sessionmaker, client: httpx.AsyncClient, repeat: int
+) -> str:
+    """``GET /todos/?title=`` on one user's 100k todos."""
+    async with session_maker() as session:
+        # No login: the password is never checked
+        user = User(
+            username='benchmark', email='user@benchmark.example', password='!'
+        )
+        session.add(user)
+        await session.flush()
+        await session.execute(
+            text(
+                """INSERT INTO todos (title, description, state, user_id)
+                SELECT CASE WHEN n % :every = 0 THEN 'Comprar agulha ' || n
+                            ELSE 'Tarefa de rotina ' || n END,
+                       'descricao ' || md5(n::text), 'todo', :user_id
+                FROM generate_series(1, :todos) AS n"""
+            ),
+            {'user_id': user.id, 'todos': TODOS, 'every': TODO_MATCH_EVERY},
+        )
+        await session.commit()
+        await session.execute(text('ANALYZE todos'))
+        await session.commit()
+
+    headers = _auth_headers(user.email)
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        response = await client.get('/todos/?title=agulha', headers=headers)
+        timings.append(time.perf_counter() - start)
+        response.raise_for_status()
+    if len(response.json()['todos']) != TODOS // TODO_MATCH_EVERY:
+        raise AssertionError('title search returned the wrong todos')
+    return f'title search on {TODOS} todos: {_latencies(timings)}'
+
+
+async def contended_reservations(
+    session_maker: async_sessionmaker, client: httpx.AsyncClient, repeat: int
+) -> str:
+    """Every guest reserving the same gift at once, one gift per round."""
+    guests = [
+        User(
+            username=f'benchmark-guest-{n}',
+            email=f'guest{n}@benchmark.example',
+            password='!',
+            role=UserRole.CONVIDADO,
+        )
+        for n in range(CONCURRENT_GUESTS)
+    ]
+    couple = User(
+        username='benchmark-couple',
+        email='couple@benchmark.example',
+        password='!',
+    )
+    async with session_maker() as session:
+        session.add_all([couple, *guests])
+        await session.flush()
+        wl = WeddingList(
+            title='Benchmark',
+            message=None,
+            event_date=None,
+            shareable_link='benchmark',
+            owner_id=couple.id,
+        )
+        session.add(wl)
+        await session.flush()
+        items = [
+            GiftItem(
+                name=f'Presente {n}', description=None, wedding_list_id=wl.id
+            )
+            for n in range(repeat)
+        ]
+        session.add_all(items)
+        await session.commit()
+
+    headers = [_auth_headers(guest.email) for guest in guests]
+    timings = []
+    for item in items:
+        start = time.perf_counter()
+        responses = await asyncio.gather(
+            *(
+                client.post(f'/guest/items/{item.id}/reserve', headers=h)
+                for h in headers
+            )
+        )
+        timings.append(time.perf_counter() - start)
+        if sum(r.is_success for r in responses) != 1:
+            raise AssertionError(f'gift {item.id} did not have one winner')
+    throughput = CONCURRENT_GUESTS / percentile(sorted(timings), 50)
+    return (
+        f'{CONCURRENT_GUESTS} concurrent reservations of one gift: '
+        f'{_latencies(timings)} per round ({throughput:.0f} req/s)'
+    )
+
+
+BENCHMARKS: dict[
+    str,
+    Callable[[async_sessionmaker, httpx.AsyncClient, int], Awaitable[str]],
+] = {
+    'todo_search': todo_search,
+    'contended_reservations': contended_reservations,
+}
+
+
+async def _reset(engine: AsyncEngine):
+    async with engine.begin() as conn:
+        await conn.run_sync(table_registry.metadata.drop_all)
+        await conn.run_sync(table_registry.metadata.create_all)
+    clear_caches()
+
+
+async def run_benchmarks(
+    database_url: str, names: list[str], repeat: int
+) -> list[str]:
+    engine = create_async_engine(database_url)
+    session_maker = async_sessionmaker(engine, expire_on_commit=False)
+
+    async def get_session_override():
+        async with session_maker() as session:
+            yield session
+
+    results = []
+    app.dependency_overrides[get_session] = get_session_override
+    try:
+        async with (
+            app.router.lifespan_context(app),
+            httpx.AsyncClient(
+                transport=httpx.ASGITransport(app=app),
+                base_url='http://benchmark',
+            ) as client,
+        ):
+            for name in names:
+                await _reset(engine)
+                results.append(
+                    await BENCHMARKS[name](session_maker, client, repeat)
+                )
+    finally:
+        app.dependency_overrides.pop(get_session, None)
+        await engine.dispose()
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        '--database-url',
+        required=True,
+        help='Scratch Postgres database (all tables are dropped)',
+    )
+    parser.add_argument(
+        '--benchmark',
+        action='append',
+        choices=sorted(BENCHMARKS),
+        help='Repeat to run several; default: all',
+    )
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args(argv)
+    if make_url(args.database_url).get_backend_name() != 'postgresql':
+        parser.error('--database-url must be a Postgres database')
+
+    for line in asyncio.run(
+        run_benchmarks(
+            args.database_url, args.benchmark or list(BENCHMARKS), args.repeat
+        )
+    ):
+        print(line)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,148 @@
+"""Microbenchmark of the two JSON response paths.
+
+Run: `poetry run python -m benchmarks.serialization --items 10 100 500`
+
+Compares FastAPI's ``response_model`` handling (validate, dump to Python
+objects, ``json.dumps`` in ``JSONResponse``) with ``ModelResponse``, which
+renders the bytes with the cached pydantic-core serializer, for a list of
+ORM gift items (``WeddingListPublic``) and for the cached guest payload
+(a ``WeddingListPublicGuest`` instance).
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from dataclasses import dataclass
+from functools import cache
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+
+from backend.models import GiftItem, GiftStatus, WeddingList
+from backend.responses import ModelResponse
+from backend.schemas import WeddingListPublic, WeddingListPublicGuest
+
+DEFAULT_ITEMS = (10, 100, 500)
+
+
+@dataclass
+class PathTimings:
+    payload: str
+    items: int
+    fastapi_ms: float
+    fast_ms: float
+
+    @property
+    def speedup(self) -> float:
+        return self.fastapi_ms / self.fast_ms
+
+
+def build_list(items: int) -> WeddingList:
+    """Transient ORM list shaped like the ones the routers return."""
+    wl = WeddingList(
+        title='Benchmark',
+        message='Obrigado por celebrar com a gente!',
+        event_date=None,
+        shareable_link='benchmark',
+        owner_id=1,
+        delivery_info='Entregar no endereço dos noivos',
+    )
+    wl.id = 1
+    wl.items = []
+    for n in range(items):
+        item = GiftItem(
+            name=f'Presente {n}',
+            description=f'Descrição do presente {n}',
+            wedding_list_id=wl.id,
+            status=GiftStatus.reserved if n % 3 else GiftStatus.available,
+            reserved_by_id=n if n % 3 else None,
+        )
+        item.id = n + 1
+        wl.items.append(item)
+    return wl
+
+
+@cache
+def _response_field(schema):
+    # Built once per route by FastAPI
+    return create_model_field('Response', schema, mode='serialization')
+
+
+async def fastapi_body(schema, content) -> bytes:
+    serialized = await serialize_response(
+        field=_response_field(schema), response_content=content
+    )
+    return JSONResponse(serialized).body
+
+
+def fast_body(schema, content) -> bytes:
+    return ModelResponse(schema, content).body
+
+
+def _best_of(func, repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def compare_paths(items: int, repeat: int = 20) -> list[PathTimings]:
+    """Time both paths per payload; raise if their JSON differs."""
+    wl = build_list(items)
+    payloads = {
+        'WeddingListPublic (ORM)': (WeddingListPublic, wl),
+        'WeddingListPublicGuest (model)': (
+            WeddingListPublicGuest,
+            WeddingListPublicGuest.model_validate(wl),
+        ),
+    }
+    loop = asyncio.new_event_loop()
+    try:
+        results = []
+        for name, (schema, content) in payloads.items():
+            expected = loop.run_until_complete(fastapi_body(schema, content))
+            if json.loads(expected) != json.loads(fast_body(schema, content)):
+                raise AssertionError(f'{name}: the two paths disagree')
+            results.append(
+                PathTimings(
+                    payload=name,
+                    items=items,
+                    fastapi_ms=_best_of(
+                        lambda: loop.run_until_complete(
+                            fastapi_body(schema, content)
+                        ),
+                        repeat,
+                    ),
+                    fast_ms=_best_of(
+                        lambda: fast_body(schema, content), repeat
+                    ),
+                )
+            )
+        return results
+    finally:
+        loop.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        '--items', type=int, nargs='+', default=list(DEFAULT_ITEMS)
+    )
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args(argv)
+
+    for items in args.items:
+        for t in compare_paths(items, args.repeat):
+            print(
+                f'{t.payload}, {t.items} items: '
+                f'response_model {t.fastapi_ms:.3f}ms, '
+                f'ModelResponse {t.fast_ms:.3f}ms ({t.speedup:.1f}x)'
+            )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+"""unique_rsvp_per_guest
+
+Revision ID: 123606037395
+Revises: 3b7dca411ee4
+Create Date: 2026-10-18 17:40:26.522268
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '123606037395'
+down_revision: Union[str, Sequence[str], None] = '3b7dca411ee4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Keep only the most recent RSVP of each guest per list
+    op.execute(
+        'DELETE FROM rsvps WHERE id NOT IN ('
+        'SELECT max(id) FROM rsvps GROUP BY wedding_list_id, guest_id)'
+    )
+    with op.batch_alter_table('rsvps') as batch_op:
+        batch_op.create_unique_constraint(
+            'uq_rsvps_wedding_list_id_guest_id',
+            ['wedding_list_id', 'guest_id'],
+        )
+    # The unique constraint's index covers the same columns
+    op.drop_index(
+        'ix_rsvps_wedding_list_id_guest_id',
+        table_name='rsvps',
+        if_exists=True,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_index(
+        'ix_rsvps_wedding_list_id_guest_id',
+        'rsvps',
+        ['wedding_list_id', 'guest_id'],
+        unique=False,
+        if_not_exists=True,
+    )
+    with op.batch_alter_table('rsvps') as batch_op:
+        batch_op.drop_constraint(
+            'uq_rsvps_wedding_list_id_guest_id', type_='unique'
+        )
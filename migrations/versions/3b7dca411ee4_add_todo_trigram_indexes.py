@@ -0,0 +1,65 @@
+"""add_todo_trigram_indexes
+
+Revision ID: 3b7dca411ee4
+Revises: 63438e8b0554
+Create Date: 2026-10-18 18:21:47.530118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3b7dca411ee4'
+down_revision: Union[str, Sequence[str], None] = '63438e8b0554'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+TRGM_INDEXES = [
+    ('ix_todos_title_trgm', 'title'),
+    ('ix_todos_description_trgm', 'description'),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Trigram indexes only exist on Postgres with pg_trgm available; other
+    # setups keep filtering todos with a plain LIKE scan.
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        return
+    available = bind.scalar(
+        sa.text("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")
+    )
+    if not available:
+        return
+
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    with op.get_context().autocommit_block():
+        for name, column in TRGM_INDEXES:
+            op.create_index(
+                name,
+                'todos',
+                [column],
+                if_not_exists=True,
+                postgresql_using='gin',
+                postgresql_ops={column: 'gin_trgm_ops'},
+                postgresql_concurrently=True,
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    with op.get_context().autocommit_block():
+        for name, _ in TRGM_INDEXES:
+            op.drop_index(
+                name,
+                table_name='todos',
+                if_exists=True,
+                postgresql_concurrently=True,
+            )
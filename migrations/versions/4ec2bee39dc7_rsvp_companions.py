@@ -0,0 +1,92 @@
+"""rsvp_companions
+
+Revision ID: 4ec2bee39dc7
+Revises: 123606037395
+Create Date: 2026-10-18 17:45:48.592004
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4ec2bee39dc7'
+down_revision: Union[str, Sequence[str], None] = '123606037395'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+rsvps = sa.table(
+    'rsvps',
+    sa.column('id', sa.Integer),
+    sa.column('additional_guests', sa.String),
+)
+rsvp_companions = sa.table(
+    'rsvp_companions',
+    sa.column('id', sa.Integer),
+    sa.column('rsvp_id', sa.Integer),
+    sa.column('name', sa.String),
+)
+
+BATCH_SIZE = 1000
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('rsvp_companions',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('rsvp_id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(), nullable=False),
+    sa.ForeignKeyConstraint(['rsvp_id'], ['rsvps.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(
+        'ix_rsvp_companions_rsvp_id', 'rsvp_companions', ['rsvp_id']
+    )
+
+    # Split the comma-separated names into one row per companion
+    bind = op.get_bind()
+    result = bind.execute(
+        sa.select(rsvps.c.id, rsvps.c.additional_guests)
+        .where(rsvps.c.additional_guests.is_not(None))
+        .order_by(rsvps.c.id)
+    )
+    while batch := result.fetchmany(BATCH_SIZE):
+        companions = [
+            {'rsvp_id': rsvp_id, 'name': name.strip()}
+            for rsvp_id, names in batch
+            for name in names.split(',')
+            if name.strip()
+        ]
+        if companions:
+            op.bulk_insert(rsvp_companions, companions)
+
+    with op.batch_alter_table('rsvps') as batch_op:
+        batch_op.drop_column('additional_guests')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('rsvps') as batch_op:
+        batch_op.add_column(
+            sa.Column('additional_guests', sa.String(), nullable=True)
+        )
+
+    bind = op.get_bind()
+    names: dict[int, list[str]] = {}
+    for rsvp_id, name in bind.execute(
+        sa.select(rsvp_companions.c.rsvp_id, rsvp_companions.c.name)
+        .order_by(rsvp_companions.c.id)
+    ):
+        names.setdefault(rsvp_id, []).append(name)
+    for rsvp_id, rsvp_names in names.items():
+        bind.execute(
+            rsvps.update()
+            .where(rsvps.c.id == rsvp_id)
+            .values(additional_guests=', '.join(rsvp_names))
+        )
+
+    op.drop_index('ix_rsvp_companions_rsvp_id', table_name='rsvp_companions')
+    op.drop_table('rsvp_companions')
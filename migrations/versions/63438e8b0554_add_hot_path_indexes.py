@@ -0,0 +1,58 @@
+"""add_hot_path_indexes
+
+Revision ID: 63438e8b0554
+Revises: f7f442dd154e
+Create Date: 2026-10-18 17:40:12.104512
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '63438e8b0554'
+down_revision: Union[str, Sequence[str], None] = 'f7f442dd154e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (index name, table, columns) for the predicates used by the routers
+INDEXES = [
+    ('ix_wedding_lists_owner_id', 'wedding_lists', ['owner_id']),
+    ('ix_gift_items_wedding_list_id_status', 'gift_items', ['wedding_list_id', 'status']),
+    ('ix_rsvps_wedding_list_id_guest_id', 'rsvps', ['wedding_list_id', 'guest_id']),
+    ('ix_rsvps_guest_id', 'rsvps', ['guest_id']),
+    ('ix_reservations_gift_item_id_guest_id', 'reservations', ['gift_item_id', 'guest_id']),
+    ('ix_reservations_guest_id', 'reservations', ['guest_id']),
+    ('ix_todos_user_id_state', 'todos', ['user_id', 'state']),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction on Postgres;
+    # other dialects ignore the flag and build the index normally.
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(
+                name,
+                table,
+                columns,
+                unique=False,
+                if_not_exists=True,
+                postgresql_concurrently=True,
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(
+                name,
+                table_name=table,
+                if_exists=True,
+                postgresql_concurrently=True,
+            )
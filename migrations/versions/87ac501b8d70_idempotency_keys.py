@@ -0,0 +1,47 @@
+"""idempotency_keys
+
+Revision ID: 87ac501b8d70
+Revises: 4ec2bee39dc7
+Create Date: 2026-10-18 18:20:11.304512
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '87ac501b8d70'
+down_revision: Union[str, Sequence[str], None] = '4ec2bee39dc7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('idempotency_keys',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('key', sa.String(), nullable=False),
+    sa.Column('fingerprint', sa.String(), nullable=False),
+    sa.Column('expires_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('status_code', sa.Integer(), nullable=True),
+    sa.Column('response_body', sa.LargeBinary(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint(
+        'user_id', 'key', name='uq_idempotency_keys_user_id_key'
+    )
+    )
+    op.create_index(
+        'ix_idempotency_keys_expires_at', 'idempotency_keys', ['expires_at']
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(
+        'ix_idempotency_keys_expires_at', table_name='idempotency_keys'
+    )
+    op.drop_table('idempotency_keys')
@@ -9,28 +9,47 @@ from sqlalchemy import event
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from testcontainers.postgres import PostgresContainer
 
+from backend import security
 from backend.app import app
+from backend.cache import clear_caches
 from backend.database import get_session
 from backend.models import User, table_registry
 from backend.security import get_password_hash
 
+METRICS_TOKEN = 'metrics-token'
+
 
 @pytest.fixture
 def client(session):
     def get_session_override():
         return session
 
+    clear_caches()
+
     with TestClient(app) as client:
         app.dependency_overrides[get_session] = get_session_override
         yield client
 
     app.dependency_overrides.clear()
+    clear_caches()
+
+
+@pytest.fixture
+def metrics_headers(monkeypatch):
+    """Enable /metrics and /health/details; headers that pass their guard."""
+    monkeypatch.setattr(security.settings, 'METRICS_TOKEN', METRICS_TOKEN)
+    return {'Authorization': f'Bearer {METRICS_TOKEN}'}
 
 
 @pytest.fixture(scope='session')
 def engine():
     with PostgresContainer('postgres:17', driver='psycopg') as postgres:
-        yield create_async_engine(postgres.get_connection_url())
+        # The schema is recreated for every test, which invalidates the
+        # statements psycopg prepares on pooled connections
+        yield create_async_engine(
+            postgres.get_connection_url(),
+            connect_args={'prepare_threshold': None},
+        )
 
 
 @pytest_asyncio.fixture
@@ -65,6 +84,48 @@ def mock_db_time():
     return _mock_db_time
 
 
+@contextmanager
+def _capture_statements(engine):
+    statements = []
+
+    def capture(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine.sync_engine, 'before_cursor_execute', capture)
+    try:
+        yield statements
+    finally:
+        event.remove(engine.sync_engine, 'before_cursor_execute', capture)
+
+
+@pytest.fixture
+def capture_statements(engine):
+    """``with capture_statements() as statements:`` records the SQL run."""
+    return lambda: _capture_statements(engine)
+
+
+@pytest.fixture
+def query_budget(engine):
+    """``with query_budget(n):`` fails when the block runs more than ``n``
+    statements.
+
+    Caches are cleared first, so the budget covers a cold request (user
+    lookup included).
+    """
+
+    @contextmanager
+    def budget(max_queries):
+        clear_caches()
+        with _capture_statements(engine) as statements:
+            yield statements
+        assert len(statements) <= max_queries, (
+            f'{len(statements)} statements, budget is {max_queries}:\n'
+            + '\n'.join(statements)
+        )
+
+    return budget
+
+
 @pytest_asyncio.fixture
 async def user(session):
     password = 'testtest'
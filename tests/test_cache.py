@@ -0,0 +1,48 @@
+from backend.cache import TTLCache
+
+
+class FakeTimer:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_cache_hit_and_miss_counters():
+    cache = TTLCache('test-counters', maxsize=2, ttl=10)
+    cache.set('a', 1)
+
+    assert cache.get('a') == 1
+    assert cache.get('b') is None
+    assert cache.stats() == {'hits': 1, 'misses': 1, 'size': 1, 'maxsize': 2}
+
+
+def test_cache_entries_expire_after_ttl():
+    timer = FakeTimer()
+    cache = TTLCache('test-ttl', maxsize=2, ttl=10, timer=timer)
+    cache.set('a', 1)
+
+    timer.now = 10
+
+    assert cache.get('a') is None
+    assert len(cache) == 0
+
+
+def test_cache_evicts_least_recently_used():
+    cache = TTLCache('test-lru', maxsize=2, ttl=10)
+    cache.set('a', 'first')
+    cache.set('b', 'second')
+    cache.get('a')
+    cache.set('c', 'third')
+
+    assert cache.get('a') == 'first'
+    assert cache.get('b') is None
+    assert cache.get('c') == 'third'
+
+
+def test_cache_disabled_with_zero_ttl():
+    cache = TTLCache('test-disabled', maxsize=2, ttl=0)
+    cache.set('a', 1)
+
+    assert cache.get('a') is None
@@ -0,0 +1,181 @@
+import zlib
+from http import HTTPStatus
+
+import pytest
+import pytest_asyncio
+from fastapi.testclient import TestClient
+from starlette.responses import PlainTextResponse, StreamingResponse
+
+from backend.compression import (
+    CompressionMiddleware,
+    available_encoders,
+    negotiate,
+)
+from backend.models import GiftItem, WeddingList
+from backend.security import create_access_token
+from seed import DISTINCT_CATALOG
+from tests.conftest import UserFactory
+
+TYPICAL_LIST_ITEMS = 150
+# Real names and descriptions, from the seeded catalog
+CATALOG = [item for items in DISTINCT_CATALOG.values() for item in items]
+TYPICAL_LIST = CATALOG[:TYPICAL_LIST_ITEMS]
+
+
+@pytest.mark.parametrize(
+    ('accept_encoding', 'expected'),
+    [
+        ('gzip, deflate', 'gzip'),
+        ('br;q=0.9, gzip;q=0.8', 'gzip'),
+        ('*', 'gzip'),
+        ('gzip;q=0', None),
+        ('identity', None),
+        ('', None),
+        ('br, zstd', None),
+    ],
+)
+def test_negotiate(accept_encoding, expected):
+    assert negotiate(accept_encoding, ['gzip']) == expected
+
+
+def test_negotiate_prefers_server_order_on_ties():
+    assert negotiate('gzip, br', ['br', 'gzip']) == 'br'
+    assert negotiate('gzip, br;q=0.5', ['br', 'gzip']) == 'gzip'
+
+
+@pytest_asyncio.fixture
+async def typical_list(session):
+    couple = UserFactory()
+    session.add(couple)
+    await session.flush()
+    wl = WeddingList(
+        title='Casamento Ana & Bruno',
+        message='Obrigado por celebrar com a gente!',
+        event_date=None,
+        shareable_link='compressao',
+        owner_id=couple.id,
+    )
+    session.add(wl)
+    await session.flush()
+    session.add_all(
+        GiftItem(name=name, description=description, wedding_list_id=wl.id)
+        for name, description in TYPICAL_LIST
+    )
+    await session.commit()
+    return {
+        'Authorization': 'Bearer ' + create_access_token({'sub': couple.email})
+    }
+
+
+def test_typical_list_is_gzipped(client, typical_list):
+    def get(encoding):
+        return client.get(
+            '/lists/my-lists',
+            headers={**typical_list, 'Accept-Encoding': encoding},
+        )
+
+    plain, gzipped = get('identity'), get('gzip')
+
+    assert 'content-encoding' not in plain.headers
+    assert gzipped.headers['content-encoding'] == 'gzip'
+    assert gzipped.headers['vary'] == 'Accept-Encoding'
+    assert gzipped.json() == plain.json()
+    assert gzipped.num_bytes_downloaded < plain.num_bytes_downloaded / 2
+
+
+def test_small_responses_are_not_compressed(client):
+    response = client.get('/health/', headers={'Accept-Encoding': 'gzip'})
+
+    assert response.status_code == HTTPStatus.OK
+    assert 'content-encoding' not in response.headers
+
+
+def _streaming_app(chunks, media_type):
+    async def body():
+        for chunk in chunks:
+            yield chunk
+
+    async def app(scope, receive, send):
+        await StreamingResponse(body(), media_type=media_type)(
+            scope, receive, send
+        )
+
+    return CompressionMiddleware(app, minimum_size=1)
+
+
+@pytest.mark.asyncio
+async def test_streamed_chunks_are_decodable_one_by_one():
+    chunks = [b'kind,id\n', b'gift,1\n' * 100, b'gift,2\n']
+    sent = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': b''}
+
+    async def send(message):
+        sent.append(message)
+
+    app = _streaming_app(chunks, 'text/csv')
+    scope = {
+        # ASGI 2.4 servers report disconnects on send; Starlette then
+        # does not poll receive() while streaming
+        'asgi': {'spec_version': '2.4'},
+        'type': 'http',
+        'method': 'GET',
+        'path': '/',
+        'headers': [(b'accept-encoding', b'gzip')],
+    }
+    await app(scope, receive, send)
+
+    start, *bodies = sent
+    headers = dict(start['headers'])
+    assert headers[b'content-encoding'] == b'gzip'
+    assert b'content-length' not in headers
+    decoder = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    decoded = [decoder.decompress(m['body']) for m in bodies]
+    assert decoded[: len(chunks)] == chunks
+
+
+def test_event_streams_are_not_compressed():
+    client = TestClient(_streaming_app([b'data: 1\n\n'], 'text/event-stream'))
+
+    response = client.get('/', headers={'Accept-Encoding': 'gzip'})
+
+    assert 'content-encoding' not in response.headers
+    assert response.text == 'data: 1\n\n'
+
+
+def test_existing_encoding_is_kept():
+    body = 'x' * 2048
+
+    async def app(scope, receive, send):
+        response = PlainTextResponse(
+            body, headers={'Content-Encoding': 'identity'}
+        )
+        await response(scope, receive, send)
+
+    client = TestClient(CompressionMiddleware(app))
+
+    response = client.get('/', headers={'Accept-Encoding': 'gzip'})
+
+    assert response.headers['content-encoding'] == 'identity'
+    assert response.num_bytes_downloaded == len(body)
+
+
+def test_compressed_etag_is_weak():
+    body = 'x' * 2048
+
+    async def app(scope, receive, send):
+        response = PlainTextResponse(body, headers={'ETag': '"v1"'})
+        await response(scope, receive, send)
+
+    client = TestClient(CompressionMiddleware(app))
+
+    gzipped = client.get('/', headers={'Accept-Encoding': 'gzip'})
+    plain = client.get('/', headers={'Accept-Encoding': 'identity'})
+
+    assert gzipped.headers['etag'] == 'W/"v1"'
+    assert plain.headers['etag'] == '"v1"'
+
+
+def test_gzip_is_always_available():
+    assert 'gzip' in available_encoders()
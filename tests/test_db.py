@@ -1,9 +1,35 @@
 from dataclasses import asdict
+from http import HTTPStatus
+from types import SimpleNamespace
 
 import pytest
-from sqlalchemy import select
+from sqlalchemy import event, exc, select, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
 
-from backend.models import Todo, User
+from backend import database
+from backend.database import (
+    ReadReplica,
+    build_engine,
+    measure_replica_lag,
+    pool_stats,
+)
+from backend.models import (
+    GiftItem,
+    Reservation,
+    Rsvp,
+    Todo,
+    TodoState,
+    User,
+    UserRole,
+    WeddingList,
+    table_registry,
+)
+from backend.public_lists import invalidate_public_list, public_list_cache
+from backend.security import create_access_token
+from backend.settings import Settings
+from tests.conftest import UserFactory
 
 
 @pytest.mark.asyncio
@@ -70,3 +96,255 @@ async def test_user_todo_relationship(session, user: User):
     user = await session.scalar(select(User).where(User.id == user.id))
 
     assert user.todos == [todo]
+
+
+async def _seed_hot_path_dataset(session):
+    # Enough rows per table that the planner prefers indexes over seq scans
+    statements = [
+        """INSERT INTO users (username, password, email, role)
+        SELECT 'u' || n, 'x', 'u' || n || '@test.com',
+               CASE WHEN n % 2 = 0 THEN 'CASAL' ELSE 'CONVIDADO' END::userrole
+        FROM generate_series(1, 5000) AS n""",
+        """INSERT INTO wedding_lists (title, shareable_link, owner_id)
+        SELECT 'list ' || n, 'link-' || n, n
+        FROM generate_series(1, 5000) AS n""",
+        """INSERT INTO gift_items (name, wedding_list_id, status)
+        SELECT 'gift ' || n, n % 5000 + 1, 'available'::giftstatus
+        FROM generate_series(1, 100000) AS n""",
+        """INSERT INTO rsvps (wedding_list_id, guest_id, status)
+        SELECT n % 5000 + 1, n % 4999 + 1, 'confirmed'::rsvpstatus
+        FROM generate_series(1, 50000) AS n""",
+        """INSERT INTO reservations (gift_item_id, guest_id)
+        SELECT n, n % 4999 + 1 FROM generate_series(1, 50000) AS n""",
+        """INSERT INTO todos (title, description, state, user_id)
+        SELECT 'todo ' || n, 'desc', 'todo'::todostate, n % 5000 + 1
+        FROM generate_series(1, 100000) AS n""",
+    ]
+    for statement in statements:
+        await session.execute(text(statement))
+    await session.commit()
+    for table in table_registry.metadata.sorted_tables:
+        await session.execute(text(f'ANALYZE {table.name}'))
+
+
+def _plan_nodes(plan):
+    yield plan
+    for child in plan.get('Plans', []):
+        yield from _plan_nodes(child)
+
+
+SAMPLE_ID = 42
+
+HOT_QUERIES = {
+    'my_lists': select(WeddingList).where(WeddingList.owner_id == SAMPLE_ID),
+    'list_items': select(GiftItem).where(
+        GiftItem.wedding_list_id.in_([SAMPLE_ID])
+    ),
+    'guest_reservations': select(Reservation).where(
+        Reservation.gift_item_id.in_([SAMPLE_ID, SAMPLE_ID + 1]),
+        Reservation.guest_id == SAMPLE_ID,
+    ),
+    'guest_rsvp': select(Rsvp).where(
+        Rsvp.wedding_list_id == SAMPLE_ID, Rsvp.guest_id == SAMPLE_ID
+    ),
+    'my_rsvps': select(Rsvp).where(Rsvp.guest_id == SAMPLE_ID),
+    'my_reservations': select(Reservation).where(
+        Reservation.guest_id == SAMPLE_ID
+    ),
+    'todos_by_state': select(Todo).where(
+        Todo.user_id == SAMPLE_ID, Todo.state == TodoState.done
+    ),
+}
+
+
+@pytest.mark.asyncio
+async def test_hot_queries_use_indexes(session):
+    await _seed_hot_path_dataset(session)
+
+    for name, query in HOT_QUERIES.items():
+        sql = query.compile(
+            dialect=postgresql.dialect(),
+            compile_kwargs={'literal_binds': True},
+        )
+        plan = await session.scalar(text(f'EXPLAIN (FORMAT JSON) {sql}'))
+        node_types = {
+            node['Node Type'] for node in _plan_nodes(plan[0]['Plan'])
+        }
+
+        assert 'Seq Scan' not in node_types, (name, node_types)
+        assert node_types & {
+            'Index Scan',
+            'Index Only Scan',
+            'Bitmap Index Scan',
+        }, (name, node_types)
+
+
+@pytest.mark.asyncio
+async def test_pool_settings_and_stats(engine):
+    pool_timeout = 0.2
+    pooled = build_engine(
+        Settings(
+            DATABASE_URL=engine.url.render_as_string(hide_password=False),
+            DB_POOL_SIZE=1,
+            DB_MAX_OVERFLOW=0,
+            DB_POOL_TIMEOUT=pool_timeout,
+            DB_POOL_PRE_PING=False,
+        )
+    )
+    try:
+        async with pooled.connect():
+            busy = pool_stats(pooled)
+            with pytest.raises(exc.TimeoutError):
+                async with pooled.connect():
+                    pass
+        stats = pool_stats(pooled)
+    finally:
+        await pooled.dispose()
+
+    assert busy['checked_out'] == 1
+    assert busy['size'] == 1
+    assert stats['checked_out'] == 0
+    assert stats['max_overflow'] == 0
+    assert stats['timeouts'] == 1
+    assert stats['checkouts'] == busy['checkouts'] + 1
+    assert stats['wait_seconds_max'] >= pool_timeout
+    assert pooled.pool._pre_ping is False
+
+
+def test_health_is_minimal(client):
+    response = client.get('/health/')
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json() == {'status': 'ok'}
+    assert client.get('/health/details').status_code == HTTPStatus.NOT_FOUND
+
+
+def test_health_details_report_pool(client, metrics_headers):
+    response = client.get('/health/details', headers=metrics_headers)
+
+    assert response.status_code == HTTPStatus.OK
+    assert {'checked_out', 'overflow', 'wait_seconds_max'} <= set(
+        response.json()['db_pool']
+    )
+    assert response.json()['db_replica'] is None
+    assert client.get('/health/details').status_code == (
+        HTTPStatus.UNAUTHORIZED
+    )
+
+
+@pytest.fixture
+def replica(engine, monkeypatch):
+    """A replica on a second engine to the test database, whose reported
+    lag is ``replica.lag.seconds``."""
+    # No pool: connections are not tied to one test's event loop
+    replica_engine = create_async_engine(
+        engine.url.render_as_string(hide_password=False), poolclass=NullPool
+    )
+    statements = []
+    event.listen(
+        replica_engine.sync_engine,
+        'before_cursor_execute',
+        lambda conn, cursor, statement, *_: statements.append(statement),
+    )
+    lag = SimpleNamespace(seconds=0.0)
+
+    async def measure_lag(bind):
+        if isinstance(lag.seconds, Exception):
+            raise lag.seconds
+        return lag.seconds
+
+    read_replica = ReadReplica(
+        replica_engine, max_lag=5, check_interval=0, measure_lag=measure_lag
+    )
+    monkeypatch.setattr(database, 'replica', read_replica)
+    return SimpleNamespace(
+        replica=read_replica, lag=lag, statements=statements
+    )
+
+
+def test_reads_use_replica_while_it_keeps_up(
+    client, user, replica, metrics_headers
+):
+    response = client.get('/users/')
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()['users'][0]['id'] == user.id
+    assert replica.replica.reads == 1
+    assert replica.statements
+
+    replica.statements.clear()
+    replica.lag.seconds = 10.0
+    response = client.get('/users/')
+
+    assert response.status_code == HTTPStatus.OK
+    assert replica.replica.fallbacks == 1
+    assert not replica.statements
+    health = client.get('/health/details', headers=metrics_headers).json()[
+        'db_replica'
+    ]
+    assert health['healthy'] is False
+    assert health['lag_seconds'] == replica.lag.seconds
+
+
+def test_failed_lag_check_falls_back_to_primary(client, user, replica):
+    replica.lag.seconds = OSError('replica unreachable')
+
+    response = client.get('/users/')
+
+    assert response.status_code == HTTPStatus.OK
+    assert replica.replica.fallbacks == 1
+    assert replica.replica.lag is None
+    assert not replica.statements
+
+
+def test_writers_read_their_writes_from_primary(client, token, replica):
+    headers = {'Authorization': f'Bearer {token}'}
+    client.post('/auth/refresh_token', headers=headers)
+
+    client.get('/users/', headers=headers)
+    client.get('/users/')
+
+    assert replica.replica.fallbacks == 1
+    assert replica.replica.reads == 1
+
+
+@pytest.mark.asyncio
+async def test_replica_reads_fill_public_list_cache(client, session, replica):
+    couple = UserFactory()
+    guest = UserFactory(role=UserRole.CONVIDADO)
+    session.add_all([couple, guest])
+    await session.flush()
+    wl = WeddingList(
+        title='Lista',
+        message=None,
+        event_date=None,
+        shareable_link='replica',
+        owner_id=couple.id,
+    )
+    session.add(wl)
+    await session.commit()
+    headers = {
+        'Authorization': 'Bearer ' + create_access_token({'sub': guest.email})
+    }
+
+    client.get('/guest/lists/replica', headers=headers)
+    assert [s for s in replica.statements if 'wedding_lists' in s]
+
+    replica.statements.clear()
+    response = client.get('/guest/lists/replica', headers=headers)
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()['title'] == 'Lista'
+    assert not [s for s in replica.statements if 'wedding_lists' in s]
+
+    # The replica may not have the write behind an invalidation yet
+    invalidate_public_list(wl.id)
+    response = client.get('/guest/lists/replica', headers=headers)
+
+    assert response.status_code == HTTPStatus.OK
+    assert public_list_cache.get('replica') is None
+
+
+@pytest.mark.asyncio
+async def test_measure_replica_lag_of_a_primary(replica):
+    assert await measure_replica_lag(replica.replica.engine) == 0.0
@@ -0,0 +1,295 @@
+import asyncio
+import json
+from http import HTTPStatus
+
+import psycopg
+import pytest
+import pytest_asyncio
+from httpx import ASGITransport, AsyncClient
+
+from backend import events
+from backend.app import app
+from backend.database import get_session
+from backend.events import (
+    NOTIFY_CHANNEL,
+    GiftEventBroker,
+    PostgresGiftEventBroker,
+    broker,
+)
+from backend.models import (
+    Category,
+    GiftItem,
+    TemplateGiftItem,
+    UserRole,
+    WeddingList,
+)
+from backend.security import create_access_token
+from tests.conftest import UserFactory
+
+STREAM_TIMEOUT = 5
+
+
+class _SSEClient:
+    """Drive a streaming request through the ASGI app message by message.
+
+    The test transports buffer the whole body, which never ends for SSE.
+    """
+
+    def __init__(self, path: str, token: str):
+        self.scope = {
+            'type': 'http',
+            'asgi': {'version': '3.0'},
+            'http_version': '1.1',
+            'method': 'GET',
+            'scheme': 'http',
+            'path': path,
+            'raw_path': path.encode(),
+            'query_string': b'',
+            'root_path': '',
+            'headers': [(b'authorization', f'Bearer {token}'.encode())],
+            'client': ('testclient', 50000),
+            'server': ('test', 80),
+        }
+        self.messages = asyncio.Queue()
+        self._disconnected = asyncio.Event()
+        self._requested = False
+
+    async def _receive(self):
+        if not self._requested:
+            self._requested = True
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+        await self._disconnected.wait()
+        return {'type': 'http.disconnect'}
+
+    async def __aenter__(self):
+        self.task = asyncio.create_task(
+            app(self.scope, self._receive, self.messages.put)
+        )
+        start = await self.next_message()
+        self.status = start['status']
+        self.headers = dict(start['headers'])
+        return self
+
+    async def __aexit__(self, *exc):
+        self._disconnected.set()
+        await asyncio.wait_for(self.task, STREAM_TIMEOUT)
+
+    async def next_message(self):
+        return await asyncio.wait_for(self.messages.get(), STREAM_TIMEOUT)
+
+    async def next_chunk(self) -> str:
+        return (await self.next_message())['body'].decode()
+
+
+@pytest_asyncio.fixture
+async def shared_list(session):
+    couple = UserFactory()
+    guest = UserFactory(role=UserRole.CONVIDADO)
+    session.add_all([couple, guest])
+    await session.commit()
+    wl = WeddingList(
+        title='Ao vivo',
+        message=None,
+        event_date=None,
+        shareable_link='live-link',
+        owner_id=couple.id,
+    )
+    session.add(wl)
+    await session.commit()
+    item = GiftItem(name='Torradeira', description=None, wedding_list_id=wl.id)
+    session.add(item)
+    await session.commit()
+
+    app.dependency_overrides[get_session] = lambda: session
+    yield couple, guest, wl, item
+    app.dependency_overrides.clear()
+
+
+@pytest.mark.asyncio
+async def test_list_events_stream_reservation_deltas(shared_list):
+    couple, guest, wl, item = shared_list
+    guest_token = create_access_token({'sub': guest.email})
+    couple_token = create_access_token({'sub': couple.email})
+
+    async with (
+        _SSEClient('/guest/lists/live-link/events', guest_token) as stream,
+        AsyncClient(
+            transport=ASGITransport(app=app), base_url='http://test'
+        ) as ac,
+    ):
+        assert stream.status == HTTPStatus.OK
+        assert stream.headers[b'content-type'].startswith(b'text/event-stream')
+        assert await stream.next_chunk() == ': connected\n\n'
+        assert broker.subscriber_count(wl.id) == 1
+
+        reserve = await ac.post(
+            f'/guest/items/{item.id}/reserve',
+            headers={'Authorization': f'Bearer {guest_token}'},
+        )
+        assert reserve.status_code == HTTPStatus.CREATED
+        assert await stream.next_chunk() == (
+            'event: item\n'
+            f'data: {{"id": {item.id}, "status": "reserved", '
+            f'"reserved_by_id": {guest.id}}}\n\n'
+        )
+
+        await ac.delete(
+            f'/guest/reservations/{reserve.json()["id"]}',
+            headers={'Authorization': f'Bearer {guest_token}'},
+        )
+        assert '"status": "available"' in await stream.next_chunk()
+
+        await ac.delete(
+            f'/lists/{wl.id}/items/{item.id}',
+            headers={'Authorization': f'Bearer {couple_token}'},
+        )
+        assert await stream.next_chunk() == (
+            f'event: item_deleted\ndata: {{"id": {item.id}}}\n\n'
+        )
+
+    assert broker.subscriber_count(wl.id) == 0
+
+
+@pytest.mark.asyncio
+async def test_bulk_item_writes_reset_streams(session, shared_list):
+    couple, _, wl, item = shared_list
+    category = Category(name='Cozinha')
+    session.add(category)
+    await session.flush()
+    session.add(
+        TemplateGiftItem(
+            name='Panela', description=None, category_id=category.id
+        )
+    )
+    await session.commit()
+    headers = {
+        'Authorization': f'Bearer {create_access_token({"sub": couple.email})}'
+    }
+
+    async with (
+        broker.subscribe(wl.id) as queue,
+        AsyncClient(
+            transport=ASGITransport(app=app), base_url='http://test'
+        ) as ac,
+    ):
+        await ac.post(
+            f'/lists/{wl.id}/items/batch',
+            json={'update': [{'id': item.id, 'name': 'Chaleira'}]},
+            headers=headers,
+        )
+        after_batch = queue.get_nowait()
+        await ac.post(
+            f'/lists/{wl.id}/items/from-templates',
+            json={'category_ids': [category.id]},
+            headers=headers,
+        )
+        after_templates = queue.get_nowait()
+
+    assert after_batch == after_templates == ('reset', {})
+
+
+@pytest.mark.asyncio
+async def test_list_events_only_for_guests(shared_list):
+    couple, *_ = shared_list
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url='http://test'
+    ) as ac:
+        response = await ac.get(
+            '/guest/lists/live-link/events',
+            headers={
+                'Authorization': 'Bearer '
+                + create_access_token({'sub': couple.email})
+            },
+        )
+
+    assert response.status_code == HTTPStatus.FORBIDDEN
+
+
+@pytest.mark.asyncio
+async def test_broker_resets_slow_subscriber():
+    queue_size = 2
+    local = GiftEventBroker(queue_size=queue_size)
+
+    async with local.subscribe(1) as queue:
+        for item_id in range(queue_size + 1):
+            await local.publish(1, 'item', {'id': item_id})
+        await local.publish(2, 'item', {'id': 99})
+
+        assert queue.qsize() == 1
+        assert queue.get_nowait() == ('reset', {})
+
+    assert local.subscriber_count() == 0
+
+
+@pytest.mark.asyncio
+async def test_postgres_broker_relays_between_workers(engine):
+    conninfo = engine.url.set(drivername='postgresql').render_as_string(
+        hide_password=False
+    )
+    publisher = PostgresGiftEventBroker(conninfo, queue_size=10)
+    listener = PostgresGiftEventBroker(conninfo, queue_size=10)
+    await listener.start()
+    try:
+        async with listener.subscribe(7) as queue:
+            # Wait for the LISTEN to be issued before publishing
+            for _ in range(50):
+                await publisher.publish(7, 'item', {'id': 1})
+                try:
+                    message = await asyncio.wait_for(queue.get(), 0.1)
+                    break
+                except TimeoutError:
+                    continue
+        assert message == ('item', {'id': 1})
+    finally:
+        await listener.stop()
+        await publisher.stop()
+
+
+@pytest.mark.asyncio
+async def test_postgres_listener_survives_failures(engine, monkeypatch):
+    conninfo = engine.url.set(drivername='postgresql').render_as_string(
+        hide_password=False
+    )
+    connect = psycopg.AsyncConnection.connect
+    failures = [RuntimeError('not a psycopg error')]
+
+    async def flaky_connect(*args, **kwargs):
+        if failures:
+            raise failures.pop()
+        return await connect(*args, **kwargs)
+
+    monkeypatch.setattr(events, 'RECONNECT_DELAY_SECONDS', 0)
+    monkeypatch.setattr(psycopg.AsyncConnection, 'connect', flaky_connect)
+    listener = PostgresGiftEventBroker(conninfo, queue_size=10)
+    received = []
+    async with (
+        listener.subscribe(7) as queue,
+        await connect(conninfo, autocommit=True) as notifier,
+    ):
+        await listener.start()
+        try:
+            for _ in range(50):
+                for payload in (
+                    'not json',
+                    json.dumps({'list_id': 7, 'event': 'item'}),
+                    json.dumps({
+                        'list_id': 7,
+                        'event': 'item',
+                        'data': {'id': 1},
+                    }),
+                ):
+                    await notifier.execute(
+                        'SELECT pg_notify(%s, %s)', (NOTIFY_CHANNEL, payload)
+                    )
+                try:
+                    received.append(await asyncio.wait_for(queue.get(), 0.1))
+                except TimeoutError:
+                    continue
+                if received[-1][0] == 'item':
+                    break
+        finally:
+            await listener.stop()
+
+    assert not failures
+    # Reconnected, then skipped the malformed notifications
+    assert received == [('reset', {}), ('item', {'id': 1})]
@@ -1,5 +1,23 @@
+import asyncio
 from http import HTTPStatus
+
 import pytest
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from backend.app import app
+from backend.database import get_session
+from backend.models import (
+    GiftItem,
+    Reservation,
+    Rsvp,
+    RsvpCompanion,
+    UserRole,
+    WeddingList,
+)
+from backend.security import create_access_token
+from tests.conftest import UserFactory
 
 
 @pytest.fixture
@@ -145,4 +163,230 @@ def test_rsvp_create_and_update(client, guest_token, list_with_item):
         params={'status': 'declined'},
     )
     assert r2.status_code == HTTPStatus.CREATED
+    assert r2.json()['id'] == r1.json()['id']
+    assert r2.json()['status'] == 'declined'
+
+
+def test_rsvp_companions_replaced(client, guest_token, list_with_item):
+    wl, _ = list_with_item
+    url = f"/guest/lists/{wl['id']}/rsvp"
+    headers = {'Authorization': f'Bearer {guest_token}'}
+
+    first = client.post(
+        url,
+        headers=headers,
+        json={'status': 'confirmed', 'companions': ['Ana', ' Bia ']},
+    )
+    assert [c['name'] for c in first.json()['companions']] == ['Ana', 'Bia']
+    assert first.json()['additional_guests'] == 'Ana, Bia'
+
+    # Comma-separated string sent by older clients
+    second = client.post(
+        url,
+        headers=headers,
+        json={'status': 'confirmed', 'additional_guests': 'Caio, , Duda'},
+    )
+    companions = second.json()['companions']
+    # Replaced, not appended to
+    assert [c['name'] for c in companions] == ['Caio', 'Duda']
+
+    cleared = client.post(url, headers=headers, json={'status': 'declined'})
+    assert cleared.json()['companions'] == []
+    assert cleared.json()['additional_guests'] is None
+
+    invalid = client.post(
+        url, headers=headers, json={'status': 'confirmed', 'companions': 'x'}
+    )
+    assert invalid.status_code == HTTPStatus.BAD_REQUEST
+
+
+def test_rsvp_unknown_list(client, guest_token):
+    response = client.post(
+        '/guest/lists/999/rsvp',
+        headers={'Authorization': f'Bearer {guest_token}'},
+        json={'status': 'confirmed'},
+    )
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+@pytest.fixture
+def other_guest_token(client):
+    client.post(
+        '/users/',
+        json={
+            'username': 'otherguest',
+            'email': 'otherguest@example.com',
+            'password': 'guestpass',
+            'role': 'CONVIDADO',
+        },
+    )
+    resp = client.post(
+        '/auth/token',
+        data={'username': 'otherguest@example.com', 'password': 'guestpass'},
+    )
+    return resp.json()['access_token']
+
+
+def test_public_list_reflects_reservation_per_guest(
+    client, wedding_list, guest_token, other_guest_token
+):
+    link = wedding_list['shareable_link']
+    item_id = wedding_list['items'][0]['id']
+    # warm the shared cache before the reservation
+    client.get(
+        f'/guest/lists/{link}',
+        headers={'Authorization': f'Bearer {other_guest_token}'},
+    )
+    reservation = client.post(
+        f'/guest/items/{item_id}/reserve',
+        headers={'Authorization': f'Bearer {guest_token}'},
+    ).json()
+
+    mine = client.get(
+        f'/guest/lists/{link}',
+        headers={'Authorization': f'Bearer {guest_token}'},
+    ).json()['items'][0]
+    theirs = client.get(
+        f'/guest/lists/{link}',
+        headers={'Authorization': f'Bearer {other_guest_token}'},
+    ).json()['items'][0]
+
+    assert mine['status'] == theirs['status'] == 'reserved'
+    assert mine['my_reservation_id'] == reservation['id']
+    assert theirs['my_reservation_id'] is None
+
+
+def test_public_list_refreshed_after_item_update(
+    client, wedding_list, guest_token, casal_token
+):
+    link = wedding_list['shareable_link']
+    item_id = wedding_list['items'][0]['id']
+    client.get(
+        f'/guest/lists/{link}',
+        headers={'Authorization': f'Bearer {guest_token}'},
+    )
+
+    client.put(
+        f"/lists/{wedding_list['id']}/items/{item_id}",
+        json={'name': 'Panela de pressão'},
+        headers={'Authorization': f'Bearer {casal_token}'},
+    )
+    response = client.get(
+        f'/guest/lists/{link}',
+        headers={'Authorization': f'Bearer {guest_token}'},
+    )
+
+    assert response.json()['items'][0]['name'] == 'Panela de pressão'
+
 
+@pytest.mark.asyncio
+async def test_concurrent_reservations_have_single_winner(session, engine):
+    concurrent_guests = 200
+    couple = UserFactory()
+    guests = UserFactory.create_batch(
+        concurrent_guests, role=UserRole.CONVIDADO
+    )
+    session.add_all([couple, *guests])
+    await session.commit()
+    wl = WeddingList(
+        title='Stress',
+        message=None,
+        event_date=None,
+        shareable_link='stress-link',
+        owner_id=couple.id,
+    )
+    session.add(wl)
+    await session.commit()
+    item = GiftItem(name='Geladeira', description=None, wedding_list_id=wl.id)
+    session.add(item)
+    await session.commit()
+
+    session_maker = async_sessionmaker(engine, expire_on_commit=False)
+
+    async def get_session_override():
+        async with session_maker() as request_session:
+            yield request_session
+
+    app.dependency_overrides[get_session] = get_session_override
+    transport = ASGITransport(app=app)
+    try:
+        async with AsyncClient(
+            transport=transport, base_url='http://test'
+        ) as ac:
+            responses = await asyncio.gather(*(
+                ac.post(
+                    f'/guest/items/{item.id}/reserve',
+                    headers={
+                        'Authorization': 'Bearer '
+                        + create_access_token({'sub': guest.email})
+                    },
+                )
+                for guest in guests
+            ))
+    finally:
+        app.dependency_overrides.clear()
+        # The pooled connections belong to this test's event loop
+        await engine.dispose()
+
+    statuses = [r.status_code for r in responses]
+    assert statuses.count(HTTPStatus.CREATED) == 1
+    assert statuses.count(HTTPStatus.CONFLICT) == concurrent_guests - 1
+    reservations = await session.scalar(
+        select(func.count()).select_from(Reservation)
+    )
+    assert reservations == 1
+
+
+@pytest.mark.asyncio
+async def test_concurrent_rsvps_keep_single_row(session, engine):
+    submissions = 20
+    couple = UserFactory()
+    guest = UserFactory(role=UserRole.CONVIDADO)
+    session.add_all([couple, guest])
+    await session.commit()
+    wl = WeddingList(
+        title='Double tap',
+        message=None,
+        event_date=None,
+        shareable_link='double-tap',
+        owner_id=couple.id,
+    )
+    session.add(wl)
+    await session.commit()
+
+    session_maker = async_sessionmaker(engine, expire_on_commit=False)
+
+    async def get_session_override():
+        async with session_maker() as request_session:
+            yield request_session
+
+    app.dependency_overrides[get_session] = get_session_override
+    headers = {
+        'Authorization': 'Bearer ' + create_access_token({'sub': guest.email})
+    }
+    try:
+        async with AsyncClient(
+            transport=ASGITransport(app=app), base_url='http://test'
+        ) as ac:
+            responses = await asyncio.gather(*(
+                ac.post(
+                    f'/guest/lists/{wl.id}/rsvp',
+                    headers=headers,
+                    json={'status': 'confirmed', 'companions': ['Ana']},
+                )
+                for _ in range(submissions)
+            ))
+    finally:
+        app.dependency_overrides.clear()
+        await engine.dispose()
+
+    assert {r.status_code for r in responses} == {HTTPStatus.CREATED}
+    assert len({r.json()['id'] for r in responses}) == 1
+    rsvps = await session.scalar(
+        select(func.count()).select_from(Rsvp).where(Rsvp.guest_id == guest.id)
+    )
+    assert rsvps == 1
+    companions = await session.scalar(
+        select(func.count()).select_from(RsvpCompanion)
+    )
+    assert companions == 1
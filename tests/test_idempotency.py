@@ -0,0 +1,196 @@
+import asyncio
+from datetime import datetime, timedelta
+from http import HTTPStatus
+from types import SimpleNamespace
+from zoneinfo import ZoneInfo
+
+import pytest
+import pytest_asyncio
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from backend.app import app
+from backend.cache import clear_caches
+from backend.database import get_session
+from backend.idempotency import REPLAYED_HEADER, purge_expired_keys
+from backend.models import (
+    GiftItem,
+    IdempotencyKey,
+    Reservation,
+    UserRole,
+    WeddingList,
+)
+from backend.security import create_access_token
+from tests.conftest import UserFactory
+
+
+@pytest_asyncio.fixture
+async def guest_list(session):
+    couple = UserFactory()
+    guest = UserFactory(role=UserRole.CONVIDADO)
+    session.add_all([couple, guest])
+    await session.flush()
+    wl = WeddingList(
+        title='Lista',
+        message=None,
+        event_date=None,
+        shareable_link='idempotente',
+        owner_id=couple.id,
+    )
+    session.add(wl)
+    await session.flush()
+    items = [
+        GiftItem(name=name, description=None, wedding_list_id=wl.id)
+        for name in ('Panela', 'Torradeira')
+    ]
+    session.add_all(items)
+    await session.commit()
+    return SimpleNamespace(
+        guest=guest,
+        list=wl,
+        items=items,
+        headers={
+            'Authorization': 'Bearer '
+            + create_access_token({'sub': guest.email})
+        },
+    )
+
+
+def _reserve(client, data, item, key):
+    return client.post(
+        f'/guest/items/{item.id}/reserve',
+        headers={**data.headers, 'Idempotency-Key': key},
+    )
+
+
+async def _count(session, model):
+    return await session.scalar(select(func.count()).select_from(model))
+
+
+@pytest.mark.asyncio
+async def test_retried_reservation_is_replayed(client, session, guest_list):
+    item = guest_list.items[0]
+
+    first = _reserve(client, guest_list, item, 'reserve-1')
+    retry = _reserve(client, guest_list, item, 'reserve-1')
+    clear_caches()
+    # Served from the table once the in-process copy is gone
+    late_retry = _reserve(client, guest_list, item, 'reserve-1')
+
+    assert first.status_code == HTTPStatus.CREATED
+    assert REPLAYED_HEADER not in first.headers
+    for response in (retry, late_retry):
+        assert response.status_code == HTTPStatus.CREATED
+        assert response.headers[REPLAYED_HEADER] == 'true'
+        assert response.json() == first.json()
+    assert await _count(session, Reservation) == 1
+
+
+@pytest.mark.asyncio
+async def test_key_reused_for_another_request(client, session, guest_list):
+    first, other = guest_list.items
+
+    _reserve(client, guest_list, first, 'reused')
+    response = _reserve(client, guest_list, other, 'reused')
+
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+    assert await _count(session, Reservation) == 1
+
+
+@pytest.mark.asyncio
+async def test_failed_request_does_not_keep_key(client, session, guest_list):
+    item = guest_list.items[0]
+    missing = SimpleNamespace(id=item.id + 100)
+
+    response = _reserve(client, guest_list, missing, 'not-found')
+    assert response.status_code == HTTPStatus.NOT_FOUND
+    assert await _count(session, IdempotencyKey) == 0
+
+
+def test_retried_rsvp_is_replayed(client, guest_list):
+    url = f'/guest/lists/{guest_list.list.id}/rsvp'
+    headers = {**guest_list.headers, 'Idempotency-Key': 'rsvp-1'}
+    body = {'status': 'confirmed', 'companions': ['Ana']}
+
+    first = client.post(url, headers=headers, json=body)
+    retry = client.post(url, headers=headers, json=body)
+    changed = client.post(
+        url, headers=headers, json={**body, 'status': 'declined'}
+    )
+
+    assert first.status_code == HTTPStatus.CREATED
+    assert retry.json() == first.json()
+    assert retry.headers[REPLAYED_HEADER] == 'true'
+    assert changed.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+
+
+@pytest.mark.asyncio
+async def test_requests_without_key_store_nothing(client, session, guest_list):
+    response = client.post(
+        f'/guest/items/{guest_list.items[0].id}/reserve',
+        headers=guest_list.headers,
+    )
+
+    assert response.status_code == HTTPStatus.CREATED
+    assert await _count(session, IdempotencyKey) == 0
+
+
+@pytest.mark.asyncio
+async def test_concurrent_retries_run_once(session, engine, guest_list):
+    retries = 5
+    session_maker = async_sessionmaker(engine, expire_on_commit=False)
+
+    async def get_session_override():
+        async with session_maker() as request_session:
+            yield request_session
+
+    clear_caches()
+    app.dependency_overrides[get_session] = get_session_override
+    try:
+        async with AsyncClient(
+            transport=ASGITransport(app=app), base_url='http://test'
+        ) as ac:
+            responses = await asyncio.gather(
+                *(
+                    ac.post(
+                        f'/guest/items/{guest_list.items[0].id}/reserve',
+                        headers={
+                            **guest_list.headers,
+                            'Idempotency-Key': 'double-tap',
+                        },
+                    )
+                    for _ in range(retries)
+                )
+            )
+    finally:
+        app.dependency_overrides.clear()
+        clear_caches()
+        # The pooled connections belong to this test's event loop
+        await engine.dispose()
+
+    # Waiting on the first one's key instead of a spurious 409
+    assert {r.status_code for r in responses} == {HTTPStatus.CREATED}
+    assert len({r.json()['id'] for r in responses}) == 1
+    assert await _count(session, Reservation) == 1
+
+
+@pytest.mark.asyncio
+async def test_purge_expired_keys(session, guest_list):
+    now = datetime.now(tz=ZoneInfo('UTC'))
+    session.add_all(
+        IdempotencyKey(
+            user_id=guest_list.guest.id,
+            key=key,
+            fingerprint='',
+            expires_at=expires_at,
+        )
+        for key, expires_at in (
+            ('expired', now - timedelta(seconds=1)),
+            ('live', now + timedelta(hours=1)),
+        )
+    )
+    await session.commit()
+
+    assert await purge_expired_keys(session) == 1
+    assert await session.scalar(select(IdempotencyKey.key)) == 'live'
@@ -0,0 +1,229 @@
+from http import HTTPStatus
+
+import pytest
+import pytest_asyncio
+
+from backend.models import Category, TemplateGiftItem
+
+
+@pytest.fixture
+def casal_headers(client):
+    client.post(
+        '/users/',
+        json={
+            'username': 'casallists',
+            'email': 'casallists@example.com',
+            'password': 'senha123',
+            'role': 'CASAL',
+        },
+    )
+    response = client.post(
+        '/auth/token',
+        data={'username': 'casallists@example.com', 'password': 'senha123'},
+    )
+    return {'Authorization': f'Bearer {response.json()["access_token"]}'}
+
+
+@pytest.fixture
+def wedding_list(client, casal_headers):
+    response = client.post(
+        '/lists/', json={'title': 'Nossa lista'}, headers=casal_headers
+    )
+    return response.json()
+
+
+def _create_items(client, headers, list_id, names):
+    response = client.post(
+        f'/lists/{list_id}/items/batch',
+        json={'create': [{'name': name} for name in names]},
+        headers=headers,
+    )
+    return response.json()['items']
+
+
+def test_batch_creates_many_items(client, casal_headers, wedding_list):
+    expected_items = 300
+    names = [f'Presente {n}' for n in range(expected_items)]
+
+    response = client.post(
+        f'/lists/{wedding_list["id"]}/items/batch',
+        json={'create': [{'name': name} for name in names]},
+        headers=casal_headers,
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    body = response.json()
+    assert [item['name'] for item in body['items']] == names
+    assert body['errors'] == []
+    assert all(item['status'] == 'available' for item in body['items'])
+
+
+def test_batch_updates_and_deletes(client, casal_headers, wedding_list):
+    list_id = wedding_list['id']
+    first, second, third = _create_items(
+        client, casal_headers, list_id, ['A', 'B', 'C']
+    )
+
+    response = client.post(
+        f'/lists/{list_id}/items/batch',
+        json={
+            'update': [
+                {'id': first['id'], 'name': 'A2'},
+                {'id': second['id'], 'description': 'nova'},
+            ],
+            'delete': [third['id']],
+        },
+        headers=casal_headers,
+    )
+
+    body = response.json()
+    assert {(i['id'], i['name'], i['description']) for i in body['items']} == {
+        (first['id'], 'A2', None),
+        (second['id'], 'B', 'nova'),
+    }
+    assert body['deleted'] == [third['id']]
+    remaining = client.get('/lists/my-lists', headers=casal_headers).json()
+    assert {i['name'] for i in remaining['lists'][0]['items']} == {'A2', 'B'}
+
+
+def test_batch_reports_errors_per_item(client, casal_headers, wedding_list):
+    list_id = wedding_list['id']
+    (item,) = _create_items(client, casal_headers, list_id, ['A'])
+
+    response = client.post(
+        f'/lists/{list_id}/items/batch',
+        json={
+            'create': [{'name': 'Novo'}],
+            'update': [{'id': 999, 'name': 'X'}],
+            'delete': [item['id'], item['id']],
+        },
+        headers=casal_headers,
+    )
+
+    body = response.json()
+    assert [i['name'] for i in body['items']] == ['Novo']
+    assert body['deleted'] == [item['id']]
+    assert body['errors'] == [
+        {
+            'operation': 'update',
+            'index': 0,
+            'item_id': 999,
+            'detail': 'Item not found',
+        },
+        {
+            'operation': 'delete',
+            'index': 1,
+            'item_id': item['id'],
+            'detail': 'Duplicate item id',
+        },
+    ]
+
+
+def test_batch_rejects_null_required_fields(
+    client, casal_headers, wedding_list
+):
+    list_id = wedding_list['id']
+    first, second = _create_items(client, casal_headers, list_id, ['A', 'B'])
+
+    response = client.post(
+        f'/lists/{list_id}/items/batch',
+        json={
+            'update': [
+                {'id': first['id'], 'name': None, 'status': None},
+                {'id': second['id'], 'name': 'B2', 'description': None},
+            ]
+        },
+        headers=casal_headers,
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    body = response.json()
+    assert [(i['id'], i['name']) for i in body['items']] == [
+        (second['id'], 'B2')
+    ]
+    assert body['errors'] == [
+        {
+            'operation': 'update',
+            'index': 0,
+            'item_id': first['id'],
+            'detail': 'Fields cannot be null: name, status',
+        }
+    ]
+
+
+def test_batch_list_not_found(client, casal_headers):
+    response = client.post(
+        '/lists/999/items/batch',
+        json={'create': [{'name': 'A'}]},
+        headers=casal_headers,
+    )
+
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+@pytest_asyncio.fixture
+async def catalog(session):
+    kitchen, decor = Category(name='Cozinha'), Category(name='Decoração')
+    session.add_all([kitchen, decor])
+    await session.flush()
+    templates = [
+        TemplateGiftItem(name=name, description=description, category_id=cid)
+        for name, description, cid in [
+            ('Panela', 'Inox', kitchen.id),
+            ('Faqueiro', None, kitchen.id),
+            ('Vaso', None, decor.id),
+            ('Quadro', None, decor.id),
+        ]
+    ]
+    session.add_all(templates)
+    await session.commit()
+    return kitchen, templates
+
+
+def test_create_items_from_templates(
+    client, casal_headers, wedding_list, catalog
+):
+    kitchen, templates = catalog
+    vase = templates[2]
+
+    response = client.post(
+        f'/lists/{wedding_list["id"]}/items/from-templates',
+        json={
+            'template_ids': [vase.id, vase.id, templates[0].id],
+            'category_ids': [kitchen.id, kitchen.id],
+        },
+        headers=casal_headers,
+    )
+
+    assert response.status_code == HTTPStatus.CREATED
+    items = response.json()['items']
+    assert [(i['name'], i['description'], i['status']) for i in items] == [
+        ('Panela', 'Inox', 'available'),
+        ('Faqueiro', None, 'available'),
+        ('Vaso', None, 'available'),
+    ]
+
+
+def test_create_items_from_no_templates(client, casal_headers, wedding_list):
+    response = client.post(
+        f'/lists/{wedding_list["id"]}/items/from-templates',
+        json={'template_ids': [999]},
+        headers=casal_headers,
+    )
+
+    assert response.status_code == HTTPStatus.CREATED
+    assert response.json() == {'items': []}
+
+
+def test_create_items_from_templates_other_owner(
+    client, casal_headers, catalog
+):
+    _, templates = catalog
+
+    response = client.post(
+        '/lists/999/items/from-templates',
+        json={'template_ids': [templates[0].id]},
+        headers=casal_headers,
+    )
+
+    assert response.status_code == HTTPStatus.NOT_FOUND
@@ -0,0 +1,62 @@
+import json
+
+import pytest
+
+from benchmarks.loadtest import (
+    SCENARIOS,
+    LoadTestConfig,
+    main,
+    percentile,
+    run_loadtest,
+)
+
+
+def test_percentile_nearest_rank():
+    values = [n / 10 for n in range(1, 101)]
+
+    assert percentile(values, 50) == values[49]
+    assert percentile(values, 99) == values[98]
+    assert percentile(values[:1], 95) == values[0]
+
+
+@pytest.mark.asyncio
+async def test_loadtest_runs_every_scenario(tmp_path):
+    config = LoadTestConfig(
+        database_url=f'sqlite+aiosqlite:///{tmp_path / "loadtest.db"}',
+        scenarios=tuple(SCENARIOS),
+        operations=6,
+        warmup=2,
+        concurrency=2,
+        guests=3,
+        items=8,
+    )
+
+    result = await run_loadtest(config)
+
+    assert result['meta']['database'] == 'sqlite'
+    assert set(result['scenarios']) == set(SCENARIOS)
+    reserve_cancel = result['scenarios']['reserve_cancel']['by_request']
+    assert set(reserve_cancel) == {'reserve', 'cancel'}
+    for scenario in result['scenarios'].values():
+        assert scenario['errors'] == 0
+        assert scenario['throughput_rps'] > 0
+        for stats in scenario['by_request'].values():
+            assert stats['count'] == config.operations
+            latency = stats['latency_ms']
+            assert latency['p50'] <= latency['p95'] <= latency['p99']
+
+
+def test_main_writes_and_compares_results(tmp_path, capsys):
+    operations = 4
+    baseline, current = tmp_path / 'baseline.json', tmp_path / 'current.json'
+    args = ['--scenario', 'browse', '--operations', str(operations)]
+
+    main([*args, '--output', str(baseline)])
+    main([*args, '--output', str(current), '--compare', str(baseline)])
+
+    result = json.loads(current.read_text())
+    assert result['scenarios']['browse']['requests'] == operations
+    assert result['meta']['config']['scenarios'] == ['browse']
+    out = capsys.readouterr().out
+    assert 'browse/browse: p95 ' in out
+    assert f'Results written to {current}' in out
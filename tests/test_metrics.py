@@ -0,0 +1,89 @@
+from http import HTTPStatus
+
+from backend.metrics import Counter, Histogram, Registry, registry
+
+
+def test_registry_renders_text_format():
+    local = Registry()
+    requests = local.register(
+        Counter('requests_total', 'Requests.', ('route',))
+    )
+    latency = local.register(
+        Histogram('latency_seconds', 'Latency.', ('route',), (0.1, 1))
+    )
+
+    requests.inc(route='/a"b')
+    latency.observe(0.05, route='/a')
+    latency.observe(0.5, route='/a')
+
+    assert local.render().splitlines() == [
+        '# HELP requests_total Requests.',
+        '# TYPE requests_total counter',
+        'requests_total{route="/a\\"b"} 1',
+        '# HELP latency_seconds Latency.',
+        '# TYPE latency_seconds histogram',
+        'latency_seconds_bucket{route="/a",le="0.1"} 1',
+        'latency_seconds_bucket{route="/a",le="1.0"} 2',
+        'latency_seconds_bucket{route="/a",le="+Inf"} 2',
+        'latency_seconds_sum{route="/a"} 0.55',
+        'latency_seconds_count{route="/a"} 2',
+    ]
+
+
+def test_requests_recorded_per_route_template(client, token):
+    labels = {'method': 'PATCH', 'route': '/todos/{todo_id}'}
+
+    def sample(name, **extra):
+        return registry.get_sample_value(name, **labels, **extra) or 0
+
+    before = {
+        'requests': sample('http_requests_total', status='404'),
+        'latency': sample('http_request_duration_seconds_count'),
+        'queries': sample('http_request_db_queries_sum'),
+    }
+
+    for todo_id in (998, 999):
+        response = client.patch(
+            f'/todos/{todo_id}',
+            json={'title': 'x'},
+            headers={'Authorization': f'Bearer {token}'},
+        )
+        assert response.status_code == HTTPStatus.NOT_FOUND
+
+    requests = sample('http_requests_total', status='404')
+    assert requests == before['requests'] + 2
+    latency = sample('http_request_duration_seconds_count')
+    assert latency == before['latency'] + 2
+    # At least the todo lookup of each request
+    assert sample('http_request_db_queries_sum') >= before['queries'] + 2
+
+
+def test_metrics_endpoint(client, metrics_headers):
+    client.get('/does-not-exist')
+
+    response = client.get('/metrics', headers=metrics_headers)
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers['content-type'].startswith('text/plain')
+    body = response.text
+    assert '# TYPE http_request_duration_seconds histogram' in body
+    assert (
+        'http_requests_total{method="GET",route="<unmatched>",status="404"}'
+        in body
+    )
+    assert 'db_pool_stats{stat="checked_out"}' in body
+    assert 'cache_stats{cache="users",stat="hits"}' in body
+    assert 'password_hash_pool_stats{stat="queue_depth"}' in body
+
+
+def test_metrics_endpoint_needs_token(client, metrics_headers):
+    missing = client.get('/metrics')
+    wrong = client.get('/metrics', headers={'Authorization': 'Bearer x'})
+
+    assert missing.status_code == wrong.status_code == HTTPStatus.UNAUTHORIZED
+
+
+def test_metrics_endpoint_off_without_token_setting(client):
+    response = client.get('/metrics', headers={'Authorization': 'Bearer x'})
+
+    assert response.status_code == HTTPStatus.NOT_FOUND
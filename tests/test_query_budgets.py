@@ -0,0 +1,423 @@
+"""Per-endpoint SQL statement budgets.
+
+Every route gets a maximum number of statements for a cold request (empty
+caches), checked against a small and a larger dataset: a budget that only
+holds for the small one means the endpoint issues queries per row (N+1),
+and a new relationship or loader change that adds statements fails here.
+"""
+
+from dataclasses import dataclass
+from http import HTTPStatus
+
+import pytest
+import pytest_asyncio
+from fastapi.routing import APIRoute
+
+from backend.app import app
+from backend.models import (
+    Category,
+    GiftItem,
+    GiftStatus,
+    Rsvp,
+    RsvpCompanion,
+    RsvpStatus,
+    TemplateGiftItem,
+    Todo,
+    TodoState,
+    User,
+    UserRole,
+    WeddingList,
+)
+from backend.security import create_access_token, get_password_hash
+from tests.conftest import METRICS_TOKEN, UserFactory
+
+DATASET_SIZES = (1, 8)
+PASSWORD = 'senha123'
+COMPANIONS = ('Ana', 'Bia')
+
+# Routes that are not request/response shaped
+UNBUDGETED = {
+    # Infinite SSE stream; resolves the list like GET /guest/lists/{link}
+    ('GET', '/guest/lists/{shareable_link}/events'),
+}
+
+
+@dataclass
+class Dataset:
+    """A couple with ``size`` todos and lists; each list has ``size`` gifts
+    (half reserved) and an RSVP with companions from each of ``size``
+    guests. The catalog has ``size`` categories of ``size`` templates."""
+
+    couple: User
+    guest: User
+    wedding_list: WeddingList
+    available_item: GiftItem
+    categories: list[Category]
+
+    @property
+    def couple_headers(self):
+        token = create_access_token({'sub': self.couple.email})
+        return {'Authorization': f'Bearer {token}'}
+
+    @property
+    def guest_headers(self):
+        token = create_access_token({'sub': self.guest.email})
+        return {'Authorization': f'Bearer {token}'}
+
+    @property
+    def metrics_headers(self):
+        return {'Authorization': f'Bearer {METRICS_TOKEN}'}
+
+
+@pytest_asyncio.fixture(params=DATASET_SIZES, ids=lambda n: f'size-{n}')
+async def dataset(request, session):
+    size = request.param
+    couple = UserFactory(password=get_password_hash(PASSWORD))
+    guests = UserFactory.create_batch(size, role=UserRole.CONVIDADO)
+    session.add_all([couple, *guests])
+    await session.flush()
+
+    session.add_all(
+        Todo(
+            title=f'Tarefa {n}',
+            description='',
+            state=TodoState.todo,
+            user_id=couple.id,
+        )
+        for n in range(size)
+    )
+    lists = [
+        WeddingList(
+            title=f'Lista {n}',
+            message=None,
+            event_date=None,
+            shareable_link=f'budget-{n}',
+            owner_id=couple.id,
+        )
+        for n in range(size)
+    ]
+    session.add_all(lists)
+    await session.flush()
+    rsvps = [
+        Rsvp(
+            wedding_list_id=wl.id,
+            guest_id=guest.id,
+            status=RsvpStatus.confirmed,
+        )
+        for wl in lists
+        for guest in guests
+    ]
+    session.add_all(rsvps)
+    items = [
+        GiftItem(
+            name=f'Presente {n}',
+            description=None,
+            wedding_list_id=wl.id,
+            status=GiftStatus.reserved if n % 2 else GiftStatus.available,
+            reserved_by_id=guests[n % size].id if n % 2 else None,
+        )
+        for wl in lists
+        for n in range(max(size, 2))
+    ]
+    session.add_all(items)
+    categories = [Category(name=f'Categoria {n}') for n in range(size)]
+    session.add_all(categories)
+    await session.flush()
+    session.add_all(
+        RsvpCompanion(rsvp_id=rsvp.id, name=name)
+        for rsvp in rsvps
+        for name in COMPANIONS
+    )
+    session.add_all(
+        TemplateGiftItem(
+            name=f'Modelo {n}', description=None, category_id=category.id
+        )
+        for category in categories
+        for n in range(size)
+    )
+    await session.commit()
+    # Leave nothing loaded: the endpoints must not see seeded state
+    session.expunge_all()
+
+    return Dataset(couple, guests[0], lists[0], items[0], categories)
+
+
+# (method, route) -> (budget, request factory). A factory returns the path
+# and request arguments; it may make requests of its own (outside the
+# budget) to set up the one it returns.
+#
+# Endpoints that load a full User or WeddingList pay for the selectin
+# chains (todos, lists -> items, rsvps -> companions): one statement per
+# relationship, whatever the number of rows. Lower a budget when a change
+# trims them; raising one needs a reason.
+BUDGETS = {}
+
+
+def budget(method, route, max_queries):
+    def register(make_request):
+        BUDGETS[method, route] = (max_queries, make_request)
+        return make_request
+
+    return register
+
+
+@budget('POST', '/auth/token', 7)
+def _token(client, data):
+    return '/auth/token', {
+        'data': {'username': data.couple.email, 'password': PASSWORD}
+    }
+
+
+@budget('POST', '/auth/refresh_token', 1)
+def _refresh_token(client, data):
+    return '/auth/refresh_token', {'headers': data.couple_headers}
+
+
+@budget('POST', '/users/', 6)
+def _create_user(client, data):
+    return '/users/', {
+        'json': {
+            'username': 'novo',
+            'email': 'novo@example.com',
+            'password': PASSWORD,
+        }
+    }
+
+
+@budget('GET', '/users/', 8)
+def _list_users(client, data):
+    return '/users/', {'headers': data.couple_headers}
+
+
+@budget('GET', '/users/me', 1)
+def _read_me(client, data):
+    return '/users/me', {'headers': data.couple_headers}
+
+
+@budget('PUT', '/users/{user_id}', 3)
+def _update_user(client, data):
+    return f'/users/{data.couple.id}', {
+        'headers': data.couple_headers,
+        'json': {
+            'username': 'renomeado',
+            'email': data.couple.email,
+            'password': PASSWORD,
+        },
+    }
+
+
+@budget('DELETE', '/users/{user_id}', 14)
+def _delete_user(client, data):
+    return f'/users/{data.couple.id}', {'headers': data.couple_headers}
+
+
+@budget('POST', '/todos/', 3)
+def _create_todo(client, data):
+    return '/todos/', {
+        'headers': data.couple_headers,
+        'json': {'title': 'Nova', 'description': '', 'state': 'todo'},
+    }
+
+
+@budget('GET', '/todos/', 2)
+def _list_todos(client, data):
+    return '/todos/', {'headers': data.couple_headers}
+
+
+@budget('PATCH', '/todos/{todo_id}', 4)
+def _patch_todo(client, data):
+    todo_id = client.get('/todos/', headers=data.couple_headers).json()[
+        'todos'
+    ][0]['id']
+    return f'/todos/{todo_id}', {
+        'headers': data.couple_headers,
+        'json': {'title': 'Editada'},
+    }
+
+
+@budget('DELETE', '/todos/{todo_id}', 3)
+def _delete_todo(client, data):
+    todo_id = client.get('/todos/', headers=data.couple_headers).json()[
+        'todos'
+    ][0]['id']
+    return f'/todos/{todo_id}', {'headers': data.couple_headers}
+
+
+@budget('POST', '/lists/', 5)
+def _create_list(client, data):
+    return '/lists/', {
+        'headers': data.couple_headers,
+        'json': {'title': 'Nova lista'},
+    }
+
+
+@budget('GET', '/lists/my-lists', 5)
+def _my_lists(client, data):
+    return '/lists/my-lists', {'headers': data.couple_headers}
+
+
+@budget('PUT', '/lists/{list_id}', 10)
+def _update_list(client, data):
+    return f'/lists/{data.wedding_list.id}', {
+        'headers': data.couple_headers,
+        'json': {'title': 'Renomeada'},
+    }
+
+
+@budget('POST', '/lists/{list_id}/generate-link', 10)
+def _generate_link(client, data):
+    return f'/lists/{data.wedding_list.id}/generate-link', {
+        'headers': data.couple_headers
+    }
+
+
+@budget('DELETE', '/lists/{list_id}', 9)
+def _delete_list(client, data):
+    return f'/lists/{data.wedding_list.id}', {'headers': data.couple_headers}
+
+
+@budget('POST', '/lists/{list_id}/items', 7)
+def _create_item(client, data):
+    return f'/lists/{data.wedding_list.id}/items', {
+        'headers': data.couple_headers,
+        'json': {'name': 'Novo presente'},
+    }
+
+
+@budget('POST', '/lists/{list_id}/items/batch', 6)
+def _batch_items(client, data):
+    item = data.available_item
+    return f'/lists/{data.wedding_list.id}/items/batch', {
+        'headers': data.couple_headers,
+        'json': {
+            'create': [{'name': f'Lote {n}'} for n in range(3)],
+            'update': [{'id': item.id, 'name': 'Editado'}],
+        },
+    }
+
+
+@budget('POST', '/lists/{list_id}/items/from-templates', 2)
+def _items_from_templates(client, data):
+    return f'/lists/{data.wedding_list.id}/items/from-templates', {
+        'headers': data.couple_headers,
+        'json': {'category_ids': [c.id for c in data.categories]},
+    }
+
+
+@budget('PUT', '/lists/{list_id}/items/{item_id}', 8)
+def _update_item(client, data):
+    item = data.available_item
+    return f'/lists/{data.wedding_list.id}/items/{item.id}', {
+        'headers': data.couple_headers,
+        'json': {'name': 'Editado'},
+    }
+
+
+@budget('DELETE', '/lists/{list_id}/items/{item_id}', 7)
+def _delete_item(client, data):
+    item = data.available_item
+    return f'/lists/{data.wedding_list.id}/items/{item.id}', {
+        'headers': data.couple_headers
+    }
+
+
+@budget('GET', '/lists/{list_id}/tracking', 2)
+def _tracking(client, data):
+    return f'/lists/{data.wedding_list.id}/tracking', {
+        'headers': data.couple_headers
+    }
+
+
+@budget('GET', '/lists/{list_id}/tracking/export', 4)
+def _tracking_export(client, data):
+    return f'/lists/{data.wedding_list.id}/tracking/export', {
+        'headers': data.couple_headers
+    }
+
+
+@budget('GET', '/guest/lists/{shareable_link}', 4)
+def _public_list(client, data):
+    return f'/guest/lists/{data.wedding_list.shareable_link}', {
+        'headers': data.guest_headers
+    }
+
+
+@budget('POST', '/guest/items/{item_id}/reserve', 3)
+def _reserve(client, data):
+    return f'/guest/items/{data.available_item.id}/reserve', {
+        'headers': data.guest_headers
+    }
+
+
+@budget('DELETE', '/guest/reservations/{reservation_id}', 4)
+def _cancel_reservation(client, data):
+    reservation_id = client.post(
+        f'/guest/items/{data.available_item.id}/reserve',
+        headers=data.guest_headers,
+    ).json()['id']
+    return f'/guest/reservations/{reservation_id}', {
+        'headers': data.guest_headers
+    }
+
+
+@budget('POST', '/guest/lists/{list_id}/rsvp', 4)
+def _rsvp(client, data):
+    return f'/guest/lists/{data.wedding_list.id}/rsvp', {
+        'headers': data.guest_headers,
+        'json': {'status': 'confirmed', 'companions': list(COMPANIONS)},
+    }
+
+
+@budget('GET', '/guest/me/details', 7)
+def _guest_details(client, data):
+    return '/guest/me/details', {'headers': data.guest_headers}
+
+
+@budget('GET', '/template-items', 3)
+def _template_items(client, data):
+    return '/template-items', {'headers': data.couple_headers}
+
+
+@budget('GET', '/health/', 0)
+def _health(client, data):
+    return '/health/', {}
+
+
+@budget('GET', '/health/details', 0)
+def _health_details(client, data):
+    return '/health/details', {'headers': data.metrics_headers}
+
+
+@budget('GET', '/metrics', 0)
+def _metrics(client, data):
+    return '/metrics', {'headers': data.metrics_headers}
+
+
+def test_every_endpoint_has_a_budget():
+    routes = {
+        (method, route.path)
+        for route in app.routes
+        if isinstance(route, APIRoute)
+        for method in route.methods
+    }
+
+    assert routes - UNBUDGETED == set(BUDGETS)
+
+
+@pytest.mark.parametrize(
+    ('method', 'route'),
+    sorted(BUDGETS),
+    ids=[f'{method} {route}' for method, route in sorted(BUDGETS)],
+)
+@pytest.mark.usefixtures('metrics_headers')
+def test_endpoint_query_budget(client, dataset, query_budget, method, route):
+    max_queries, make_request = BUDGETS[method, route]
+    path, kwargs = make_request(client, dataset)
+
+    with query_budget(max_queries) as statements:
+        response = client.request(method, path, **kwargs)
+
+    # Exceeding the budget fails with the statement count and the SQL
+    assert response.status_code < HTTPStatus.BAD_REQUEST, (
+        f'{len(statements)} statements: {response.text}'
+    )
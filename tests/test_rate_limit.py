@@ -0,0 +1,145 @@
+from http import HTTPStatus
+from types import SimpleNamespace
+
+import pytest
+
+from backend import rate_limit
+from backend.models import RateLimitBucket
+from backend.rate_limit import (
+    LoginRateLimiter,
+    MemoryBuckets,
+    PostgresBuckets,
+    Rate,
+)
+from backend.routers import auth
+
+USERNAME_BURST = 2
+IP_BURST = 3
+PER_SECOND = 0.5
+
+
+@pytest.fixture
+def clock():
+    return SimpleNamespace(now=0.0)
+
+
+@pytest.fixture
+def limiter(monkeypatch, clock):
+    def buckets(kind, burst):
+        return MemoryBuckets(
+            f'test_login_{kind}',
+            Rate(burst, PER_SECOND),
+            maxsize=100,
+            timer=lambda: clock.now,
+        )
+
+    login_limiter = LoginRateLimiter({
+        'ip': buckets('ip', IP_BURST),
+        'username': buckets('username', USERNAME_BURST),
+    })
+    monkeypatch.setattr(rate_limit, 'login_limiter', login_limiter)
+    return login_limiter
+
+
+@pytest.fixture
+def verifications(monkeypatch):
+    calls = []
+    verify = auth.verify_password_async
+
+    async def counting_verify(*args):
+        calls.append(args)
+        return await verify(*args)
+
+    monkeypatch.setattr(auth, 'verify_password_async', counting_verify)
+    return calls
+
+
+def _login(client, username, password='wrong'):
+    return client.post(
+        '/auth/token', data={'username': username, 'password': password}
+    )
+
+
+def test_rejects_before_hashing(
+    client, user, limiter, verifications, capture_statements
+):
+    failed = [_login(client, user.email) for _ in range(USERNAME_BURST)]
+
+    with capture_statements() as statements:
+        response = _login(client, user.email, user.clean_password)
+
+    assert {r.status_code for r in failed} == {HTTPStatus.UNAUTHORIZED}
+    assert response.status_code == HTTPStatus.TOO_MANY_REQUESTS
+    assert response.headers['Retry-After'] == str(int(1 / PER_SECOND))
+    assert len(verifications) == USERNAME_BURST
+    assert statements == []
+    assert limiter.stats() == {
+        'allowed': USERNAME_BURST,
+        'rejected_ip': 0,
+        'rejected_username': 1,
+    }
+
+
+def test_buckets_refill(client, user, limiter, clock):
+    for _ in range(USERNAME_BURST):
+        _login(client, user.email)
+    assert _login(client, user.email).status_code == (
+        HTTPStatus.TOO_MANY_REQUESTS
+    )
+
+    clock.now += 1 / PER_SECOND
+    response = _login(client, user.email, user.clean_password)
+
+    assert response.status_code == HTTPStatus.OK
+
+
+def test_usernames_are_normalized(client, user, limiter):
+    for username in (user.email.upper(), f' {user.email} '):
+        _login(client, username)
+
+    response = _login(client, user.email, user.clean_password)
+
+    assert response.status_code == HTTPStatus.TOO_MANY_REQUESTS
+
+
+def test_client_ip_bucket_spans_usernames(client, limiter):
+    responses = [_login(client, f'guest{n}') for n in range(IP_BURST + 1)]
+
+    assert [r.status_code for r in responses] == [
+        *[HTTPStatus.UNAUTHORIZED] * IP_BURST,
+        HTTPStatus.TOO_MANY_REQUESTS,
+    ]
+    assert limiter.rejected == {'ip': 1, 'username': 0}
+
+
+def test_decisions_are_exported(client, user, metrics_headers):
+    # The app's own limiter, which /metrics reports
+    for _ in range(rate_limit.settings.LOGIN_USERNAME_BURST + 1):
+        _login(client, user.email)
+
+    body = client.get('/metrics', headers=metrics_headers).text
+
+    stats = rate_limit.login_limiter.stats()
+    assert stats['rejected_username'] >= 1
+    for stat, value in stats.items():
+        assert f'login_rate_limit_stats{{stat="{stat}"}} {value}\n' in body
+
+
+@pytest.mark.asyncio
+async def test_postgres_buckets(session, clock):
+    buckets = PostgresBuckets(
+        'username', Rate(USERNAME_BURST, PER_SECOND), timer=lambda: clock.now
+    )
+
+    taken = [await buckets.take(session, 'alice') for _ in range(3)]
+    other = await buckets.take(session, 'bob')
+    clock.now += 1 / PER_SECOND
+    refilled = await buckets.take(session, 'alice')
+
+    assert taken == [True, True, False]
+    assert other is True
+    assert refilled is True
+
+    clock.now += USERNAME_BURST / PER_SECOND
+    assert await buckets.purge(session) == 1 + 1
+    assert await session.get(RateLimitBucket, 'username:alice') is None
@@ -0,0 +1,74 @@
+import json
+from http import HTTPStatus
+
+import pytest
+
+from backend.models import GiftItem, GiftStatus, WeddingList
+from backend.responses import ModelResponse, dump_json, type_adapter
+from backend.schemas import (
+    GiftItemList,
+    WeddingListPublic,
+    WeddingListPublicGuest,
+)
+
+
+def _build_list(items: int) -> WeddingList:
+    """Transient ORM list shaped like the ones the routers return."""
+    wl = WeddingList(
+        title='Lista',
+        message='Obrigado!',
+        event_date=None,
+        shareable_link='respostas',
+        owner_id=1,
+        delivery_info=None,
+    )
+    wl.id = 1
+    wl.items = []
+    for n in range(items):
+        item = GiftItem(
+            name=f'Presente {n}',
+            description=None if n % 2 else f'Descrição {n}',
+            wedding_list_id=wl.id,
+            status=GiftStatus.reserved if n % 3 else GiftStatus.available,
+            reserved_by_id=n if n % 3 else None,
+        )
+        item.id = n + 1
+        wl.items.append(item)
+    return wl
+
+
+def test_model_response_from_orm_objects():
+    wl = _build_list(3)
+
+    response = ModelResponse(
+        GiftItemList, {'items': wl.items}, status_code=HTTPStatus.CREATED
+    )
+
+    assert response.status_code == HTTPStatus.CREATED
+    assert response.media_type == 'application/json'
+    assert [i['name'] for i in json.loads(response.body)['items']] == [
+        'Presente 0',
+        'Presente 1',
+        'Presente 2',
+    ]
+
+
+def test_dump_json_skips_validation_of_instances():
+    payload = WeddingListPublic.model_validate(_build_list(2))
+
+    assert json.loads(dump_json(WeddingListPublic, payload)) == (
+        payload.model_dump(mode='json')
+    )
+    assert type_adapter(WeddingListPublic) is type_adapter(WeddingListPublic)
+
+
+@pytest.mark.parametrize('schema', [WeddingListPublic, WeddingListPublicGuest])
+def test_model_response_matches_response_model(schema):
+    wl = _build_list(5)
+
+    response = ModelResponse(schema, wl)
+
+    # What response_model validation and dumping would send
+    assert json.loads(response.body) == (
+        schema.model_validate(wl).model_dump(mode='json')
+    )
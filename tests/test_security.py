@@ -1,8 +1,20 @@
+import asyncio
 from http import HTTPStatus
 
+import pytest
 from jwt import decode
 
-from backend.security import create_access_token, settings
+from backend.security import (
+    PasswordHashPool,
+    create_access_token,
+    get_password_hash,
+    get_password_hash_async,
+    password_hash_pool,
+    settings,
+    user_cache,
+    verify_password,
+    verify_password_async,
+)
 
 
 def test_jwt():
@@ -50,3 +62,88 @@ def test_get_current_user_does_not_exists__exercicio(client):
 
     assert response.status_code == HTTPStatus.UNAUTHORIZED
     assert response.json() == {'detail': 'Could not validate credentials'}
+
+
+def test_get_current_user_issues_single_query(
+    client, user, token, capture_statements
+):
+    with capture_statements() as statements:
+        response = client.get(
+            '/users/me', headers={'Authorization': f'Bearer {token}'}
+        )
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()['email'] == user.email
+    assert len(statements) == 1
+
+
+def test_get_current_user_is_cached(client, user, token, capture_statements):
+    headers = {'Authorization': f'Bearer {token}'}
+    client.get('/users/me', headers=headers)
+
+    with capture_statements() as statements:
+        response = client.get('/users/me', headers=headers)
+
+    assert response.status_code == HTTPStatus.OK
+    assert statements == []
+    assert user_cache.stats()['hits'] == 1
+
+
+def test_update_user_invalidates_cached_user(client, user, token):
+    headers = {'Authorization': f'Bearer {token}'}
+    client.get('/users/me', headers=headers)
+
+    client.put(
+        f'/users/{user.id}',
+        headers=headers,
+        json={
+            'username': 'bob',
+            'email': 'bob@example.com',
+            'password': 'mynewpassword',
+        },
+    )
+    response = client.get('/users/me', headers=headers)
+
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+
+
+def test_delete_user_invalidates_cached_user(client, user, token):
+    headers = {'Authorization': f'Bearer {token}'}
+    client.get('/users/me', headers=headers)
+
+    client.delete(f'/users/{user.id}', headers=headers)
+    response = client.get('/users/me', headers=headers)
+
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+
+
+@pytest.mark.asyncio
+async def test_password_hash_async_roundtrip():
+    hashed = await get_password_hash_async('secret')
+
+    assert await verify_password_async('secret', hashed)
+    assert not await verify_password_async('wrong', hashed)
+    assert password_hash_pool.stats()['pending'] == 0
+
+
+@pytest.mark.asyncio
+async def test_password_hash_pool_reports_queue_depth():
+    expected_queued = 2
+    pool = PasswordHashPool(max_workers=1)
+    hashed = get_password_hash('secret')
+    depths = []
+
+    async def probe():
+        await asyncio.sleep(0)
+        depths.append(pool.queue_depth)
+
+    try:
+        await asyncio.gather(
+            *(pool.run(verify_password, 'secret', hashed) for _ in range(3)),
+            probe(),
+        )
+    finally:
+        pool.shutdown()
+
+    assert depths == [expected_queued]
+    assert pool.queue_depth == 0
@@ -0,0 +1,108 @@
+from http import HTTPStatus
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import select
+
+from backend.models import Category, TemplateGiftItem
+
+
+@pytest.fixture
+def casal_headers(client):
+    client.post(
+        '/users/',
+        json={
+            'username': 'casalcatalog',
+            'email': 'casalcatalog@example.com',
+            'password': 'senha123',
+            'role': 'CASAL',
+        },
+    )
+    response = client.post(
+        '/auth/token',
+        data={'username': 'casalcatalog@example.com', 'password': 'senha123'},
+    )
+    return {'Authorization': f'Bearer {response.json()["access_token"]}'}
+
+
+@pytest_asyncio.fixture
+async def catalog(session):
+    kitchen = Category(name='Cozinha')
+    session.add(kitchen)
+    await session.flush()
+    session.add_all([
+        TemplateGiftItem(
+            name='Panela', description='Inox', category_id=kitchen.id
+        ),
+        TemplateGiftItem(
+            name='Cafeteira', description=None, category_id=kitchen.id
+        ),
+    ])
+    await session.commit()
+    return kitchen
+
+
+def test_list_template_items_grouped(client, casal_headers, catalog):
+    response = client.get('/template-items', headers=casal_headers)
+
+    assert response.status_code == HTTPStatus.OK
+    groups = response.json()['groups']
+    assert [g['category']['name'] for g in groups] == ['Cozinha']
+    assert {i['name'] for i in groups[0]['items']} == {'Panela', 'Cafeteira'}
+    assert response.headers['etag']
+
+
+def test_list_template_items_not_modified(client, casal_headers, catalog):
+    etag = client.get('/template-items', headers=casal_headers).headers['etag']
+
+    response = client.get(
+        '/template-items', headers={**casal_headers, 'If-None-Match': etag}
+    )
+
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+    assert response.headers['etag'] == etag
+    assert not response.content
+
+
+@pytest.mark.asyncio
+async def test_list_template_items_etag_changes_with_catalog(
+    session, client, casal_headers, catalog
+):
+    expected_items = 3
+    etag = client.get('/template-items', headers=casal_headers).headers['etag']
+    session.add(
+        TemplateGiftItem(
+            name='Jarra', description=None, category_id=catalog.id
+        )
+    )
+    await session.commit()
+
+    response = client.get(
+        '/template-items', headers={**casal_headers, 'If-None-Match': etag}
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers['etag'] != etag
+    assert len(response.json()['groups'][0]['items']) == expected_items
+
+
+@pytest.mark.asyncio
+async def test_list_template_items_refreshed_after_in_place_update(
+    session, client, casal_headers, catalog
+):
+    etag = client.get('/template-items', headers=casal_headers).headers['etag']
+    template = await session.scalar(
+        select(TemplateGiftItem).where(TemplateGiftItem.name == 'Panela')
+    )
+    template.description = 'Inox, 5 peças'
+    catalog.name = 'Cozinha e mesa'
+    await session.commit()
+
+    response = client.get(
+        '/template-items', headers={**casal_headers, 'If-None-Match': etag}
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    group = response.json()['groups'][0]
+    assert group['category']['name'] == 'Cozinha e mesa'
+    assert 'Inox, 5 peças' in {i['description'] for i in group['items']}
@@ -1,7 +1,10 @@
+import json
 from http import HTTPStatus
 
 import factory.fuzzy
 import pytest
+from sqlalchemy import select, text
+from sqlalchemy.dialects import postgresql
 
 from backend.models import Todo, TodoState
 
@@ -152,6 +155,52 @@ async def test_list_todos_filter_combined_should_return_5_todos(
     assert len(response.json()['todos']) == expected_todos
 
 
+@pytest.mark.asyncio
+async def test_list_todos_cursor_pagination_walks_all_pages(
+    session, user, client, token
+):
+    expected_pages = [2, 2, 1]
+    session.add_all(TodoFactory.create_batch(5, user_id=user.id))
+    await session.commit()
+
+    pages, seen_ids, cursor = [], [], None
+    while True:
+        params = {'limit': 2, **({'cursor': cursor} if cursor else {})}
+        response = client.get(
+            '/todos/',
+            params=params,
+            headers={'Authorization': f'Bearer {token}'},
+        )
+        body = response.json()
+        pages.append(len(body['todos']))
+        seen_ids.extend(todo['id'] for todo in body['todos'])
+        cursor = body['next_cursor']
+        if not cursor:
+            break
+
+    assert pages == expected_pages
+    assert seen_ids == sorted(set(seen_ids))
+
+
+def test_list_todos_invalid_cursor(client, token):
+    response = client.get(
+        '/todos/?cursor=not-a-cursor',
+        headers={'Authorization': f'Bearer {token}'},
+    )
+
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert response.json() == {'detail': 'Invalid cursor'}
+
+
+def test_list_todos_limit_is_capped(client, token):
+    response = client.get(
+        '/todos/?limit=1000',
+        headers={'Authorization': f'Bearer {token}'},
+    )
+
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+
+
 def test_patch_todo_error(client, token):
     response = client.patch(
         '/todos/10',
@@ -222,3 +271,40 @@ def test_list_todos_filter_max_length_exercicio_06(client, token):
     )
 
     assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+
+
+@pytest.mark.asyncio
+async def test_search_todos_by_title_uses_trigram_index(
+    session, user, client, token
+):
+    if not await session.scalar(
+        text("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+    ):
+        pytest.skip('pg_trgm not available, search falls back to a scan')
+    session.add_all(
+        Todo(
+            title=title,
+            description='descricao',
+            state=TodoState.todo,
+            user_id=user.id,
+        )
+        for title in ('Comprar agulha', 'Tarefa de rotina', 'Lavar louça')
+    )
+    await session.commit()
+
+    response = client.get(
+        '/todos/?title=agulha',
+        headers={'Authorization': f'Bearer {token}'},
+    )
+
+    assert [t['title'] for t in response.json()['todos']] == ['Comprar agulha']
+    # Too few rows for the planner to pick it over the user_id index, so
+    # only the title filter is planned; timings on 100k todos are in
+    # benchmarks/queries.py
+    await session.execute(text('SET LOCAL enable_seqscan = off'))
+    query = select(Todo).where(Todo.title.contains('agulha'))
+    sql = query.compile(
+        dialect=postgresql.dialect(), compile_kwargs={'literal_binds': True}
+    )
+    plan = await session.scalar(text(f'EXPLAIN (FORMAT JSON) {sql}'))
+    assert 'ix_todos_title_trgm' in json.dumps(plan)
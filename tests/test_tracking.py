@@ -0,0 +1,231 @@
+import csv
+import io
+import json
+from http import HTTPStatus
+from math import ceil
+
+import pytest
+import pytest_asyncio
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from backend.models import (
+    GiftItem,
+    GiftStatus,
+    Rsvp,
+    RsvpCompanion,
+    RsvpStatus,
+    UserRole,
+    WeddingList,
+    table_registry,
+)
+from backend.security import create_access_token
+from backend.tracking import (
+    EXPORT_BATCH_SIZE,
+    get_tracking,
+    stream_tracking_export,
+)
+from tests.conftest import UserFactory
+
+COMPANIONS = ('Ana', 'Bia')
+
+
+async def _seed(session, *, items, rsvps):
+    couple = UserFactory()
+    guests = UserFactory.create_batch(rsvps, role=UserRole.CONVIDADO)
+    session.add_all([couple, *guests])
+    await session.commit()
+    wl = WeddingList(
+        title='Relatório',
+        message=None,
+        event_date=None,
+        shareable_link=f'tracking-{items}-{rsvps}',
+        owner_id=couple.id,
+    )
+    session.add(wl)
+    await session.commit()
+    # Every other gift is reserved by one of the guests
+    session.add_all(
+        GiftItem(
+            name=f'Presente {n}',
+            description=None,
+            wedding_list_id=wl.id,
+            status=GiftStatus.reserved if n % 2 else GiftStatus.available,
+            reserved_by_id=guests[n % rsvps].id if n % 2 else None,
+        )
+        for n in range(items)
+    )
+    rsvp_rows = [
+        Rsvp(
+            wedding_list_id=wl.id,
+            guest_id=guest.id,
+            status=RsvpStatus.confirmed if n % 2 else RsvpStatus.pending,
+        )
+        for n, guest in enumerate(guests)
+    ]
+    session.add_all(rsvp_rows)
+    await session.flush()
+    # Every other confirmed RSVP brings two companions
+    session.add_all(
+        RsvpCompanion(rsvp_id=rsvp.id, name=name)
+        for rsvp in rsvp_rows[1::4]
+        for name in COMPANIONS
+    )
+    await session.commit()
+    return couple, guests, wl
+
+
+@pytest_asyncio.fixture
+async def small_list(session):
+    return await _seed(session, items=4, rsvps=2)
+
+
+def test_tracking_report(client, small_list):
+    couple, guests, wl = small_list
+
+    response = client.get(
+        f'/lists/{wl.id}/tracking',
+        headers={
+            'Authorization': 'Bearer '
+            + create_access_token({'sub': couple.email})
+        },
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    body = response.json()
+    assert body['list_id'] == wl.id
+    assert [g['gift']['name'] for g in body['gifts']] == [
+        'Presente 1',
+        'Presente 3',
+    ]
+    assert body['gifts'][0]['reserved_by_id'] == guests[1].id
+    assert body['gifts'][0]['reserved_by_name'] == guests[1].username
+    assert body['gifts'][0]['gift']['status'] == 'reserved'
+    assert [
+        (r['guest_name'], [c['name'] for c in r['companions']])
+        for r in body['rsvps']
+    ] == [(guests[0].username, []), (guests[1].username, ['Ana', 'Bia'])]
+    companion_ids = [c['id'] for c in body['rsvps'][1]['companions']]
+    assert companion_ids == sorted(companion_ids)
+    # The confirmed guest and their companions
+    assert body['headcount'] == 1 + len(COMPANIONS)
+
+
+def test_tracking_other_owner_not_found(client, small_list):
+    _, guests, wl = small_list
+
+    response = client.get(
+        f'/lists/{wl.id}/tracking',
+        headers={
+            'Authorization': 'Bearer '
+            + create_access_token({'sub': guests[0].email})
+        },
+    )
+
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+@pytest.mark.asyncio
+async def test_tracking_sqlite_fallback():
+    engine = create_async_engine('sqlite+aiosqlite:///:memory:')
+    async with engine.begin() as conn:
+        await conn.run_sync(table_registry.metadata.create_all)
+    try:
+        async with AsyncSession(engine, expire_on_commit=False) as session:
+            couple, guests, wl = await _seed(session, items=4, rsvps=2)
+            report = await get_tracking(session, wl.id, couple.id)
+            missing = await get_tracking(session, wl.id, guests[0].id)
+    finally:
+        await engine.dispose()
+
+    assert [g['gift']['id'] for g in report['gifts']] == [2, 4]
+    assert report['gifts'][1]['reserved_by_name'] == guests[1].username
+    assert [[c['name'] for c in r['companions']] for r in report['rsvps']] == [
+        [],
+        ['Ana', 'Bia'],
+    ]
+    assert report['headcount'] == 1 + len(COMPANIONS)
+    assert missing is None
+
+
+@pytest.mark.asyncio
+async def test_tracking_large_list_single_statement(
+    session, capture_statements
+):
+    items, rsvps = 2000, 800
+    couple, _, wl = await _seed(session, items=items, rsvps=rsvps)
+
+    with capture_statements() as statements:
+        report = await get_tracking(session, wl.id, couple.id)
+
+    assert len(statements) == 1
+    assert len(report['gifts']) == items // 2
+    assert len(report['rsvps']) == rsvps
+    companions = len(range(1, rsvps, 4)) * len(COMPANIONS)
+    assert report['headcount'] == rsvps // 2 + companions
+
+
+def test_tracking_export_csv(client, small_list):
+    couple, guests, wl = small_list
+
+    response = client.get(
+        f'/lists/{wl.id}/tracking/export',
+        headers={
+            'Authorization': 'Bearer '
+            + create_access_token({'sub': couple.email})
+        },
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers['content-type'].startswith('text/csv')
+    assert 'tracking-' in response.headers['content-disposition']
+    rows = list(csv.DictReader(io.StringIO(response.text.lstrip('\ufeff'))))
+    assert [(r['kind'], r['guest_name']) for r in rows] == [
+        ('gift', guests[1].username),
+        ('gift', guests[1].username),
+        ('rsvp', guests[0].username),
+        ('rsvp', guests[1].username),
+        ('companion', 'Ana'),
+        ('companion', 'Bia'),
+    ]
+    assert rows[0]['name'] == 'Presente 1'
+    assert rows[0]['status'] == 'reserved'
+
+
+def test_tracking_export_ndjson_other_owner(client, small_list):
+    _, guests, wl = small_list
+
+    response = client.get(
+        f'/lists/{wl.id}/tracking/export?format=ndjson',
+        headers={
+            'Authorization': 'Bearer '
+            + create_access_token({'sub': guests[0].email})
+        },
+    )
+
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+@pytest.mark.asyncio
+async def test_tracking_export_streams_in_batches(session, engine):
+    items, rsvps = 3000, 600
+    _, _, wl = await _seed(session, items=items, rsvps=rsvps)
+
+    chunks = [
+        chunk
+        async for chunk in stream_tracking_export(engine, wl.id, 'ndjson')
+    ]
+
+    rows = [json.loads(line) for c in chunks for line in c.splitlines()]
+    with_companions = len(range(1, rsvps, 4))
+    companions = with_companions * len(COMPANIONS)
+    assert len(rows) == items // 2 + rsvps + companions
+    assert {r['id'] for r in rows if r['kind'] == 'companion'} == set(
+        range(1, companions + 1)
+    )
+    # One chunk per server-side cursor batch of gifts, then of RSVP rows
+    # (joined to their companions)
+    rsvp_rows = rsvps - with_companions + companions
+    assert len(chunks) == (
+        ceil(items // 2 / EXPORT_BATCH_SIZE)
+        + ceil(rsvp_rows / EXPORT_BATCH_SIZE)
+    )
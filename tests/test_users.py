@@ -51,7 +51,18 @@ def test_read_users(client, user):
     user_schema = UserPublic.model_validate(user).model_dump()
     response = client.get('/users/')
     assert response.status_code == HTTPStatus.OK
-    assert response.json() == {'users': [user_schema]}
+    assert response.json() == {'users': [user_schema], 'next_cursor': None}
+
+
+def test_read_users_with_cursor(client, user, other_user):
+    first = client.get('/users/?limit=1').json()
+    second = client.get(
+        '/users/', params={'limit': 1, 'cursor': first['next_cursor']}
+    ).json()
+
+    assert [u['id'] for u in first['users']] == [user.id]
+    assert [u['id'] for u in second['users']] == [other_user.id]
+    assert second['next_cursor'] is None
 
 
 def test_update_user(client, user, token):